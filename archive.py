@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hacker News 爬虫 - 历史数据列式归档
+
+把已结束日期的 hn_news_YYYY-MM-DD.csv 压缩为 Parquet 列式归档，按月分区:
+
+    ARCHIVE_DIR/month=2025-05/hn_news_2025-05-24.parquet
+
+每个文件按分数降序写入并保留行组统计信息（min/max），查询时先按月份目录、
+再按行组统计裁剪，只读取可能命中的行组，且通过内存映射打开文件。
+
+用法:
+  python archive.py compact                               压缩所有已结束日期的CSV
+  python archive.py query --min-score 300 --start 2025-05-01 --end 2025-05-31
+"""
+
+import os
+import re
+import sys
+import argparse
+import logging
+from datetime import datetime, date
+
+import pandas as pd
+from dotenv import load_dotenv
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # 可选依赖
+    pa = None
+    pc = None
+    pq = None
+
+CSV_PATTERN = re.compile(r'^hn_news_(\d{4}-\d{2}-\d{2})\.csv$')
+
+INT_COLUMNS = ['score', 'comments']
+STRING_COLUMNS = ['title', 'title_cn', 'url', 'hn_url', 'content_summary', 'content_summary_cn', 'sent_time']
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("归档功能需要安装pyarrow: pip install pyarrow")
+
+
+def archive_schema():
+    _require_pyarrow()
+    return pa.schema([
+        ('id', pa.int64()),
+        ('title', pa.string()),
+        ('title_cn', pa.string()),
+        ('url', pa.string()),
+        ('hn_url', pa.string()),
+        ('score', pa.int64()),
+        ('comments', pa.int64()),
+        ('content_summary', pa.string()),
+        ('content_summary_cn', pa.string()),
+        ('crawl_time', pa.timestamp('us')),
+        ('sent_time', pa.string()),
+        ('is_sent', pa.bool_()),
+        ('date', pa.date32()),
+    ])
+
+
+def list_daily_csv(data_dir):
+    """返回 [(日期, CSV路径), ...]，按日期排序"""
+    result = []
+    if not os.path.isdir(data_dir):
+        return result
+    for name in os.listdir(data_dir):
+        match = CSV_PATTERN.match(name)
+        if match:
+            day = datetime.strptime(match.group(1), '%Y-%m-%d').date()
+            result.append((day, os.path.join(data_dir, name)))
+    return sorted(result)
+
+
+def archive_path(archive_dir, day):
+    return os.path.join(archive_dir, f"month={day:%Y-%m}", f"hn_news_{day:%Y-%m-%d}.parquet")
+
+
+def _csv_to_table(csv_path, day):
+    df = pd.read_csv(csv_path)
+    df = df.drop_duplicates(subset=['id'], keep='last')
+    # 补全时判定为正文重复的新闻不进入归档
+    if 'duplicate_of' in df:
+        df = df[df['duplicate_of'].isna()]
+    df['id'] = pd.to_numeric(df['id'], errors='coerce')
+    df = df.dropna(subset=['id'])
+    df['id'] = df['id'].astype('int64')
+    for col in INT_COLUMNS:
+        df[col] = pd.to_numeric(df.get(col), errors='coerce').fillna(0).astype('int64')
+    for col in STRING_COLUMNS:
+        if col not in df:
+            df[col] = ''
+        df[col] = df[col].fillna('').astype(str)
+    df['crawl_time'] = pd.to_datetime(df.get('crawl_time'), errors='coerce')
+    df['is_sent'] = df.get('is_sent', False)
+    df['is_sent'] = df['is_sent'].fillna(False).astype(str).str.lower() == 'true'
+    df['date'] = day
+
+    # 按分数降序，使行组的分数统计区间互不重叠，查询时裁剪效果更好
+    df = df.sort_values('score', ascending=False)
+    schema = archive_schema()
+    return pa.Table.from_pandas(df[schema.names], schema=schema, preserve_index=False)
+
+
+def compact(data_dir, archive_dir, keep_days=1, delete_csv=False, row_group_size=256, compression='zstd',
+            exclude=()):
+    """压缩已结束日期的CSV到归档，返回写入的文件数
+
+    keep_days: 最近几天（含今天）不压缩，仍由爬虫写入
+    exclude: 仍在被写入的CSV（如守护进程启动当天的文件，跨天运行时仍在写入），不压缩也不删除
+    """
+    _require_pyarrow()
+    today = date.today()
+    written = 0
+    excluded = {os.path.abspath(path) for path in exclude}
+
+    for day, csv_path in list_daily_csv(data_dir):
+        if (today - day).days < keep_days or os.path.abspath(csv_path) in excluded:
+            continue
+
+        target = archive_path(archive_dir, day)
+        # 已归档且CSV之后没有变化则跳过
+        if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(csv_path):
+            if delete_csv:
+                os.remove(csv_path)
+            continue
+
+        try:
+            table = _csv_to_table(csv_path, day)
+        except Exception as e:
+            logging.error(f"❌ 读取CSV失败 {csv_path}: {e}")
+            continue
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp_path = f"{target}.tmp"
+        pq.write_table(
+            table, tmp_path,
+            row_group_size=row_group_size,
+            compression=compression,
+            write_statistics=True
+        )
+        os.replace(tmp_path, target)
+        written += 1
+        logging.info(f"🗜️ 已归档 {csv_path} -> {target} ({table.num_rows} 条)")
+
+        if delete_csv:
+            os.remove(csv_path)
+
+    return written
+
+
+def _month_dirs(archive_dir, start, end):
+    """按月份分区裁剪，返回范围内的月份目录"""
+    if not os.path.isdir(archive_dir):
+        return []
+    start_month = f"{start:%Y-%m}" if start else None
+    end_month = f"{end:%Y-%m}" if end else None
+    result = []
+    for name in sorted(os.listdir(archive_dir)):
+        if not name.startswith('month='):
+            continue
+        month = name.split('=', 1)[1]
+        if (start_month and month < start_month) or (end_month and month > end_month):
+            continue
+        result.append(os.path.join(archive_dir, name))
+    return result
+
+
+def _row_group_may_match(metadata, score_idx, min_score):
+    """根据行组的分数统计判断是否可能包含命中的行"""
+    if min_score is None:
+        return True
+    stats = metadata.column(score_idx).statistics
+    if stats is None or not stats.has_min_max:
+        return True
+    return stats.max >= min_score
+
+
+def query(archive_dir, min_score=None, start=None, end=None, columns=None):
+    """查询归档：分数 >= min_score 且日期在 [start, end] 内的新闻
+
+    返回按分数降序排列的 pandas.DataFrame
+    """
+    _require_pyarrow()
+    columns = columns or ['id', 'date', 'score', 'comments', 'title', 'title_cn', 'url']
+    tables = []
+    scanned_groups = 0
+    total_groups = 0
+
+    for month_dir in _month_dirs(archive_dir, start, end):
+        for name in sorted(os.listdir(month_dir)):
+            match = re.match(r'^hn_news_(\d{4}-\d{2}-\d{2})\.parquet$', name)
+            if not match:
+                continue
+            day = datetime.strptime(match.group(1), '%Y-%m-%d').date()
+            if (start and day < start) or (end and day > end):
+                continue
+
+            parquet_file = pq.ParquetFile(os.path.join(month_dir, name), memory_map=True)
+            score_idx = parquet_file.schema_arrow.get_field_index('score')
+            for i in range(parquet_file.num_row_groups):
+                total_groups += 1
+                if not _row_group_may_match(parquet_file.metadata.row_group(i), score_idx, min_score):
+                    continue
+                scanned_groups += 1
+                table = parquet_file.read_row_group(i, columns=columns)
+                if min_score is not None:
+                    mask = pc.greater_equal(table.column('score'), min_score)
+                    table = table.filter(mask)
+                if table.num_rows:
+                    tables.append(table)
+
+    logging.debug(f"归档查询: 扫描 {scanned_groups}/{total_groups} 个行组")
+    if not tables:
+        return pd.DataFrame(columns=columns)
+    df = pa.concat_tables(tables).to_pandas()
+    return df.sort_values('score', ascending=False).reset_index(drop=True)
+
+
+def _parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+
+def main():
+    load_dotenv('config.env')
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    data_dir = os.getenv('DATA_DIR', 'data')
+    default_archive_dir = os.getenv('ARCHIVE_DIR', os.path.join(data_dir, 'archive'))
+
+    parser = argparse.ArgumentParser(description='Hacker News 历史数据归档')
+    parser.add_argument('--archive-dir', default=default_archive_dir)
+    sub = parser.add_subparsers(dest='command')
+
+    compact_parser = sub.add_parser('compact', help='压缩已结束日期的CSV')
+    compact_parser.add_argument('--keep-days', type=int, default=int(os.getenv('ARCHIVE_KEEP_DAYS', 1)))
+    compact_parser.add_argument('--delete-csv', action='store_true',
+                                default=os.getenv('ARCHIVE_DELETE_CSV', 'false').lower() == 'true')
+
+    query_parser = sub.add_parser('query', help='查询归档')
+    query_parser.add_argument('--min-score', type=int)
+    query_parser.add_argument('--start', type=_parse_date)
+    query_parser.add_argument('--end', type=_parse_date)
+    query_parser.add_argument('--limit', type=int, default=50)
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'compact':
+            count = compact(data_dir, args.archive_dir, keep_days=args.keep_days, delete_csv=args.delete_csv,
+                            row_group_size=int(os.getenv('ARCHIVE_ROW_GROUP_SIZE', 256)))
+            print(f"✅ 归档完成: 写入 {count} 个文件")
+        elif args.command == 'query':
+            df = query(args.archive_dir, min_score=args.min_score, start=args.start, end=args.end)
+            print(f"🔍 共 {len(df)} 条结果")
+            if not df.empty:
+                print(df.head(args.limit).to_string(index=False))
+        else:
+            parser.print_help()
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hacker News 爬虫 - 历史新闻回填
+
+按日期或条目id范围遍历HN官方API（或兼容的本地镜像），把达到分数门槛的历史新闻
+批量写入对应日期的 hn_news_YYYY-MM-DD.csv，用于新频道上线或长时间停机后补齐数据。
+
+- 基于 asyncio + httpx 的高并发抓取，并发数和每秒请求数分别受信号量和令牌桶限制
+- id 范围按块处理，每块的结果写入后保存检查点（原子替换），中断后从检查点继续
+- 按日期回填时先用二分查找把日期换算为条目id范围，结果也保存在检查点中
+- 回填的新闻只包含廉价字段，翻译和摘要在推送时按需补全；默认标记为已发送，避免刷屏
+
+用法:
+  python backfill.py --start-date 2025-05-01 --end-date 2025-05-03 [--min-score 100]
+  python backfill.py --start-id 43000000 --end-id 43100000
+  python backfill.py --resume
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+from datetime import datetime, timedelta
+from collections import defaultdict
+
+import httpx
+from dotenv import load_dotenv
+
+from hn_updates import HN_API
+from news_item import NewsItem
+
+
+class RateLimiter:
+    """令牌桶限速（每秒 rate 个请求），需在事件循环内创建"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class ItemClient:
+    """并发受限、限速、带重试的HN条目客户端"""
+
+    def __init__(self, api_base, concurrency, rate, timeout=15, max_retries=3, proxy=None, user_agent=None):
+        self.api_base = api_base.rstrip('/')
+        self.max_retries = max_retries
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.limiter = RateLimiter(rate)
+        self.stats = {'requests': 0, 'retries': 0, 'errors': 0}
+        # 重试后仍失败的条目id，记录到检查点中稍后补抓
+        self.failed = set()
+        options = {
+            'timeout': timeout,
+            'limits': httpx.Limits(max_connections=concurrency, max_keepalive_connections=min(concurrency, 200)),
+            'headers': {'User-Agent': user_agent} if user_agent else None,
+        }
+        if proxy:
+            try:
+                self.client = httpx.AsyncClient(proxy=proxy, **options)
+            except TypeError:
+                # 旧版本httpx只支持 proxies 参数
+                self.client = httpx.AsyncClient(proxies=proxy, **options)
+        else:
+            self.client = httpx.AsyncClient(**options)
+
+    async def close(self):
+        await self.client.aclose()
+
+    async def get_json(self, path):
+        url = f"{self.api_base}/{path}"
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire()
+            async with self.semaphore:
+                self.stats['requests'] += 1
+                try:
+                    response = await self.client.get(url)
+                    if response.status_code == 200:
+                        return response.json()
+                    if response.status_code == 404:
+                        return None
+                    if response.status_code != 429 and response.status_code < 500:
+                        raise RuntimeError(f"HTTP {response.status_code}")
+                    error = f"HTTP {response.status_code}"
+                except (httpx.HTTPError, ValueError) as e:
+                    error = str(e) or type(e).__name__
+            if attempt < self.max_retries:
+                self.stats['retries'] += 1
+                await asyncio.sleep(min(30.0, 0.5 * 2 ** attempt))
+        self.stats['errors'] += 1
+        raise RuntimeError(f"获取 {url} 失败: {error}")
+
+    async def get_item(self, item_id):
+        try:
+            return await self.get_json(f"item/{item_id}.json")
+        except RuntimeError as e:
+            logging.debug(e)
+            self.failed.add(item_id)
+            return None
+
+    async def max_item(self):
+        return int(await self.get_json("maxitem.json"))
+
+    async def item_time(self, item_id, probe=20):
+        """条目的发布时间；已删除的条目没有时间，向后探测相邻id"""
+        for offset in range(probe):
+            item = await self.get_item(item_id + offset)
+            if item and item.get('time'):
+                return int(item['time'])
+        return None
+
+    async def first_id_at(self, timestamp, low=1, high=None):
+        """二分查找第一个发布时间 >= timestamp 的条目id"""
+        high = high or await self.max_item()
+        while low < high:
+            middle = (low + high) // 2
+            item_time = await self.item_time(middle)
+            if item_time is None or item_time < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+
+class Checkpoint:
+    """回填检查点：任务参数和下一个待处理的id，原子写入"""
+
+    def __init__(self, path):
+        self.path = path
+        self.state = {}
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, 'r', encoding='utf-8') as f:
+            self.state = json.load(f)
+        return self.state
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def item_to_news(item, base_url, mark_sent):
+    """API条目 -> NewsItem，时间取发布时间，便于写入对应日期的CSV"""
+    hn_url = f"{base_url}/item?id={item['id']}"
+    return NewsItem(
+        id=item['id'],
+        title=item.get('title', ''),
+        url=item.get('url') or hn_url,
+        hn_url=hn_url,
+        score=int(item.get('score', 0)),
+        comments=int(item.get('descendants', 0)),
+        crawl_time=datetime.fromtimestamp(item['time']).isoformat(),
+        is_sent=mark_sent,
+    )
+
+
+def is_wanted(item, min_score):
+    return bool(
+        item and item.get('type') == 'story' and not item.get('deleted') and not item.get('dead')
+        and item.get('time') and int(item.get('score', 0)) >= min_score
+    )
+
+
+async def resolve_range(client, args):
+    """把日期范围换算为 [start_id, end_id]"""
+    if args.start_id:
+        return args.start_id, args.end_id or await client.max_item()
+    start = datetime.strptime(args.start_date, '%Y-%m-%d')
+    end = datetime.strptime(args.end_date or args.start_date, '%Y-%m-%d') + timedelta(days=1)
+    max_id = await client.max_item()
+    logging.info(f"🔎 二分查找 {start:%Y-%m-%d} ~ {end - timedelta(days=1):%Y-%m-%d} 对应的条目id范围...")
+    # 查找上界为 max_id + 1：结束日期在未来（没有条目晚于它）时得到 max_id + 1，
+    # 减一后仍包含当前最新的条目
+    start_id = await client.first_id_at(int(start.timestamp()), high=max_id + 1)
+    end_id = await client.first_id_at(int(end.timestamp()), low=start_id, high=max_id + 1) - 1
+    return start_id, min(end_id, max_id)
+
+
+async def fetch_and_store(crawler, client, state, item_ids):
+    """抓取一批条目，过滤后按发布日期批量写入，返回 (符合条件数, 新增数)"""
+    items = await asyncio.gather(*(client.get_item(i) for i in item_ids))
+
+    by_day = defaultdict(list)
+    for item in items:
+        if is_wanted(item, state['min_score']):
+            news = item_to_news(item, crawler.base_url, state['mark_sent'])
+            by_day[news.crawl_time[:10]].append(news)
+
+    inserted = 0
+    for day, news_list in sorted(by_day.items()):
+        csv_file = os.path.join(crawler.data_dir, f'hn_news_{day}.csv')
+        inserted += crawler.bulk_insert_news(news_list, csv_file)
+    return sum(len(v) for v in by_day.values()), inserted
+
+
+async def run_backfill(crawler, checkpoint, state, client):
+    """逐块抓取 -> 过滤 -> 按日期批量写入 -> 保存检查点，最后补抓失败的条目"""
+    chunk_size = state['chunk_size']
+    end_id = state['end_id']
+    started = time.time()
+    processed_at_start = state['next_id'] - state['start_id']
+
+    while state['next_id'] <= end_id:
+        chunk_start = state['next_id']
+        chunk_end = min(end_id, chunk_start + chunk_size - 1)
+        client.failed.clear()
+        stories, inserted = await fetch_and_store(crawler, client, state, range(chunk_start, chunk_end + 1))
+
+        # 结果写入之后才推进检查点：中断时最多重做当前块，写入按id去重
+        state['next_id'] = chunk_end + 1
+        state['stories'] += stories
+        state['inserted'] += inserted
+        state['failed'] = sorted(set(state.get('failed', [])) | client.failed)
+        checkpoint.save()
+
+        done = state['next_id'] - state['start_id']
+        total = end_id - state['start_id'] + 1
+        elapsed = time.time() - started
+        speed = (done - processed_at_start) / elapsed if elapsed > 0 else 0
+        eta = (total - done) / speed if speed > 0 else 0
+        logging.info(
+            f"📥 {chunk_start}-{chunk_end}: 新增 {inserted} 条 | 进度 {done}/{total} ({done * 100 / total:.1f}%)"
+            f" | {speed:.0f} 条目/秒 | 预计剩余 {eta / 60:.1f} 分钟"
+        )
+
+    if state.get('failed'):
+        logging.info(f"🔁 补抓 {len(state['failed'])} 个失败的条目...")
+        client.failed.clear()
+        stories, inserted = await fetch_and_store(crawler, client, state, state['failed'])
+        state['stories'] += stories
+        state['inserted'] += inserted
+        state['failed'] = sorted(client.failed)
+        checkpoint.save()
+
+
+async def backfill(args):
+    from hn_news_crawler import HackerNewsCrawler
+
+    # 离线模式：只需要配置和CSV写入，不初始化/清理当日CSV，也不启动守护进程的后台服务
+    crawler = HackerNewsCrawler(offline=True)
+    # 高并发下httpx的逐请求日志没有意义
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+    checkpoint = Checkpoint(args.checkpoint)
+    state = checkpoint.load()
+
+    if args.resume:
+        if not state:
+            raise RuntimeError(f"没有可恢复的检查点: {args.checkpoint}")
+        logging.info(f"♻️ 从检查点恢复: 下一个id {state['next_id']}，范围 {state['start_id']}-{state['end_id']}")
+    elif state and (state['next_id'] <= state['end_id'] or state.get('failed')) and not args.restart:
+        raise RuntimeError(f"存在未完成的回填任务 ({args.checkpoint})，使用 --resume 继续或 --restart 重新开始")
+
+    client = ItemClient(
+        args.api_base, args.concurrency, args.rate,
+        timeout=crawler.request_timeout,
+        max_retries=crawler.max_retries,
+        proxy=crawler.proxies.get('https'),
+        user_agent=crawler.headers.get('User-Agent')
+    )
+    try:
+        if not args.resume:
+            start_id, end_id = await resolve_range(client, args)
+            state = checkpoint.state = {
+                'start_id': start_id, 'end_id': end_id, 'next_id': start_id,
+                'min_score': args.min_score, 'chunk_size': args.chunk_size, 'mark_sent': not args.unsent,
+                'stories': 0, 'inserted': 0, 'created_at': datetime.now().isoformat(),
+            }
+            checkpoint.save()
+            logging.info(f"🚀 开始回填: 条目id {start_id}-{end_id}，分数 >= {args.min_score}")
+
+        await run_backfill(crawler, checkpoint, state, client)
+    finally:
+        await client.close()
+
+    logging.info(
+        f"✅ 回填完成: 符合条件 {state['stories']} 条，新增 {state['inserted']} 条"
+        f" | 请求 {client.stats['requests']} 次，重试 {client.stats['retries']} 次"
+    )
+    if state.get('failed'):
+        logging.warning(f"⚠️ 仍有 {len(state['failed'])} 个条目获取失败，稍后使用 --resume 补抓")
+    else:
+        checkpoint.remove()
+
+
+def main():
+    load_dotenv('config.env')
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    data_dir = os.getenv('DATA_DIR', 'data')
+    parser = argparse.ArgumentParser(description='Hacker News 历史新闻回填')
+    parser.add_argument('--start-date', help='开始日期 (YYYY-MM-DD)')
+    parser.add_argument('--end-date', help='结束日期，含当天 (默认与开始日期相同)')
+    parser.add_argument('--start-id', type=int, help='开始的条目id')
+    parser.add_argument('--end-id', type=int, help='结束的条目id (默认为当前最大id)')
+    parser.add_argument('--min-score', type=int, default=int(os.getenv('BACKFILL_MIN_SCORE', os.getenv('MIN_SCORE', 0))))
+    parser.add_argument('--concurrency', type=int, default=int(os.getenv('BACKFILL_CONCURRENCY', 32)),
+                        help='最大并发请求数')
+    parser.add_argument('--rate', type=float, default=float(os.getenv('BACKFILL_RATE', 20)),
+                        help='每秒最多请求数')
+    parser.add_argument('--chunk-size', type=int, default=int(os.getenv('BACKFILL_CHUNK_SIZE', 5000)),
+                        help='每块的条目数，每块完成后保存检查点')
+    parser.add_argument('--api-base', default=os.getenv('HN_API_BASE', HN_API), help='HN API地址，可指向本地镜像')
+    parser.add_argument('--checkpoint', default=os.getenv('BACKFILL_CHECKPOINT', os.path.join(data_dir, 'backfill_checkpoint.json')))
+    parser.add_argument('--resume', action='store_true', help='从检查点继续')
+    parser.add_argument('--restart', action='store_true', help='丢弃未完成的检查点重新开始')
+    parser.add_argument('--unsent', action='store_true', help='回填的新闻标记为未发送（今天的新闻会被推送）')
+    args = parser.parse_args()
+
+    if not args.resume and not (args.start_date or args.start_id):
+        parser.error('需要 --start-date、--start-id 或 --resume')
+
+    try:
+        asyncio.run(backfill(args))
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("\n⏸️ 已中断，使用 python backfill.py --resume 从检查点继续")
+        sys.exit(130)
+
+
+if __name__ == "__main__":
+    main()
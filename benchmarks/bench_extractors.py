@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+站点专用提取器性能基准
+
+默认离线运行：用本地构造的响应模拟各站点的API返回，测量每个提取器的解析耗时，
+并与通用整页解析同等规模页面的耗时对比。加 --live 时请求真实URL，测量端到端耗时。
+
+用法:
+  python benchmarks/bench_extractors.py [--rounds 50]
+  python benchmarks/bench_extractors.py --live
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import extractors  # noqa: E402
+
+SAMPLE_URLS = {
+    'github': 'https://github.com/python/cpython',
+    'arxiv': 'https://arxiv.org/abs/1706.03762',
+    'youtube': 'https://www.youtube.com/watch?v=dQw4w9WgXcQ',
+    'twitter': 'https://x.com/github/status/1',
+    'hn_item': 'https://news.ycombinator.com/item?id=1',
+    'pdf': 'https://example.com/paper.pdf',
+}
+
+README = "# Project\n\n" + "\n".join(
+    f"Paragraph {i}: this project provides a fast runtime with [links](https://example.com) and `code`."
+    for i in range(80)
+) + "\n```\ncode block\n```\n"
+
+ARXIV_XML = (
+    '<?xml version="1.0" encoding="UTF-8"?><feed xmlns="http://www.w3.org/2005/Atom"><entry>'
+    '<title>Attention Is All You Need</title><summary>The dominant sequence transduction models are '
+    'based on complex recurrent or convolutional neural networks. We propose a new simple network '
+    'architecture, the Transformer, based solely on attention mechanisms.</summary></entry></feed>'
+)
+
+FIXTURES = {
+    'api.github.com': README.encode(),
+    'export.arxiv.org': ARXIV_XML.encode(),
+    'www.youtube.com': json.dumps({'title': 'A talk about compilers', 'author_name': 'Conf'}).encode(),
+    'publish.twitter.com': json.dumps({
+        'html': '<blockquote><p>We shipped a new release with faster builds today.</p></blockquote>',
+        'author_name': 'GitHub'
+    }).encode(),
+    'hacker-news.firebaseio.com': json.dumps({'text': '<p>Ask HN: how do you profile Python?</p><p>Details here.</p>'}).encode(),
+}
+
+# 通用解析对照：与典型的GitHub仓库页相当规模（约300KB）的HTML
+GENERIC_HTML = (
+    "<html><head><script>" + "var x = 1;" * 5000 + "</script></head><body><nav>" + "<a href='#'>menu</a>" * 500 +
+    "</nav><main>" + "".join(f"<div class='row'><p>Generic paragraph {i} with some longer text content here.</p></div>"
+                             for i in range(2500)) + "</main></body></html>"
+).encode()
+
+
+class FakeResponse:
+    def __init__(self, content, status_code=200):
+        self.content = content
+        self.status_code = status_code
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8')
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size=65536):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+    def close(self):
+        pass
+
+
+def fake_fetch(url, headers=None, stream=False):
+    host = url.split('/')[2]
+    return FakeResponse(FIXTURES.get(host, b''), 200 if host in FIXTURES else 404)
+
+
+def live_fetch(url, headers=None, stream=False):
+    import requests
+    return requests.get(url, headers=headers, timeout=15, stream=stream)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='站点专用提取器性能基准')
+    parser.add_argument('--rounds', type=int, default=50)
+    parser.add_argument('--live', action='store_true', help='请求真实URL')
+    args = parser.parse_args()
+
+    fetch = live_fetch if args.live else fake_fetch
+    rounds = 1 if args.live else args.rounds
+
+    print(f"📊 提取器基准 ({'在线' if args.live else '离线'}, {rounds} 轮)")
+    for name, url in SAMPLE_URLS.items():
+        for _ in range(rounds):
+            extractors.registry.extract(url, fetch)
+
+    for name, stats in extractors.registry.report().items():
+        if stats['calls']:
+            print(f"  {name:<10} 平均 {stats['avg_ms']:8.3f} ms | 命中 {stats['hits']}/{stats['calls']}")
+
+    if not args.live:
+        start = time.perf_counter()
+        for _ in range(max(1, rounds // 10)):
+            extractors.extract_generic(GENERIC_HTML)
+        generic_ms = (time.perf_counter() - start) * 1000 / max(1, rounds // 10)
+        print(f"  {'generic':<10} 平均 {generic_ms:8.3f} ms | 约{len(GENERIC_HTML) // 1024}KB页面的通用解析")
+        if extractors.PdfReader is None:
+            print("  (未安装pypdf，PDF提取器会直接返回None)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+网络故障场景测试
+
+在本地启动一个替身服务器，模拟HN首页、文章站点（含robots.txt）、翻译接口和Telegram
+sendMessage。爬虫的会话挂载 fault_injection.FaultInjector，所有请求都改发到替身服务器。
+每个场景用一个全新的数据目录完整运行一轮 crawl_and_send。场景之间只有注入的故障不同。
+
+每个场景检查:
+- 整轮耗时不超过按当前超时/重试配置算出的上界
+- 各域名的请求次数（即重试次数）不超过上界：每条消息最多 MESSAGE_MAX_RETRIES+1 次
+  sendMessage，翻译和正文不重试
+- 场景要求的推送结果（如Telegram持续5xx时一条也不应标记为已发送）
+
+任何一项不满足时以非零状态退出。完成消息走 python-telegram-bot 而不是爬虫会话，
+不在测试范围内，这里替换为计数。
+
+用法:
+  python benchmarks/bench_faults.py [--stories 8] [--seed 1] [--only telegram-5xx] [--verbose]
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fault_injection  # noqa: E402
+
+HN_HOST = 'news.ycombinator.com'
+TRANSLATE_HOST = 'translate.googleapis.com'
+TELEGRAM_HOST = 'api.telegram.org'
+ARTICLE_HOSTS = ('blog.example.com', 'news.example.org', 'docs.example.io', 'slow.example.net')
+
+WORDS = (
+    "compiler runtime database latency kernel memory cache network protocol model training "
+    "inference benchmark release security patch browser engine scheduler storage query cluster"
+).split()
+
+# latency 故障的额外延迟范围（秒）
+LATENCY = (0.05, 0.3)
+
+# 未注入故障的请求（本地替身服务器）每次的耗时预算，以及CSV读写等本地处理的预算（秒）
+LOCAL_BUDGET = 0.2
+SETUP_BUDGET = 2.0
+
+# 测试用的短超时和重试间隔（秒），上界按这些值计算
+CRAWLER_ENV = {
+    'TELEGRAM_BOT_TOKEN': 'test-token',
+    'TELEGRAM_CHAT_ID': '1',
+    'REQUEST_TIMEOUT': '1',
+    'TRANSLATION_TIMEOUT': '1',
+    'TELEGRAM_TIMEOUT': '1',
+    'MESSAGE_MAX_RETRIES': '2',
+    'MESSAGE_RETRY_INTERVAL': '0.2',
+    'MESSAGE_SEND_INTERVAL': '0',
+    'BULK_MESSAGE_INTERVAL': '0',
+    'REQUEST_INTERVAL': '0',
+    'PER_HOST_DELAY': '0.05',
+    'PER_HOST_MAX_WAIT': '5',
+    'ENABLE_PROXY': 'false',
+    'ENABLE_SEARCH_INDEX': 'false',
+    'ENABLE_UPDATES_REFRESH': 'false',
+    'ENABLE_NEAR_DEDUP': 'false',
+    'ENABLE_TRACING': 'false',
+    'ENABLE_COMMENTS': 'false',
+    'ENABLE_FEEDS': 'false',
+    'ENABLE_RAW_ARCHIVE': 'false',
+    'FAULT_INJECTION': '',
+}
+
+# (名称, 说明, 故障概率, 注入的域名, 期望推送数: 'all' / 0 / None 表示不检查)
+SCENARIOS = [
+    ('baseline', '无故障', {}, (), 'all'),
+    ('slow-network', '所有请求额外延迟0.05-0.3秒', {'latency': 1.0}, (), 'all'),
+    ('packet-loss', '20% 的请求连接被重置', {'reset': 0.2}, (), None),
+    ('telegram-5xx', 'Telegram 持续返回5xx', {'5xx': 1.0}, (TELEGRAM_HOST,), 0),
+    ('telegram-429', 'Telegram 持续限流', {'429': 1.0}, (TELEGRAM_HOST,), 0),
+    ('telegram-flaky', 'Telegram 一半请求超时', {'timeout': 0.5}, (TELEGRAM_HOST,), None),
+    ('slow-host', '一个文章域名所有请求超时', {'timeout': 1.0}, ('slow.example.net',), 'all'),
+    ('translate-down', '翻译接口全部超时', {'timeout': 1.0}, (TRANSLATE_HOST,), 'all'),
+    ('article-429', '文章站点一半请求限流', {'429': 0.5}, ARTICLE_HOSTS, 'all'),
+    ('truncated', '30% 的响应体被截断', {'truncate': 0.3}, (TRANSLATE_HOST, TELEGRAM_HOST) + ARTICLE_HOSTS, None),
+    ('mixed', '延迟、超时、重置、429、5xx和截断混合',
+     {'latency': 0.3, 'timeout': 0.05, 'reset': 0.05, '429': 0.05, '5xx': 0.1, 'truncate': 0.05},
+     (TRANSLATE_HOST, TELEGRAM_HOST) + ARTICLE_HOSTS, None),
+]
+
+
+def make_stories(count):
+    """(id, 标题, 文章URL)，文章轮流分布在各域名上"""
+    return [
+        (str(40000000 + i), f"Story {i}: a new {WORDS[i % len(WORDS)]} for {WORDS[(i * 7) % len(WORDS)]} workloads",
+         f"https://{ARTICLE_HOSTS[i % len(ARTICLE_HOSTS)]}/posts/{i}")
+        for i in range(count)
+    ]
+
+
+def frontpage_html(stories):
+    rows = []
+    for i, (story_id, title, url) in enumerate(stories):
+        rows.append(
+            f'<tr class="athing" id="{story_id}"><td><span class="titleline"><a href="{url}">{title}</a></span></td></tr>'
+            f'<tr><td><span class="score">{100 + i} points</span> <a href="item?id={story_id}">{i} comments</a></td></tr>'
+        )
+    return f"<html><body><table>{''.join(rows)}</table></body></html>".encode()
+
+
+def article_html(path):
+    seed = sum(path.encode())
+    paragraphs = "\n".join(
+        f"<p>The {WORDS[(seed + i) % len(WORDS)]} team measured {WORDS[(seed + 3 * i) % len(WORDS)]} "
+        f"behaviour under load and published the results in paragraph {i}.</p>"
+        for i in range(12)
+    )
+    return f"<html><head><title>{path}</title></head><body><article>{paragraphs}</article></body></html>".encode()
+
+
+class StandInServer:
+    """替身服务器：按 X-Original-Host 请求头区分被替代的服务"""
+
+    def __init__(self, stories):
+        self.frontpage = frontpage_html(stories)
+        self.hits = Counter()
+        self._message_id = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, body, content_type='text/html; charset=utf-8', status=200):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                host = self.headers.get('X-Original-Host', '')
+                parts = urlsplit(self.path)
+                server.hits[host] += 1
+                if host == HN_HOST:
+                    self._reply(server.frontpage)
+                elif host == TRANSLATE_HOST:
+                    text = parse_qs(parts.query).get('q', [''])[0]
+                    result = [[[f"【译】{text}", text, None, None]], None, 'en']
+                    self._reply(json.dumps(result, ensure_ascii=False).encode(), 'application/json')
+                elif parts.path == '/robots.txt':
+                    self._reply(b"User-agent: *\nAllow: /\n", 'text/plain')
+                else:
+                    self._reply(article_html(parts.path))
+
+            def do_POST(self):
+                host = self.headers.get('X-Original-Host', '')
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                server.hits[host] += 1
+                with server._lock:
+                    server._message_id += 1
+                    message_id = server._message_id
+                self._reply(json.dumps({'ok': True, 'result': {'message_id': message_id}}).encode(),
+                            'application/json')
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, name='stand-in', daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def cycle_bounds(crawler, injector, stories):
+    """按爬虫当前的超时和重试配置计算一轮的耗时上界和各域名的请求次数上界
+
+    注入了故障的域名每次请求按超时（加最大延迟）计，并计入全部重试；
+    其他域名按本地请求计，这样某个域名的故障拖慢整轮时能被发现
+    """
+    latency = injector.latency[1] if injector.probabilities.get('latency') else 0
+    failing = any(injector.probabilities.get(kind) for kind in fault_injection.FAULT_KINDS)
+
+    def attempt(host, timeout):
+        if not injector.applies_to(host):
+            return LOCAL_BUDGET
+        return timeout + latency if failing else LOCAL_BUDGET + latency
+
+    retries = crawler.message_max_retries
+    telegram_retries = retries if failing and injector.applies_to(TELEGRAM_HOST) else 0
+    per_message = (telegram_retries + 1) * attempt(TELEGRAM_HOST, crawler.telegram_timeout)
+    per_message += telegram_retries * max(crawler.message_retry_interval, crawler.message_send_interval)
+    per_message += crawler.message_send_interval + crawler.request_interval
+
+    # 正文按域名并行，同一域名串行：robots.txt 一次 + 每篇一次请求 + 请求间隔
+    per_host = Counter(urlsplit(url).hostname for _, _, url in stories)
+    slowest_host = max(
+        (count + 1) * attempt(host, crawler.request_timeout) + count * crawler.politeness.per_host_delay
+        for host, count in per_host.items()
+    )
+    translate = 2 * len(stories) * attempt(TRANSLATE_HOST, crawler.translation_timeout)
+    time_bound = (attempt(HN_HOST, crawler.request_timeout) + slowest_host + translate
+                  + len(stories) * per_message + SETUP_BUDGET)
+
+    request_bounds = {
+        HN_HOST: 1,
+        TRANSLATE_HOST: 2 * len(stories),
+        TELEGRAM_HOST: (retries + 1) * len(stories),
+    }
+    for host, count in per_host.items():
+        request_bounds[host] = count + 1
+    return time_bound, request_bounds
+
+
+def run_scenario(name, probabilities, hosts, stories, stand_in, seed):
+    """在全新的数据目录中运行一轮，返回 (结果, 故障注入统计, 上界)"""
+    from hn_news_crawler import HackerNewsCrawler
+
+    workdir = tempfile.mkdtemp(prefix=f'hn-faults-{name}-')
+    os.environ['DATA_DIR'] = os.path.join(workdir, 'data')
+    os.chdir(workdir)
+    crawler = HackerNewsCrawler()
+    injector = fault_injection.FaultInjector(
+        probabilities, hosts=hosts, latency=LATENCY, target=stand_in.url, seed=seed,
+        pool_maxsize=crawler.http_pool_size
+    )
+    crawler.fault_injector = injector.mount(crawler.session)
+
+    completions = []
+
+    async def send_completion_message(success_count, total_count):
+        completions.append((success_count, total_count))
+
+    crawler.send_completion_message = send_completion_message
+
+    start = time.time()
+    new_count = asyncio.run(crawler.crawl_and_send())
+    elapsed = time.time() - start
+
+    df = crawler.load_news_data()
+    sent = int(df['is_sent'].fillna(False).astype(bool).sum()) if not df.empty else 0
+    time_bound, request_bounds = cycle_bounds(crawler, injector, stories)
+    crawler.session.close()
+    return {'new': new_count, 'sent': sent, 'elapsed': elapsed}, injector.snapshot(), (time_bound, request_bounds)
+
+
+def check(name, result, faults, bounds, expected_sent, total):
+    """返回不满足的检查项"""
+    failures = []
+    time_bound, request_bounds = bounds
+    if result['elapsed'] > time_bound:
+        failures.append(f"耗时 {result['elapsed']:.1f}s 超过上界 {time_bound:.1f}s")
+    for host, count in faults['hosts'].items():
+        if count > request_bounds.get(host, 0):
+            failures.append(f"{host} 请求 {count} 次，超过上界 {request_bounds.get(host, 0)} 次")
+    if expected_sent == 'all' and result['sent'] != total:
+        failures.append(f"推送 {result['sent']}/{total}，应全部推送")
+    elif expected_sent == 0 and result['sent'] != 0:
+        failures.append(f"推送失败时不应标记为已发送，实际 {result['sent']} 条")
+    if result['sent'] > result['new']:
+        failures.append(f"已发送 {result['sent']} 条多于新增 {result['new']} 条")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='网络故障场景测试')
+    parser.add_argument('--stories', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--only', help='只运行指定场景（逗号分隔）')
+    parser.add_argument('--verbose', action='store_true', help='在控制台输出爬虫日志')
+    args = parser.parse_args()
+
+    os.environ.update(CRAWLER_ENV)
+    os.environ['LOG_LEVEL'] = 'WARNING' if args.verbose else 'CRITICAL'
+    os.environ['LOG_FILE'] = os.path.join(tempfile.gettempdir(), 'hn-faults.log')
+    only = set(args.only.split(',')) if args.only else None
+
+    stories = make_stories(args.stories)
+    stand_in = StandInServer(stories)
+    print(f"📊 故障场景测试: {args.stories} 条新闻, {len(ARTICLE_HOSTS)} 个文章域名, 替身服务器 {stand_in.url}")
+    print(f"  {'场景':<16} {'耗时':>7} {'上界':>7} {'推送':>6} {'TG请求':>6} {'翻译':>5}  注入")
+
+    failed = []
+    try:
+        for name, description, probabilities, hosts, expected_sent in SCENARIOS:
+            if only and name not in only:
+                continue
+            result, faults, bounds = run_scenario(name, probabilities, hosts, stories, stand_in, args.seed)
+            injected = {kind: faults[kind] for kind in ('latency',) + fault_injection.FAULT_KINDS if faults.get(kind)}
+            print(f"  {name:<16} {result['elapsed']:6.1f}s {bounds[0]:6.1f}s {result['sent']:>3}/{args.stories:<2} "
+                  f"{faults['hosts'].get(TELEGRAM_HOST, 0):>6} {faults['hosts'].get(TRANSLATE_HOST, 0):>5}  "
+                  f"{injected or '-'}  ({description})")
+            for failure in check(name, result, faults, bounds, expected_sent, args.stories):
+                failed.append(name)
+                print(f"    ❌ {failure}")
+    finally:
+        stand_in.close()
+
+    if failed:
+        print(f"❌ {len(set(failed))} 个场景未通过: {', '.join(sorted(set(failed)))}")
+        sys.exit(1)
+    print("✅ 所有场景的耗时和重试次数都在上界以内")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+NewsItem 性能基准
+
+对比 DataFrame 行转换（iterrows 逐行构造字典 vs NewsItem.from_frame 按列批量转换）
+以及工作队列序列化（JSON vs NewsItem.pack/unpack）的耗时和体积。
+
+用法:
+  python benchmarks/bench_news_item.py [--rows 500] [--rounds 20]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from news_item import NewsItem, CSV_FIELDS  # noqa: E402
+
+
+def make_frame(rows):
+    records = []
+    for i in range(rows):
+        records.append({
+            'id': 40000000 + i, 'title': f"Show HN: project number {i} does something useful",
+            'title_cn': f"展示：第{i}个项目", 'url': f"https://example.com/{i}",
+            'hn_url': f"https://news.ycombinator.com/item?id={40000000 + i}", 'score': i % 700,
+            'comments': i % 300, 'content_summary': 'A summary sentence. ' * 5,
+            'content_summary_cn': '摘要。' * 10, 'crawl_time': '2025-05-24T10:00:00',
+            'sent_time': '' if i % 2 else '2025-05-24T10:05:00', 'is_sent': bool(i % 2 == 0),
+            'message_id': None if i % 2 else 1000 + i, 'message_position': '' if i % 2 else '1/10',
+            'shown_score': None, 'shown_comments': None,
+        })
+    return pd.DataFrame(records, columns=list(CSV_FIELDS))
+
+
+def iterrows_dicts(df):
+    """旧方式：iterrows 逐行构造字典并做空值判断"""
+    news_list = []
+    for _, row in df.iterrows():
+        news_list.append({
+            'id': row['id'],
+            'title': row['title'],
+            'title_cn': row['title_cn'] if pd.notna(row['title_cn']) else row['title'],
+            'url': row['url'],
+            'hn_url': row['hn_url'],
+            'score': int(row['score']),
+            'comments': int(row['comments']),
+            'content_summary': row['content_summary'] if pd.notna(row['content_summary']) else '',
+            'content_summary_cn': row['content_summary_cn'] if pd.notna(row['content_summary_cn']) else '暂无内容摘要',
+            'crawl_time': row['crawl_time'],
+        })
+    return news_list
+
+
+def timed(func, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        result = func()
+    return (time.perf_counter() - start) * 1000 / rounds, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='NewsItem 性能基准')
+    parser.add_argument('--rows', type=int, default=500)
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    print(f"📊 NewsItem 基准 ({args.rows} 行, {args.rounds} 轮)")
+
+    old_ms, _ = timed(lambda: iterrows_dicts(df), args.rounds)
+    new_ms, items = timed(lambda: NewsItem.from_frame(df), args.rounds)
+    print(f"  行转换   iterrows {old_ms:8.2f} ms | from_frame {new_ms:8.2f} ms | {old_ms / new_ms:5.1f}x")
+
+    dicts = [item.to_row() for item in items]
+    json_ms, encoded_json = timed(lambda: [json.dumps(d, ensure_ascii=False) for d in dicts], args.rounds)
+    pack_ms, encoded_bin = timed(lambda: [item.pack() for item in items], args.rounds)
+    print(f"  序列化   json     {json_ms:8.2f} ms | pack       {pack_ms:8.2f} ms")
+
+    loads_ms, _ = timed(lambda: [NewsItem.from_row(json.loads(s)) for s in encoded_json], args.rounds)
+    unpack_ms, _ = timed(lambda: [NewsItem.unpack(b) for b in encoded_bin], args.rounds)
+    print(f"  反序列化 json     {loads_ms:8.2f} ms | unpack     {unpack_ms:8.2f} ms")
+
+    json_bytes = sum(len(s.encode('utf-8')) for s in encoded_json)
+    bin_bytes = sum(len(b) for b in encoded_bin)
+    print(f"  体积     json  {json_bytes / 1024:8.1f} KB | pack    {bin_bytes / 1024:8.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
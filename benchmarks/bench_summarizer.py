@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+摘要算法性能基准
+
+生成一批模拟文章（正文 + Cookie/导航等模板句），比较 TextRank 与原先取前两句的算法，
+输出每篇文章的平均耗时；TextRank 超出预算时以非零状态退出。
+指定 --archive 时改用原始响应归档（raw_archive.py）中的真实正文作为语料。
+
+用法:
+  python benchmarks/bench_summarizer.py [--articles 200] [--sentences 40] [--budget-ms 5]
+  python benchmarks/bench_summarizer.py --archive data/raw [--articles 200]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import summarizer  # noqa: E402
+
+WORDS = (
+    "compiler runtime database latency kernel memory cache network protocol model training "
+    "inference benchmark startup funding release open source security vulnerability patch "
+    "browser rendering engine language garbage collector scheduler thread storage index query "
+    "distributed consensus replication cluster container deploy performance throughput"
+).split()
+
+BOILERPLATE = [
+    "We use cookies to improve your experience on our site.",
+    "Subscribe to our newsletter for weekly updates.",
+    "Sign in to continue reading this article.",
+    "All rights reserved by the publisher.",
+]
+
+
+def make_article(rng, sentence_count):
+    sentences = [rng.choice(BOILERPLATE)]
+    for _ in range(sentence_count):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(8, 22))]
+        sentences.append(' '.join(words).capitalize() + '.')
+    sentences.append(rng.choice(BOILERPLATE))
+    return '\n'.join(sentences)
+
+
+def load_archived_articles(archive_dir, limit):
+    """从原始响应归档中取HTML正文，用通用解析提取文本"""
+    import extractors
+    from raw_archive import RawArchive
+
+    articles = []
+    for _, _, response in RawArchive(archive_dir).iter_records(kind='article'):
+        if response.status_code != 200 or 'html' not in response.headers.get('Content-Type', ''):
+            continue
+        text = extractors.extract_generic(response.content, max_lines=200)
+        if len(text) >= 200:
+            articles.append(text)
+        if len(articles) >= limit:
+            break
+    return articles
+
+
+def lead_summary(content):
+    """原先的算法：取前两句 20-120 字符的句子"""
+    import re
+    sentences = re.split(r'[.!?]+\s+', content)
+    good = [s.strip() for s in sentences if 20 <= len(s.strip()) <= 120 and s.count(' ') >= 2]
+    return '. '.join(good[:2])
+
+
+def bench(name, func, articles):
+    start = time.perf_counter()
+    func(articles)
+    elapsed = time.perf_counter() - start
+    per_article_ms = elapsed * 1000 / len(articles)
+    print(f"  {name:<12} 总计 {elapsed * 1000:8.1f} ms | 每篇 {per_article_ms:6.3f} ms")
+    return per_article_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description='摘要算法性能基准')
+    parser.add_argument('--articles', type=int, default=200)
+    parser.add_argument('--sentences', type=int, default=40)
+    parser.add_argument('--budget-ms', type=float, default=5.0)
+    parser.add_argument('--archive', help='原始响应归档目录，使用真实正文作为语料')
+    args = parser.parse_args()
+
+    if args.archive:
+        articles = load_archived_articles(args.archive, args.articles)
+        if not articles:
+            print(f"❌ 归档 {args.archive} 中没有可用的正文")
+            sys.exit(1)
+        print(f"📊 摘要基准: 归档中的 {len(articles)} 篇真实文章")
+    else:
+        rng = random.Random(42)
+        articles = [make_article(rng, args.sentences) for _ in range(args.articles)]
+        print(f"📊 摘要基准: {args.articles} 篇文章, 每篇约 {args.sentences} 句")
+    summarizer.summarize_batch(articles[:5])  # 预热
+    bench('lead', lambda batch: [lead_summary(a) for a in batch], articles)
+    textrank_ms = bench('textrank', summarizer.summarize_batch, articles)
+
+    if textrank_ms > args.budget_ms:
+        print(f"❌ TextRank 每篇耗时 {textrank_ms:.3f} ms 超出预算 {args.budget_ms} ms")
+        sys.exit(1)
+    print(f"✅ TextRank 每篇耗时在预算 {args.budget_ms} ms 以内")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hacker News 爬虫 - Telegram Bot 命令
+
+守护进程在后台线程中长轮询 getUpdates，直接从本地检索索引回答命令，不触发爬取:
+
+  /top [N]        今日分数最高的 N 条新闻（默认10）
+  /search 关键词   全文检索历史新闻
+  /since HH:MM    今天 HH:MM 之后收录的新闻
+"""
+
+import html
+import time
+import logging
+import threading
+from datetime import datetime
+
+import requests
+
+from search_index import SearchIndex
+from proxy_pool import StaticProxies
+
+HELP_TEXT = (
+    "<b>可用命令</b>\n"
+    "/top [N] - 今日热门新闻\n"
+    "/search 关键词 - 检索历史新闻\n"
+    "/since HH:MM - 今天指定时间之后的新闻"
+)
+
+
+def format_results(title, items, empty_text="没有找到相关新闻"):
+    """把查询结果格式化为一条HTML消息"""
+    if not items:
+        return f"<b>{html.escape(title)}</b>\n\n{empty_text}"
+    lines = [f"<b>{html.escape(title)}</b>", ""]
+    for i, item in enumerate(items, 1):
+        name = item.get('title_cn') or item.get('title') or ''
+        crawl_time = (item.get('crawl_time') or '')[11:16]
+        lines.append(
+            f"{i}. <a href=\"{html.escape(item.get('hn_url') or item.get('url') or '', quote=True)}\">"
+            f"{html.escape(name)}</a>\n    {item.get('score', 0)} 分 · {item.get('comments', 0)} 评论 · {crawl_time}"
+        )
+    return '\n'.join(lines)
+
+
+class CommandBot:
+    """基于 getUpdates 长轮询的命令处理器"""
+
+    def __init__(self, bot_token, chat_ids, index_db, proxies=None, poll_timeout=30,
+                 max_results=10, response_budget_ms=100, proxy_pool=None):
+        self.api_url = f"https://api.telegram.org/bot{bot_token}"
+        self.chat_ids = {str(chat_id) for chat_id in chat_ids if chat_id}
+        self.index_db = index_db
+        # 代理池（proxy_pool.ProxyPool）优先，否则使用固定代理
+        self.proxy_pool = proxy_pool or StaticProxies(proxies)
+        self.poll_timeout = poll_timeout
+        self.max_results = max_results
+        self.response_budget_ms = response_budget_ms
+        self.offset = None
+        self.stats = {'commands': 0, 'slow_queries': 0, 'last_query_ms': 0.0}
+        self._index = None
+        self._session = requests.Session()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='bot-commands', daemon=True)
+        self._thread.start()
+        logging.info("💬 Telegram 命令处理已启动: /top /search /since")
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        # 检索索引连接只在本线程中使用
+        self._index = SearchIndex(self.index_db)
+        try:
+            while not self._stop.is_set():
+                try:
+                    for update in self._get_updates():
+                        self.offset = update['update_id'] + 1
+                        self._handle_update(update)
+                except requests.exceptions.RequestException as e:
+                    logging.warning(f"⚠️ getUpdates 请求失败: {e}")
+                    self._stop.wait(5)
+                except Exception as e:
+                    logging.error(f"❌ 处理Bot命令失败: {e}")
+                    self._stop.wait(1)
+        finally:
+            self._index.close()
+
+    def _get_updates(self):
+        params = {'timeout': self.poll_timeout, 'allowed_updates': '["message"]'}
+        if self.offset is not None:
+            params['offset'] = self.offset
+        with self.proxy_pool.use('telegram') as proxies:
+            response = self._session.get(
+                f"{self.api_url}/getUpdates",
+                params=params,
+                proxies=proxies,
+                timeout=self.poll_timeout + 10
+            )
+        result = response.json()
+        if not result.get('ok'):
+            logging.warning(f"⚠️ getUpdates 返回错误: {result.get('description', '未知错误')}")
+            self._stop.wait(5)
+            return []
+        return result.get('result', [])
+
+    def _handle_update(self, update):
+        message = update.get('message') or {}
+        text = (message.get('text') or '').strip()
+        chat_id = str((message.get('chat') or {}).get('id', ''))
+        if not text.startswith('/') or (self.chat_ids and chat_id not in self.chat_ids):
+            return
+
+        start = time.perf_counter()
+        reply = self.handle_command(text)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        self.stats['commands'] += 1
+        self.stats['last_query_ms'] = round(elapsed_ms, 2)
+        if elapsed_ms > self.response_budget_ms:
+            self.stats['slow_queries'] += 1
+            logging.warning(f"⚠️ 命令处理超出 {self.response_budget_ms}ms 预算: {text} ({elapsed_ms:.1f}ms)")
+        else:
+            logging.debug(f"命令 {text} 处理耗时 {elapsed_ms:.1f}ms")
+
+        if reply:
+            self._reply(chat_id, message.get('message_id'), reply)
+
+    def handle_command(self, text):
+        """解析并执行命令，返回回复文本"""
+        parts = text.split(maxsplit=1)
+        command = parts[0].split('@', 1)[0].lower()
+        arg = parts[1].strip() if len(parts) > 1 else ''
+        today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+        if command == '/top':
+            try:
+                limit = int(arg) if arg else self.max_results
+            except ValueError:
+                return "用法: /top [N]"
+            limit = max(1, min(limit, 50))
+            items = self._index.top(today_start.isoformat(), limit)
+            return format_results(f"🔥 今日热门 Top {limit}", items)
+
+        if command == '/search':
+            if not arg:
+                return "用法: /search 关键词"
+            items = self._index.search(arg, limit=self.max_results)
+            return format_results(f"🔍 检索: {arg}", items)
+
+        if command == '/since':
+            try:
+                since_time = datetime.strptime(arg, '%H:%M').time()
+            except ValueError:
+                return "用法: /since HH:MM"
+            since = datetime.combine(today_start.date(), since_time)
+            items = self._index.recent(since.isoformat(), limit=self.max_results * 2)
+            return format_results(f"🕒 {arg} 之后的新闻", items)
+
+        if command in ('/help', '/start'):
+            return HELP_TEXT
+        return None
+
+    def _reply(self, chat_id, reply_to, text):
+        try:
+            with self.proxy_pool.use('telegram') as proxies:
+                self._session.post(
+                    f"{self.api_url}/sendMessage",
+                    data={
+                        'chat_id': chat_id,
+                        'text': text,
+                        'parse_mode': 'HTML',
+                        'disable_web_page_preview': True,
+                        'reply_to_message_id': reply_to,
+                    },
+                    proxies=proxies,
+                    timeout=15
+                )
+        except Exception as e:
+            logging.error(f"❌ 回复命令失败: {e}")
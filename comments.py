@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hacker News 爬虫 - 评论树抓取与讨论要点
+
+对热门新闻通过HN官方API抓取排名前K的评论子树:
+- 所有新闻的评论树按层并发抓取（同一层的评论一次性提交到线程池），
+  整体受截止时间约束，超时后返回已抓到的部分
+- 评论树用父指针数组紧凑存储：ids/parents/times 为定长整数数组，
+  按层序追加，父节点下标总是小于子节点下标
+- 讨论要点：对评论句子做TextRank，并按评论的回复数加权，抽取最有代表性的句子
+"""
+
+import re
+import html
+import math
+import time
+import logging
+from array import array
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+
+import summarizer
+from search_index import tokenize
+
+HN_ITEM_API = "https://hacker-news.firebaseio.com/v0/item/{}.json"
+
+_TAG = re.compile(r'<[^>]+>')
+
+
+def comment_text(raw):
+    """HN评论HTML转纯文本，段落标签转为换行"""
+    if not raw:
+        return ''
+    text = raw.replace('<p>', '\n')
+    return html.unescape(_TAG.sub('', text)).strip()
+
+
+class CommentTree:
+    """父指针数组表示的评论树
+
+    ids[i]     评论id
+    parents[i] 父评论下标，顶层评论为 -1
+    times[i]   发表时间（Unix秒）
+    """
+
+    def __init__(self, story_id):
+        self.story_id = str(story_id)
+        self.ids = array('q')
+        self.parents = array('i')
+        self.times = array('q')
+        self.authors = []
+        self.texts = []
+        self.complete = True
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, comment_id, parent, author, text, timestamp=0):
+        """追加一条评论，返回其下标"""
+        self.ids.append(int(comment_id))
+        self.parents.append(parent)
+        self.times.append(int(timestamp or 0))
+        self.authors.append(author or '')
+        self.texts.append(text)
+        return len(self.ids) - 1
+
+    def depths(self):
+        depths = [0] * len(self)
+        for i, parent in enumerate(self.parents):
+            if parent >= 0:
+                depths[i] = depths[parent] + 1
+        return depths
+
+    def subtree_sizes(self):
+        """每条评论子树的大小（含自身），倒序累加一遍即可"""
+        sizes = [1] * len(self)
+        for i in range(len(self) - 1, -1, -1):
+            parent = self.parents[i]
+            if parent >= 0:
+                sizes[parent] += sizes[i]
+        return sizes
+
+    def roots(self):
+        return [i for i, parent in enumerate(self.parents) if parent < 0]
+
+    def to_dict(self):
+        return {
+            'story_id': self.story_id,
+            'ids': self.ids.tolist(),
+            'parents': self.parents.tolist(),
+            'times': self.times.tolist(),
+            'authors': self.authors,
+            'texts': self.texts,
+            'complete': self.complete,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        tree = cls(data['story_id'])
+        tree.ids = array('q', data.get('ids', []))
+        tree.parents = array('i', data.get('parents', []))
+        tree.times = array('q', data.get('times', []))
+        tree.authors = list(data.get('authors', []))
+        tree.texts = list(data.get('texts', []))
+        tree.complete = data.get('complete', True)
+        return tree
+
+    def nbytes(self):
+        arrays = sum(a.itemsize * len(a) for a in (self.ids, self.parents, self.times))
+        return arrays + sum(len(t) for t in self.texts) + sum(len(a) for a in self.authors)
+
+
+class CommentFetcher:
+    """按层并发抓取多条新闻的评论子树"""
+
+    def __init__(self, fetch, max_workers=8, top_k=5, max_depth=3, max_children=5):
+        self.fetch = fetch
+        self.max_workers = max_workers
+        self.top_k = top_k
+        self.max_depth = max_depth
+        self.max_children = max_children
+        self.stats = {'requests': 0, 'errors': 0, 'timeouts': 0}
+
+    def _get_item(self, item_id):
+        response = self.fetch(HN_ITEM_API.format(item_id))
+        if response.status_code != 200:
+            return None
+        return response.json()
+
+    def fetch_threads(self, story_ids, deadline):
+        """抓取多条新闻的评论树，返回 {story_id: CommentTree}
+
+        deadline: time.time() 截止时间，到期后未完成的请求被放弃，对应的树标记为不完整
+        """
+        trees = {str(story_id): CommentTree(story_id) for story_id in story_ids}
+        # 第0层是新闻本身，只用来取得排名前K的顶层评论id
+        frontier = [(story_id, int(story_id), None, -1) for story_id in trees]
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='comments')
+        try:
+            depth = -1
+            while frontier and depth < self.max_depth:
+                results = self._fetch_level(executor, frontier, deadline, trees)
+                next_frontier = []
+                for (story_id, _, parent, _), item in zip(frontier, results):
+                    if not item:
+                        continue
+                    tree = trees[story_id]
+                    if depth < 0:
+                        index = -1
+                        kids = item.get('kids', [])[:self.top_k]
+                    else:
+                        if item.get('deleted') or item.get('dead'):
+                            continue
+                        index = tree.add(item['id'], parent, item.get('by'), comment_text(item.get('text')), item.get('time'))
+                        kids = item.get('kids', [])[:self.max_children]
+                    next_frontier.extend((story_id, kid, index, depth + 1) for kid in kids)
+                frontier = next_frontier
+                depth += 1
+        finally:
+            # 超时的请求已在 _fetch_level 中取消，不等待正在进行的请求
+            executor.shutdown(wait=False)
+        return trees
+
+    def _fetch_level(self, executor, frontier, deadline, trees):
+        """并发抓取一层评论，保持与frontier相同的顺序；超时的位置为None"""
+        futures = [executor.submit(self._get_item, item_id) for _, item_id, _, _ in frontier]
+        self.stats['requests'] += len(futures)
+        pending = set(futures)
+        while pending:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            _, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+
+        results = []
+        for (story_id, _, _, _), future in zip(frontier, futures):
+            if not future.done():
+                future.cancel()
+                trees[story_id].complete = False
+                self.stats['timeouts'] += 1
+                results.append(None)
+                continue
+            try:
+                results.append(future.result())
+            except Exception as e:
+                self.stats['errors'] += 1
+                logging.debug(f"获取评论失败: {e}")
+                results.append(None)
+        return results
+
+
+def discussion_highlights(tree, max_points=3, max_chars=160):
+    """抽取讨论要点：句子TextRank得分 x log(1+子树大小)，每条评论最多取一句"""
+    if not len(tree):
+        return []
+    sizes = tree.subtree_sizes()
+    sentences, owners = [], []
+    for i, text in enumerate(tree.texts):
+        for sentence in summarizer.split_sentences(text, min_length=30, max_length=400):
+            sentences.append(sentence)
+            owners.append(i)
+    if not sentences:
+        return []
+
+    tokens = [tokenize(sentence) for sentence in sentences]
+    scores = summarizer.textrank_scores(tokens)
+    weights = np.array([math.log1p(sizes[i]) for i in owners], dtype=np.float32)
+    ranked = np.argsort(-(scores * weights), kind='stable')
+
+    highlights, used = [], set()
+    for k in ranked:
+        owner = owners[k]
+        sentence = sentences[k]
+        if owner in used or sentence in highlights:
+            continue
+        used.add(owner)
+        highlights.append(sentence)
+        if len(highlights) >= max_points:
+            break
+    return [s if len(s) <= max_chars else s[:max_chars].rstrip() + '...' for s in highlights]
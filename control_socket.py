@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hacker News 爬虫 - 守护进程控制接口
+
+守护进程在本地Unix域套接字上监听控制命令，管理工具通过该套接字
+查询状态、立即触发爬取、清空待发送队列、暂停/恢复和获取实时统计，
+无需扫描进程列表，也不会启动新的解释器。
+
+协议: 每个连接发送一行JSON请求 {"cmd": "..."}，返回一行JSON响应。
+"""
+
+import os
+import json
+import time
+import socket
+import logging
+import threading
+import socketserver
+
+DEFAULT_SOCKET_PATH = '/tmp/hn_crawler.sock'
+
+COMMANDS = ('status', 'stats', 'trigger-crawl-now', 'drain-outbox', 'reload-config', 'pause', 'resume', 'stop')
+
+
+class DaemonControl:
+    """守护进程的共享控制状态
+
+    控制线程只修改标志位并唤醒主循环，实际爬取/发送始终在主线程中执行，
+    避免与爬虫实例产生并发访问。
+    """
+
+    def __init__(self, role='standalone'):
+        self.role = role
+        self.started_at = time.time()
+        self.paused = False
+        self.stop_requested = False
+        self.busy = None  # 当前正在执行的操作
+        self.next_run = None
+        self.last_run = None
+        self._metrics = {}
+        self._pending = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+    def request(self, action):
+        """请求主循环执行一个操作（crawl/drain/reload），重复请求会合并"""
+        with self._lock:
+            if action not in self._pending:
+                self._pending.append(action)
+        self._wakeup.set()
+
+    def pop_action(self):
+        with self._lock:
+            return self._pending.pop(0) if self._pending else None
+
+    def wait(self, timeout):
+        """等待到超时或有新的控制请求"""
+        self._wakeup.wait(timeout)
+        self._wakeup.clear()
+
+    def wake(self):
+        """唤醒正在等待的主循环（不加锁，可在信号处理函数中调用）"""
+        self._wakeup.set()
+
+    def stop(self):
+        self.stop_requested = True
+        self.wake()
+
+    def publish_metrics(self, metrics):
+        """主循环发布指标快照（JSON往返得到的深拷贝）；stats 命令只读取快照，
+        控制线程不会在主循环修改指标字典时序列化它"""
+        snapshot = json.loads(json.dumps(metrics, ensure_ascii=False, default=str))
+        with self._lock:
+            self._metrics = snapshot
+
+    def status(self):
+        return {
+            'pid': os.getpid(),
+            'role': self.role,
+            'paused': self.paused,
+            'busy': self.busy,
+            'uptime_seconds': round(time.time() - self.started_at, 1),
+            'last_run': self.last_run,
+            'next_run': self.next_run,
+            'pending_actions': self._pending_actions(),
+        }
+
+    def _pending_actions(self):
+        with self._lock:
+            return list(self._pending)
+
+    def handle(self, cmd):
+        """处理一条控制命令，返回响应字典"""
+        if cmd == 'status':
+            return {'ok': True, 'result': self.status()}
+        if cmd == 'stats':
+            with self._lock:
+                metrics = self._metrics
+            return {'ok': True, 'result': metrics}
+        if cmd == 'trigger-crawl-now':
+            self.request('crawl')
+            return {'ok': True, 'result': '已加入爬取请求'}
+        if cmd == 'drain-outbox':
+            self.request('drain')
+            return {'ok': True, 'result': '已加入发送请求'}
+        if cmd == 'reload-config':
+            self.request('reload')
+            return {'ok': True, 'result': '已请求重新加载配置，结果见日志'}
+        if cmd == 'pause':
+            self.paused = True
+            return {'ok': True, 'result': '定时任务已暂停'}
+        if cmd == 'resume':
+            self.paused = False
+            self._wakeup.set()
+            return {'ok': True, 'result': '定时任务已恢复'}
+        if cmd == 'stop':
+            self.stop()
+            return {'ok': True, 'result': '守护进程正在停止'}
+        return {'ok': False, 'error': f"未知命令: {cmd}，可用命令: {', '.join(COMMANDS)}"}
+
+
+class _ControlHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            line = self.rfile.readline(65536)
+            request = json.loads(line.decode('utf-8') or '{}')
+            response = self.server.control.handle(request.get('cmd'))
+        except Exception as e:
+            response = {'ok': False, 'error': str(e)}
+        self.wfile.write((json.dumps(response, ensure_ascii=False, default=str) + '\n').encode('utf-8'))
+
+
+class _ControlServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class ControlServer:
+    """在后台线程中运行的控制套接字服务"""
+
+    def __init__(self, control, socket_path=DEFAULT_SOCKET_PATH):
+        self.control = control
+        self.socket_path = socket_path
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        # 清理上次异常退出遗留的套接字文件（守护进程已持有文件锁，不会误删其他实例的）
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        self._server = _ControlServer(self.socket_path, _ControlHandler)
+        self._server.control = self.control
+        os.chmod(self.socket_path, 0o600)
+        self._thread = threading.Thread(target=self._server.serve_forever, name='control-socket', daemon=True)
+        self._thread.start()
+        logging.info(f"🎛️ 控制接口已启动: {self.socket_path}")
+
+    def close(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        try:
+            os.remove(self.socket_path)
+        except OSError:
+            pass
+
+
+def send_command(cmd, socket_path=DEFAULT_SOCKET_PATH, timeout=5):
+    """向守护进程发送控制命令，返回响应字典
+
+    守护进程未运行时抛出 ConnectionError
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        try:
+            sock.connect(socket_path)
+        except (FileNotFoundError, ConnectionRefusedError) as e:
+            raise ConnectionError(f"无法连接控制接口 {socket_path}: {e}")
+        sock.sendall((json.dumps({'cmd': cmd}) + '\n').encode('utf-8'))
+        data = b''
+        while not data.endswith(b'\n'):
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+        return json.loads(data.decode('utf-8'))
+    finally:
+        sock.close()
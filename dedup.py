@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hacker News 爬虫 - 近似重复新闻检测
+
+HN的id去重无法识别同一文章的重复提交（UTM参数、http/https、移动版域名）
+以及不同媒体对同一事件的报道。这里分两步在昂贵的处理之前合并重复项:
+
+1. 发现阶段：URL规范化后精确匹配
+2. 抓取正文后、翻译和推送之前：正文MinHash/LSH近似匹配
+
+标题近似（去掉停用词和 Show HN/Ask HN 等前缀后的MinHash）只用来挑选候选：
+"I built a database in Rust" 和 "I built a compiler in Rust"、每月的 "Who is hiring?" 帖子
+标题很像但是不同的新闻，只有正文也与候选相似时才合并。
+"""
+
+import re
+import random
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from search_index import tokenize
+
+# 不影响页面内容的跟踪参数（ref、source、src 等在不少站点上用于选择内容，保留）
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', 'ref_src', 'ref_url',
+    'share', 'igshid', 'si', 'cmpid', 'ncid', 'sr_share', 'smid', 'spm',
+}
+# 移动版/加速版子域名前缀
+HOST_PREFIXES = ('www.', 'm.', 'mobile.', 'amp.', 'old.')
+INDEX_FILES = ('/index.html', '/index.htm', '/index.php')
+# 文章的AMP版本（/post/amp）；只去掉文章路径后的这一段，站点根目录下的 /amp 保留
+AMP_SUFFIXES = ('/amp', '/amp/')
+
+# 标题比较时去掉的HN前缀和英文停用词
+TITLE_PREFIX = re.compile(r'^\s*(show|ask|tell|launch)\s+hn\s*[:\-–—]\s*', re.IGNORECASE)
+STOPWORDS = {
+    'a', 'an', 'the', 'and', 'or', 'but', 'of', 'in', 'on', 'at', 'to', 'for', 'from', 'by', 'with',
+    'about', 'as', 'into', 'over', 'is', 'are', 'was', 'were', 'be', 'been', 'it', 'its', 'this',
+    'that', 'these', 'those', 'i', 'we', 'you', 'my', 'our', 'your', 'how', 'what', 'why', 'who',
+    'when', 'where', 'which', 'do', 'does', 'did', 'not', 'no', 'vs', 'via', 'hn', 's', 't',
+}
+
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+def canonicalize_url(url):
+    """URL规范化：统一协议、去掉移动版前缀、跟踪参数、片段和结尾斜杠"""
+    if not url or not isinstance(url, str):
+        return ''
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url.strip()
+    if parts.scheme not in ('http', 'https') or not parts.netloc:
+        return url.strip()
+
+    host = parts.hostname or ''
+    for prefix in HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path or '/'
+    for suffix in INDEX_FILES:
+        if path.endswith(suffix):
+            path = path[:-len(suffix)] or '/'
+            break
+    for suffix in AMP_SUFFIXES:
+        if path.endswith(suffix) and path[:-len(suffix)].strip('/'):
+            path = path[:-len(suffix)]
+            break
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith('utm_') and k.lower() not in TRACKING_PARAMS
+    ]
+    query.sort()
+    return urlunsplit(('https', host, path, urlencode(query), ''))
+
+
+def shingles(text, n=1):
+    """生成n元词组集合（英文单词、中文双字）"""
+    tokens = tokenize(text)
+    if n <= 1 or len(tokens) < n:
+        return set(tokens)
+    return {' '.join(tokens[i:i + n]) for i in range(len(tokens) - n + 1)}
+
+
+def title_shingles(title):
+    """标题的比较词集：去掉 Show HN/Ask HN 等前缀和停用词"""
+    title = TITLE_PREFIX.sub('', title or '')
+    return {token for token in tokenize(title) if token not in STOPWORDS}
+
+
+class MinHasher:
+    """MinHash签名：num_perm 个随机线性哈希下的最小值"""
+
+    def __init__(self, num_perm=64, seed=1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.params = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+                       for _ in range(num_perm)]
+
+    def signature(self, shingle_set):
+        if not shingle_set:
+            return None
+        hashes = [
+            int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'little')
+            for s in shingle_set
+        ]
+        return tuple(
+            min((a * h + b) % _MERSENNE_PRIME for h in hashes)
+            for a, b in self.params
+        )
+
+
+def estimate_similarity(sig_a, sig_b):
+    """用签名中相同位置的比例估计Jaccard相似度"""
+    if not sig_a or not sig_b:
+        return 0.0
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+
+class LSHIndex:
+    """MinHash签名的分段（banding）局部敏感哈希索引"""
+
+    def __init__(self, num_perm=64, bands=16):
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.buckets = [dict() for _ in range(bands)]
+        self.signatures = {}
+
+    def _band_keys(self, signature):
+        for i in range(self.bands):
+            yield i, hash(signature[i * self.rows:(i + 1) * self.rows])
+
+    def add(self, key, signature):
+        if signature is None:
+            return
+        self.signatures[key] = signature
+        for i, band_key in self._band_keys(signature):
+            self.buckets[i].setdefault(band_key, set()).add(key)
+
+    def remove(self, key):
+        signature = self.signatures.pop(key, None)
+        if signature is None:
+            return
+        for i, band_key in self._band_keys(signature):
+            bucket = self.buckets[i].get(band_key)
+            if bucket:
+                bucket.discard(key)
+                if not bucket:
+                    del self.buckets[i][band_key]
+
+    def query(self, signature, threshold):
+        """返回相似度不低于 threshold 的最佳匹配 (key, 相似度)，没有则返回 (None, 0)"""
+        if signature is None:
+            return None, 0.0
+        candidates = set()
+        for i, band_key in self._band_keys(signature):
+            candidates.update(self.buckets[i].get(band_key, ()))
+        best_key, best_score = None, 0.0
+        for key in candidates:
+            score = estimate_similarity(signature, self.signatures[key])
+            if score >= threshold and score > best_score:
+                best_key, best_score = key, score
+        return best_key, best_score
+
+    def __len__(self):
+        return len(self.signatures)
+
+
+class NearDuplicateIndex:
+    """内存中的近似重复索引，按插入顺序淘汰最旧条目"""
+
+    def __init__(self, max_entries=5000, num_perm=64, bands=16, title_threshold=0.7, content_threshold=0.5,
+                 min_content_shingles=20):
+        self.max_entries = max_entries
+        self.min_content_shingles = min_content_shingles
+        self.title_threshold = title_threshold
+        self.content_threshold = content_threshold
+        self.hasher = MinHasher(num_perm)
+        self.title_lsh = LSHIndex(num_perm, bands)
+        self.content_lsh = LSHIndex(num_perm, bands)
+        self.urls = {}
+        self.entries = OrderedDict()  # id -> 规范化URL
+        self.duplicates = OrderedDict()  # 重复id -> 原始id
+        self.candidates = OrderedDict()  # 标题近似的id -> 候选原始id，待正文确认
+        self._lock = threading.Lock()
+
+    def _evict(self):
+        while len(self.entries) > self.max_entries:
+            story_id, url = self.entries.popitem(last=False)
+            if self.urls.get(url) == story_id:
+                del self.urls[url]
+            self.title_lsh.remove(story_id)
+            self.content_lsh.remove(story_id)
+        while len(self.duplicates) > self.max_entries:
+            self.duplicates.popitem(last=False)
+        while len(self.candidates) > self.max_entries:
+            self.candidates.popitem(last=False)
+
+    def _record_duplicate(self, story_id, original_id):
+        self.duplicates[story_id] = original_id
+        self._evict()
+        return original_id
+
+    def add(self, news):
+        """登记一条新闻（NewsItem 的URL和标题签名）"""
+        story_id = str(news.id)
+        url = canonicalize_url(news.url)
+        with self._lock:
+            self.entries[story_id] = url
+            if url and url not in self.urls:
+                self.urls[url] = story_id
+            self.title_lsh.add(story_id, self.hasher.signature(title_shingles(news.title)))
+            self._evict()
+
+    def find_duplicate(self, news):
+        """发现阶段检测：URL重复时返回原始新闻id，否则返回None
+
+        标题近似只记为候选，由 check_content 在正文也相似时确认
+        """
+        story_id = str(news.id)
+        url = canonicalize_url(news.url)
+        with self._lock:
+            if story_id in self.duplicates:
+                return self.duplicates[story_id]
+            original_id = self.urls.get(url) if url else None
+            if original_id and original_id != story_id:
+                logging.info(f"🔁 URL重复: {news.title} -> #{original_id}")
+                return self._record_duplicate(story_id, original_id)
+
+            signature = self.hasher.signature(title_shingles(news.title))
+            original_id, score = self.title_lsh.query(signature, self.title_threshold)
+            if original_id and original_id != story_id:
+                logging.debug(f"标题近似 ({score:.2f})，待正文确认: {news.title} -> #{original_id}")
+                self.candidates[story_id] = original_id
+                self._evict()
+        return None
+
+    def check_content(self, news_id, content):
+        """正文检测：与已登记正文近似重复时返回原始新闻id，否则登记并返回None"""
+        story_id = str(news_id)
+        content_shingles = shingles(content, n=3)
+        # 正文过短（包括"无法获取文章内容"等占位文本）时不参与比较
+        if len(content_shingles) < self.min_content_shingles:
+            return None
+        signature = self.hasher.signature(content_shingles)
+        with self._lock:
+            # 标题近似的候选直接比较签名，不依赖LSH分段碰撞
+            candidate_id = self.candidates.pop(story_id, None)
+            candidate = self.content_lsh.signatures.get(candidate_id)
+            if candidate is not None:
+                score = estimate_similarity(signature, candidate)
+                if score >= self.content_threshold:
+                    logging.info(f"🔁 标题和正文近似重复 ({score:.2f}): #{story_id} -> #{candidate_id}")
+                    return self._record_duplicate(story_id, candidate_id)
+            original_id, score = self.content_lsh.query(signature, self.content_threshold)
+            if original_id and original_id != story_id:
+                logging.info(f"🔁 正文近似重复 ({score:.2f}): #{story_id} -> #{original_id}")
+                return self._record_duplicate(story_id, original_id)
+            self.entries.setdefault(story_id, '')
+            self.content_lsh.add(story_id, signature)
+            self._evict()
+        return None
+
+    def export_state(self):
+        """导出索引状态（供热重启快照），签名为整数元组"""
+        with self._lock:
+            return {
+                'num_perm': self.hasher.num_perm,
+                'entries': list(self.entries.items()),
+                'urls': list(self.urls.items()),
+                'duplicates': list(self.duplicates.items()),
+                'candidates': list(self.candidates.items()),
+                'title': dict(self.title_lsh.signatures),
+                'content': dict(self.content_lsh.signatures),
+            }
+
+    def load_state(self, state):
+        """从 export_state() 的结果恢复，签名长度不一致时不恢复并返回False"""
+        if state.get('num_perm') != self.hasher.num_perm:
+            return False
+        with self._lock:
+            self.entries = OrderedDict(state['entries'])
+            self.urls = dict(state['urls'])
+            self.duplicates = OrderedDict(state['duplicates'])
+            self.candidates = OrderedDict(state.get('candidates', []))
+            self.title_lsh = LSHIndex(self.hasher.num_perm, self.title_lsh.bands)
+            self.content_lsh = LSHIndex(self.hasher.num_perm, self.content_lsh.bands)
+            for key, signature in state['title'].items():
+                self.title_lsh.add(key, signature)
+            for key, signature in state['content'].items():
+                self.content_lsh.add(key, signature)
+            self._evict()
+        return True
+
+    def __contains__(self, news_id):
+        return str(news_id) in self.entries
+
+    def stats(self):
+        return {
+            'entries': len(self.entries),
+            'title_signatures': len(self.title_lsh),
+            'content_signatures': len(self.content_lsh),
+            'duplicates': len(self.duplicates),
+        }
+
+    def nbytes(self):
+        """估算占用内存（签名为主）"""
+        per_signature = 8 * self.hasher.num_perm + 120
+        return (len(self.title_lsh) + len(self.content_lsh)) * per_signature + len(self.entries) * 200
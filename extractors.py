@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hacker News 爬虫 - 站点专用正文提取器
+
+HN上大量链接指向 GitHub、arXiv、YouTube、Twitter/X 和 PDF，通用的整页解析
+对这些站点既慢又常常只能拿到导航文本。这里为常见站点注册专用提取器，
+直接获取最便宜的有效表示（原始README、arXiv摘要、PDF首页文本、oEmbed元数据），
+提取失败或返回None时由调用方回退到通用解析。
+
+提取器签名: func(url, parts, fetch) -> str | None
+  parts: urllib.parse.urlsplit(url) 的结果
+  fetch: fetch(url, headers=None, stream=False) -> requests.Response
+"""
+
+import io
+import re
+import time
+import logging
+import threading
+import xml.etree.ElementTree as ET
+from urllib.parse import urlsplit, quote
+
+from bs4 import BeautifulSoup
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # 可选依赖
+    PdfReader = None
+
+
+class ExtractorRegistry:
+    """按域名/路径匹配的提取器注册表，记录每个提取器的调用次数和耗时"""
+
+    def __init__(self):
+        self.extractors = []
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, hosts=None, path_pattern=None):
+        """装饰器：为指定域名（及可选的路径正则）注册提取器，hosts为None时匹配所有域名
+
+        按注册顺序匹配，第一个匹配的提取器生效
+        """
+        hosts = tuple(hosts) if hosts else None
+        path_re = re.compile(path_pattern) if path_pattern else None
+
+        def decorator(func):
+            self.extractors.append((name, hosts, path_re, func))
+            self.stats.setdefault(name, {'calls': 0, 'hits': 0, 'errors': 0, 'total_ms': 0.0})
+            return func
+        return decorator
+
+    def find(self, url):
+        """返回匹配的 (名称, 提取函数, parts)，没有匹配返回None"""
+        try:
+            parts = urlsplit(url)
+        except ValueError:
+            return None
+        host = (parts.hostname or '').lower()
+        for name, hosts, path_re, func in self.extractors:
+            if hosts is None or any(host == h or host.endswith('.' + h) for h in hosts):
+                if path_re is None or path_re.search(parts.path):
+                    return name, func, parts
+        return None
+
+    def _record(self, name, elapsed_ms, hit, error=False):
+        with self._lock:
+            stats = self.stats[name]
+            stats['calls'] += 1
+            stats['total_ms'] += elapsed_ms
+            stats['hits'] += int(hit)
+            stats['errors'] += int(error)
+
+    def extract(self, url, fetch):
+        """尝试用专用提取器获取正文，返回 (提取器名称, 文本)；不匹配或失败时文本为None"""
+        matched = self.find(url)
+        if not matched:
+            return None, None
+        name, func, parts = matched
+        start = time.perf_counter()
+        try:
+            text = func(url, parts, fetch)
+        except Exception as e:
+            self._record(name, (time.perf_counter() - start) * 1000, False, error=True)
+            logging.debug(f"提取器 {name} 失败 {url}: {e}")
+            return name, None
+        text = text.strip() if text else None
+        self._record(name, (time.perf_counter() - start) * 1000, bool(text))
+        return name, text
+
+    def report(self):
+        """每个提取器的调用次数、命中率和平均耗时"""
+        with self._lock:
+            return {
+                name: {
+                    'calls': s['calls'],
+                    'hits': s['hits'],
+                    'errors': s['errors'],
+                    'avg_ms': round(s['total_ms'] / s['calls'], 2) if s['calls'] else 0.0,
+                }
+                for name, s in self.stats.items()
+            }
+
+
+registry = ExtractorRegistry()
+
+
+def extract_generic(html, max_lines=40):
+    """通用整页解析：去掉脚本/导航等元素，优先取正文容器，保留较长的文本行"""
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # 移除不需要的元素
+    for element in soup(['script', 'style', 'nav', 'header', 'footer', 'aside']):
+        element.decompose()
+
+    # 尝试找到主要内容
+    content = ""
+    for selector in ['article', 'main', '.content', '.post', '.entry']:
+        element = soup.select_one(selector)
+        if element:
+            content = element.get_text()
+            break
+
+    if not content:
+        content = soup.get_text()
+    soup.decompose()
+
+    # 清理内容
+    cleaned_lines = []
+    for line in content.split('\n'):
+        line = line.strip()
+        if len(line) > 20 and not line.startswith(('http', 'www', '@')):
+            cleaned_lines.append(line)
+
+    return '\n'.join(cleaned_lines[:max_lines])
+
+
+def markdown_to_text(markdown):
+    """粗略去除Markdown标记，保留正文段落"""
+    text = re.sub(r'```.*?```', ' ', markdown, flags=re.DOTALL)
+    text = re.sub(r'<[^>]+>', ' ', text)
+    text = re.sub(r'!\[[^\]]*\]\([^)]*\)', ' ', text)  # 图片
+    text = re.sub(r'\[([^\]]*)\]\([^)]*\)', r'\1', text)  # 链接保留文字
+    text = re.sub(r'^\s{0,3}(#{1,6}|>|[-*+]|\d+\.)\s*', '', text, flags=re.MULTILINE)
+    text = re.sub(r'[`*_]{1,3}', '', text)
+    lines = [line.strip() for line in text.splitlines()]
+    return '\n'.join(line for line in lines if len(line) > 20)
+
+
+GITHUB_RESERVED = {'orgs', 'topics', 'marketplace', 'sponsors', 'settings', 'features', 'about', 'collections'}
+
+
+@registry.register('github', ['github.com'], r'^/[^/]+/[^/]+')
+def extract_github(url, parts, fetch):
+    """GitHub仓库：通过API获取原始README"""
+    owner, repo = parts.path.strip('/').split('/')[:2]
+    if owner in GITHUB_RESERVED:
+        return None
+    if repo.endswith('.git'):
+        repo = repo[:-4]
+    response = fetch(
+        f"https://api.github.com/repos/{owner}/{repo}/readme",
+        headers={'Accept': 'application/vnd.github.raw'}
+    )
+    if response.status_code != 200:
+        return None
+    return markdown_to_text(response.text)
+
+
+ARXIV_ID = re.compile(r'^/(?:abs|pdf|html)/([^/?#]+?)(?:v\d+)?(?:\.pdf)?/?$')
+ATOM_NS = {'atom': 'http://www.w3.org/2005/Atom'}
+
+
+@registry.register('arxiv', ['arxiv.org'], r'^/(abs|pdf|html)/')
+def extract_arxiv(url, parts, fetch):
+    """arXiv论文：通过export API获取标题和摘要，避免下载PDF"""
+    match = ARXIV_ID.match(parts.path)
+    if not match:
+        return None
+    response = fetch(f"https://export.arxiv.org/api/query?id_list={quote(match.group(1))}")
+    if response.status_code != 200:
+        return None
+    entry = ET.fromstring(response.content).find('atom:entry', ATOM_NS)
+    if entry is None:
+        return None
+    summary = entry.findtext('atom:summary', default='', namespaces=ATOM_NS)
+    return re.sub(r'\s+', ' ', summary).strip()
+
+
+@registry.register('youtube', ['youtube.com', 'youtu.be'])
+def extract_youtube(url, parts, fetch):
+    """YouTube视频：oEmbed元数据（标题、频道）"""
+    response = fetch(f"https://www.youtube.com/oembed?url={quote(url, safe='')}&format=json")
+    if response.status_code != 200:
+        return None
+    data = response.json()
+    title = data.get('title')
+    if not title:
+        return None
+    return f"Video: {title}. Published by {data.get('author_name', 'unknown channel')} on YouTube."
+
+
+@registry.register('twitter', ['twitter.com', 'x.com'], r'/status/\d+')
+def extract_twitter(url, parts, fetch):
+    """Twitter/X：oEmbed返回的推文正文"""
+    response = fetch(f"https://publish.twitter.com/oembed?url={quote(url, safe='')}&omit_script=true")
+    if response.status_code != 200:
+        return None
+    data = response.json()
+    soup = BeautifulSoup(data.get('html', ''), 'html.parser')
+    paragraph = soup.find('p')
+    text = paragraph.get_text(' ', strip=True) if paragraph else ''
+    soup.decompose()
+    if not text:
+        return None
+    return f"{text}\nPosted by {data.get('author_name', 'unknown')} on X."
+
+
+@registry.register('hn_item', ['news.ycombinator.com'], r'^/item')
+def extract_hn_item(url, parts, fetch):
+    """HN讨论帖（Ask HN等）：通过官方API获取帖子正文"""
+    match = re.search(r'id=(\d+)', parts.query)
+    if not match:
+        return None
+    response = fetch(f"https://hacker-news.firebaseio.com/v0/item/{match.group(1)}.json")
+    if response.status_code != 200:
+        return None
+    data = response.json() or {}
+    text = data.get('text')
+    if not text:
+        return "这是一个HN讨论帖"
+    soup = BeautifulSoup(text, 'html.parser')
+    result = soup.get_text('\n', strip=True)
+    soup.decompose()
+    return result
+
+
+PDF_MAX_BYTES = 8 * 1024 * 1024
+
+
+# 按路径后缀匹配任意域名，注册在最后（arxiv.org/pdf 已由arxiv提取器处理）
+@registry.register('pdf', path_pattern=r'(?i)\.pdf$')
+def extract_pdf(url, parts, fetch, max_bytes=PDF_MAX_BYTES):
+    """PDF：下载（限制大小）后只解析第一页文本，需要安装pypdf"""
+    if PdfReader is None:
+        return None
+    response = fetch(url, stream=True)
+    try:
+        if response.status_code != 200:
+            return None
+        buffer = io.BytesIO()
+        for chunk in response.iter_content(chunk_size=65536):
+            buffer.write(chunk)
+            if buffer.tell() > max_bytes:
+                logging.debug(f"PDF超过大小限制，跳过: {url}")
+                return None
+    finally:
+        response.close()
+    reader = PdfReader(buffer)
+    if not reader.pages:
+        return None
+    text = reader.pages[0].extract_text() or ''
+    lines = [line.strip() for line in text.splitlines()]
+    return '\n'.join(line for line in lines if len(line) > 20)
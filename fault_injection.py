@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hacker News 爬虫 - 网络故障注入
+
+挂载在爬虫 requests 会话上的传输层（HTTPAdapter），按配置的概率对请求注入故障，
+用来检验 send_telegram_message、translate_text、get_article_content 等重试/超时逻辑
+在弱网和服务端异常下的表现:
+
+- latency   额外延迟（FAULT_LATENCY 范围内随机），超过请求的读超时则变为超时
+- timeout   挂起到请求的读超时后抛出 ReadTimeout
+- reset     连接被重置（ConnectionError）
+- 429       限流响应，带 Retry-After（FAULT_RETRY_AFTER）
+- 5xx       500/502/503/504 空响应
+- truncate  正常请求，但响应体被截断一半
+
+除 latency 外各故障互斥，每个请求最多注入一种。FAULT_INJECTION_TARGET 指向本地替身服务器时，
+所有请求改发到该地址（原始域名放在 X-Original-Host 请求头中），不访问真实网络。
+只用于测试环境：未配置 FAULT_INJECTION 时不会挂载。
+
+配置示例:
+  FAULT_INJECTION=latency=0.3,timeout=0.05,reset=0.05,429=0.05,5xx=0.1,truncate=0.05
+  FAULT_INJECTION_HOSTS=api.telegram.org,translate.googleapis.com
+"""
+
+import io
+import os
+import time
+import random
+import logging
+import threading
+from collections import Counter
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+FAULT_KINDS = ('timeout', 'reset', '429', '5xx', 'truncate')
+SERVER_ERRORS = (500, 502, 503, 504)
+
+
+def parse_spec(spec):
+    """'latency=0.3,5xx=0.1' -> {'latency': 0.3, '5xx': 0.1}"""
+    probabilities = {}
+    for part in (spec or '').split(','):
+        if not part.strip():
+            continue
+        kind, _, value = part.partition('=')
+        kind = kind.strip().lower()
+        if kind != 'latency' and kind not in FAULT_KINDS:
+            raise ValueError(f"未知的故障类型: {kind}")
+        probability = float(value)
+        if not 0 <= probability <= 1:
+            raise ValueError(f"故障概率应在0-1之间: {part}")
+        probabilities[kind] = probability
+    if sum(probabilities.get(kind, 0) for kind in FAULT_KINDS) > 1:
+        raise ValueError("互斥故障（timeout/reset/429/5xx/truncate）的概率之和不能超过1")
+    return probabilities
+
+
+def parse_range(value, default=(0.5, 3.0)):
+    """'0.5-3' -> (0.5, 3.0)，单个数字表示固定值"""
+    if not value:
+        return default
+    low, _, high = value.partition('-')
+    return float(low), float(high or low)
+
+
+def read_timeout(timeout, default):
+    """requests 的 timeout 参数（数字或 (连接, 读取)）中的读超时"""
+    if isinstance(timeout, tuple):
+        timeout = timeout[1]
+    return default if timeout is None else float(timeout)
+
+
+class FaultInjector(HTTPAdapter):
+    """按概率注入故障的传输层
+
+    probabilities: 各故障类型的概率（见 FAULT_KINDS，另有独立的 latency）
+    hosts: 只对这些域名（含子域名）注入故障，为空时对所有请求注入
+    target: 本地替身服务器地址，不为空时所有请求改发到这里
+    max_hang: 请求未设置超时时 timeout 故障挂起的时长
+    """
+
+    def __init__(self, probabilities, hosts=None, latency=(0.5, 3.0), retry_after=1,
+                 target=None, seed=None, max_hang=30.0, **kwargs):
+        super().__init__(**kwargs)
+        self.probabilities = dict(probabilities)
+        self.hosts = tuple(host.lower() for host in (hosts or ()))
+        self.latency = latency
+        self.retry_after = retry_after
+        self.target = urlsplit(target) if target else None
+        self.max_hang = max_hang
+        self.stats = Counter()
+        self.requests_by_host = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        """按环境变量创建；未配置 FAULT_INJECTION 时返回None，kwargs 传给 HTTPAdapter（如 pool_maxsize）"""
+        spec = os.getenv('FAULT_INJECTION', '')
+        if not spec:
+            return None
+        hosts = [host.strip() for host in os.getenv('FAULT_INJECTION_HOSTS', '').split(',') if host.strip()]
+        seed = os.getenv('FAULT_INJECTION_SEED', '')
+        return cls(
+            parse_spec(spec),
+            hosts=hosts,
+            latency=parse_range(os.getenv('FAULT_LATENCY', '')),
+            retry_after=int(os.getenv('FAULT_RETRY_AFTER', 1)),
+            target=os.getenv('FAULT_INJECTION_TARGET') or None,
+            seed=int(seed) if seed else None,
+            **kwargs
+        )
+
+    def mount(self, session):
+        """替换会话上 http/https 的传输层"""
+        session.mount('http://', self)
+        session.mount('https://', self)
+        return self
+
+    def applies_to(self, host):
+        return not self.hosts or any(host == h or host.endswith('.' + h) for h in self.hosts)
+
+    def _roll(self, host):
+        """决定本次请求的 (额外延迟秒数, 故障类型或None)"""
+        if not self.applies_to(host):
+            return 0.0, None
+        with self._lock:
+            delay = 0.0
+            if self._random.random() < self.probabilities.get('latency', 0):
+                delay = self._random.uniform(*self.latency)
+            roll = self._random.random()
+            for kind in FAULT_KINDS:
+                roll -= self.probabilities.get(kind, 0)
+                if roll < 0:
+                    return delay, kind
+            return delay, None
+
+    def _record(self, host, delay, kind):
+        with self._lock:
+            self.stats['requests'] += 1
+            self.requests_by_host[host] += 1
+            if delay and kind != 'timeout':
+                self.stats['latency'] += 1
+            if kind:
+                self.stats[kind] += 1
+
+    def _redirect(self, request):
+        """改发到替身服务器，原始域名放在请求头中"""
+        parts = urlsplit(request.url)
+        request = request.copy()
+        request.url = urlunsplit((self.target.scheme, self.target.netloc, parts.path, parts.query, ''))
+        request.headers['X-Original-Host'] = parts.netloc
+        return request
+
+    def _synthetic(self, request, status_code, body=b'', headers=None):
+        response = requests.Response()
+        response.status_code = status_code
+        response.reason = 'Fault Injected'
+        response.url = request.url
+        response.request = request
+        response.headers.update(headers or {})
+        response.raw = io.BytesIO(body)
+        response.connection = self
+        return response
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        host = (urlsplit(request.url).hostname or '').lower()
+        delay, kind = self._roll(host)
+        hang = read_timeout(timeout, self.max_hang)
+
+        # 延迟超过读超时时，客户端看到的是超时
+        if delay >= hang and kind not in ('timeout', 'reset'):
+            kind = 'timeout'
+        self._record(host, delay, kind)
+        if kind == 'timeout':
+            time.sleep(hang)
+            raise requests.exceptions.ReadTimeout(f"故障注入: {host} 读取超时 ({hang:g}s)", request=request)
+        if delay:
+            time.sleep(delay)
+        if kind == 'reset':
+            raise requests.exceptions.ConnectionError(
+                ConnectionResetError(104, f"故障注入: {host} 连接被重置"), request=request
+            )
+        if kind == '429':
+            body = (f'{{"ok":false,"error_code":429,"description":"Too Many Requests: retry after {self.retry_after}",'
+                    f'"parameters":{{"retry_after":{self.retry_after}}}}}').encode()
+            return self._synthetic(request, 429, body, {'Retry-After': str(self.retry_after),
+                                                         'Content-Type': 'application/json'})
+        if kind == '5xx':
+            with self._lock:
+                status_code = self._random.choice(SERVER_ERRORS)
+            return self._synthetic(request, status_code)
+
+        if self.target is not None:
+            request, proxies = self._redirect(request), None
+        response = super().send(request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+        if kind == 'truncate':
+            # 读出完整响应体（已解压），只交给调用方前一半
+            body = response.raw.read(decode_content=True)
+            response.raw.release_conn()
+            response.raw = io.BytesIO(body[:len(body) // 2])
+            response.headers.pop('Content-Encoding', None)
+        return response
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats, hosts=dict(self.requests_by_host))
+
+
+def install(session, **kwargs):
+    """按环境变量在会话上挂载故障注入，返回 FaultInjector 或 None
+
+    kwargs 传给 HTTPAdapter：替换会话原有的传输层时保持相同的连接池大小"""
+    try:
+        injector = FaultInjector.from_env(**kwargs)
+    except ValueError as e:
+        logging.error(f"❌ 故障注入配置无效，未启用: {e}")
+        return None
+    if injector is None:
+        return None
+    injector.mount(session)
+    target = f"，请求改发到 {os.getenv('FAULT_INJECTION_TARGET')}" if injector.target else ''
+    logging.warning(f"⚠️ 网络故障注入已启用（仅用于测试）: {os.getenv('FAULT_INJECTION')}{target}")
+    return injector
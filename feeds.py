@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hacker News 爬虫 - RSS/Atom/JSON Feed 订阅源输出
+
+除Telegram推送外，把最近补全过的新闻输出为三种订阅源文件:
+  feed.xml (RSS 2.0)、atom.xml (Atom 1.0)、feed.json (JSON Feed 1.1)
+
+- 只保留最近 FEED_MAX_ITEMS 条（有界环），每次保存补全结果/分数变化后增量更新
+- 每条新闻渲染后的片段按内容缓存，更新时只重新渲染变化的条目，再拼接出完整文档，
+  写临时文件后原子替换，读取方不会看到写了一半的文件；不从CSV重新生成
+- feed.json 同时是环的持久化状态：重启或其他进程（工作进程）写入后从它恢复
+- 可选的本地HTTP服务支持条件请求（ETag / Last-Modified，未变化时返回304）
+
+用法:
+  python feeds.py serve [--host 127.0.0.1] [--port 8090]   # 单独运行HTTP服务
+  python feeds.py seed [--date YYYY-MM-DD]                  # 用某天CSV中已补全的新闻初始化
+"""
+
+import os
+import json
+import fcntl
+import hashlib
+import logging
+import argparse
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.sax.saxutils import escape, quoteattr
+
+from memory_budget import BoundedCache
+
+FEED_FILES = {
+    'rss': 'feed.xml',
+    'atom': 'atom.xml',
+    'json': 'feed.json',
+}
+
+CONTENT_TYPES = {
+    'feed.xml': 'application/rss+xml; charset=utf-8',
+    'atom.xml': 'application/atom+xml; charset=utf-8',
+    'feed.json': 'application/feed+json; charset=utf-8',
+}
+
+HN_HOME = 'https://news.ycombinator.com/'
+
+
+def _to_datetime(value):
+    """CSV中的本地时间字符串 -> 带时区的datetime"""
+    try:
+        moment = datetime.fromisoformat(str(value)) if value else datetime.now()
+    except ValueError:
+        moment = datetime.now()
+    return moment.astimezone()
+
+
+def make_entry(news):
+    """NewsItem -> 订阅源条目（只含输出需要的字段）"""
+    return {
+        'id': news.id,
+        'title': news.title,
+        'title_cn': news.title_cn,
+        'url': news.url,
+        'hn_url': news.hn_url,
+        'score': int(news.score or 0),
+        'comments': int(news.comments or 0),
+        'summary': news.content_summary,
+        'summary_cn': news.content_summary_cn,
+        'published': _to_datetime(news.crawl_time).isoformat(timespec='seconds'),
+    }
+
+
+def _display_title(entry):
+    return entry['title_cn'] or entry['title']
+
+
+def _content_text(entry):
+    lines = []
+    if entry['summary_cn']:
+        lines.append(entry['summary_cn'])
+    if entry['title_cn'] and entry['title_cn'] != entry['title']:
+        lines.append(f"原文: {entry['title']}")
+    lines.append(f"👍 {entry['score']} | 💬 {entry['comments']} | {entry['hn_url']}")
+    return '\n'.join(lines)
+
+
+def _content_html(entry):
+    return '<br/>'.join(escape(line) for line in _content_text(entry).split('\n'))
+
+
+def render_rss_item(entry):
+    return (
+        '<item>'
+        f"<title>{escape(_display_title(entry))}</title>"
+        f"<link>{escape(entry['url'] or entry['hn_url'])}</link>"
+        f"<guid isPermaLink=\"false\">hn-{entry['id']}</guid>"
+        f"<pubDate>{format_datetime(datetime.fromisoformat(entry['published']))}</pubDate>"
+        f"<comments>{escape(entry['hn_url'])}</comments>"
+        f"<description>{escape(_content_html(entry))}</description>"
+        '</item>'
+    )
+
+
+def render_atom_entry(entry):
+    updated = entry.get('updated') or entry['published']
+    return (
+        '<entry>'
+        f"<id>{escape(entry['hn_url'] or 'urn:hn:%d' % entry['id'])}</id>"
+        f"<title>{escape(_display_title(entry))}</title>"
+        f"<link href={quoteattr(entry['url'] or entry['hn_url'])}/>"
+        f"<link rel=\"replies\" type=\"text/html\" href={quoteattr(entry['hn_url'])}/>"
+        f"<published>{entry['published']}</published>"
+        f"<updated>{updated}</updated>"
+        f"<content type=\"html\">{escape(_content_html(entry))}</content>"
+        '</entry>'
+    )
+
+
+def render_json_item(entry):
+    item = {
+        'id': str(entry['id']),
+        'url': entry['url'] or entry['hn_url'],
+        'title': _display_title(entry),
+        'content_text': _content_text(entry),
+        'summary': entry['summary_cn'] or entry['summary'],
+        'date_published': entry['published'],
+        'date_modified': entry.get('updated') or entry['published'],
+        # 扩展字段：完整保存条目，供从 feed.json 恢复
+        '_hn': entry,
+    }
+    return json.dumps(item, ensure_ascii=False)
+
+
+RENDERERS = {
+    'rss': render_rss_item,
+    'atom': render_atom_entry,
+    'json': render_json_item,
+}
+
+
+class FeedWriter:
+    """最近新闻的有界环 + 增量渲染、原子替换的订阅源文件（多进程安全）"""
+
+    def __init__(self, directory, title='Hacker News 精选', home_url=HN_HOME, base_url='', max_items=50):
+        """base_url 为订阅源对外的地址前缀（用于自引用链接），如 http://localhost:8090/"""
+        self.directory = directory
+        self.title = title
+        self.home_url = home_url
+        self.base_url = base_url.rstrip('/') + '/' if base_url else ''
+        self.max_items = max_items
+        os.makedirs(directory, exist_ok=True)
+        # 环：新闻id -> 条目，按发布时间从旧到新
+        self.entries = OrderedDict()
+        # (格式, 新闻id) -> (条目内容, 渲染后的片段)
+        self.fragments = BoundedCache('feed_fragments', max_entries=max_items * len(RENDERERS) * 2)
+        self.stats = {'updates': 0, 'rendered': 0, 'reused': 0, 'reloads': 0}
+        self._state_file = os.path.join(directory, FEED_FILES['json'])
+        self._lock_file = os.path.join(directory, '.feeds.lock')
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, data_dir):
+        port = int(os.getenv('FEED_SERVER_PORT', 8090))
+        return cls(
+            os.getenv('FEED_DIR', os.path.join(data_dir, 'feeds')),
+            title=os.getenv('FEED_TITLE', 'Hacker News 精选'),
+            base_url=os.getenv('FEED_BASE_URL', f"http://localhost:{port}/"),
+            max_items=int(os.getenv('FEED_MAX_ITEMS', 50))
+        )
+
+    def _locked(self):
+        lockfd = open(self._lock_file, 'w')
+        fcntl.flock(lockfd.fileno(), fcntl.LOCK_EX)
+        return lockfd
+
+    def _sync(self):
+        """feed.json 被其他进程更新过（或首次使用）时从它重建环"""
+        try:
+            mtime = os.stat(self._state_file).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            with open(self._state_file, encoding='utf-8') as f:
+                items = json.load(f).get('items', [])
+        except (OSError, ValueError) as e:
+            logging.warning(f"⚠️ 读取订阅源状态失败，重新开始: {e}")
+            items = []
+        self.entries = OrderedDict(
+            (item['_hn']['id'], item['_hn']) for item in reversed(items) if '_hn' in item
+        )
+        self._mtime = mtime
+        self.stats['reloads'] += 1
+
+    def update(self, news_list):
+        """加入或更新若干条新闻并重写订阅源，返回是否有变化"""
+        return self._apply(lambda: [self._upsert(make_entry(news)) for news in news_list])
+
+    def update_stats(self, stats):
+        """只更新环中已有条目的分数/评论数 {新闻id: (分数, 评论数)}"""
+        def apply():
+            changed = []
+            for news_id, (score, comments) in stats.items():
+                entry = self.entries.get(news_id)
+                if entry and (entry['score'], entry['comments']) != (int(score), int(comments)):
+                    changed.append(self._upsert(dict(entry, score=int(score), comments=int(comments))))
+            return changed
+        return self._apply(apply)
+
+    def _apply(self, mutate):
+        with self._lock:
+            lockfd = self._locked()
+            try:
+                self._sync()
+                if not any(mutate()):
+                    return False
+                self._write()
+                self._mtime = os.stat(self._state_file).st_mtime_ns
+                self.stats['updates'] += 1
+                return True
+            finally:
+                lockfd.close()
+
+    def _upsert(self, entry):
+        """写入环，返回条目是否有变化"""
+        old = self.entries.get(entry['id'])
+        if old is not None:
+            entry['published'] = old['published']
+            if all(old.get(key) == value for key, value in entry.items()):
+                return False
+            entry['updated'] = datetime.now().astimezone().isoformat(timespec='seconds')
+            self.entries[entry['id']] = entry
+            return True
+        self.entries[entry['id']] = entry
+        # 环按发布时间排序，回填的旧新闻插到对应位置；超出上限时淘汰最旧的
+        if len(self.entries) > 1 and entry['published'] < next(reversed(self.entries.values()))['published']:
+            self.entries = OrderedDict(sorted(self.entries.items(), key=lambda item: item[1]['published']))
+        while len(self.entries) > self.max_items:
+            self.entries.popitem(last=False)
+        return entry['id'] in self.entries
+
+    def _fragment(self, kind, entry):
+        key = (kind, entry['id'])
+        cached = self.fragments.get(key)
+        if cached is not None and cached[0] == entry:
+            self.stats['reused'] += 1
+            return cached[1]
+        fragment = RENDERERS[kind](entry)
+        self.fragments.set(key, (entry, fragment))
+        self.stats['rendered'] += 1
+        return fragment
+
+    def _write(self):
+        """拼接三种文档并原子替换"""
+        newest_first = list(reversed(self.entries.values()))
+        now = datetime.now(timezone.utc)
+        fragments = {kind: ''.join(self._fragment(kind, entry) for entry in newest_first)
+                     for kind in ('rss', 'atom')}
+
+        rss = (
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            '<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom"><channel>'
+            f"<title>{escape(self.title)}</title>"
+            f"<link>{escape(self.home_url)}</link>"
+            f"<description>{escape(self.title)}</description>"
+            + (f"<atom:link href={quoteattr(self.base_url + FEED_FILES['rss'])} rel=\"self\" "
+               f"type=\"application/rss+xml\"/>" if self.base_url else '')
+            + f"<lastBuildDate>{format_datetime(now)}</lastBuildDate>"
+            f"{fragments['rss']}</channel></rss>\n"
+        )
+        atom = (
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            '<feed xmlns="http://www.w3.org/2005/Atom">'
+            f"<id>{escape(self.base_url + FEED_FILES['atom'] if self.base_url else self.home_url)}</id>"
+            f"<title>{escape(self.title)}</title>"
+            f"<updated>{now.isoformat(timespec='seconds')}</updated>"
+            f"<link href={quoteattr(self.home_url)}/>"
+            + (f"<link rel=\"self\" href={quoteattr(self.base_url + FEED_FILES['atom'])}/>" if self.base_url else '')
+            + f"<author><name>{escape(self.title)}</name></author>"
+            f"{fragments['atom']}</feed>\n"
+        )
+        header = {
+            'version': 'https://jsonfeed.org/version/1.1',
+            'title': self.title,
+            'home_page_url': self.home_url,
+        }
+        if self.base_url:
+            header['feed_url'] = self.base_url + FEED_FILES['json']
+        items = ','.join(self._fragment('json', entry) for entry in newest_first)
+        feed_json = json.dumps(header, ensure_ascii=False)[:-1] + f', "items": [{items}]}}\n'
+
+        # feed.json 是状态文件，最后替换：其他进程据它的修改时间判断是否需要重新加载
+        self._replace(FEED_FILES['rss'], rss)
+        self._replace(FEED_FILES['atom'], atom)
+        self._replace(FEED_FILES['json'], feed_json)
+
+    def _replace(self, name, text):
+        path = os.path.join(self.directory, name)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def snapshot(self):
+        return dict(self.stats, items=len(self.entries), fragments=len(self.fragments))
+
+
+class _FeedHandler(BaseHTTPRequestHandler):
+    server_version = 'HNFeeds/1.0'
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def _serve(self, send_body):
+        name = self.path.split('?', 1)[0].lstrip('/') or FEED_FILES['rss']
+        if name not in CONTENT_TYPES:
+            self.send_error(404)
+            return
+        document = self.server.feeds.load(name)
+        if document is None:
+            self.send_error(404, '订阅源尚未生成')
+            return
+        body, etag, modified, last_modified = document
+
+        if self._not_modified(etag, modified):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', last_modified)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPES[name])
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', last_modified)
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def _not_modified(self, etag, modified):
+        """If-None-Match 优先；没有时才比较 If-Modified-Since（精确到秒）"""
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match:
+            tags = [tag.strip() for tag in if_none_match.split(',')]
+            # 弱比较：忽略 W/ 前缀
+            return '*' in tags or etag in (tag[2:] if tag.startswith('W/') else tag for tag in tags)
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                return int(modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def log_message(self, format, *args):
+        logging.debug(f"订阅源请求 {self.address_string()} {format % args}")
+
+
+class FeedFiles:
+    """订阅源文件的读取缓存：文件未变化（修改时间和大小相同）时复用内容和ETag"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def load(self, name):
+        """返回 (内容, ETag, 修改时间戳, Last-Modified)，文件不存在时返回None"""
+        path = os.path.join(self.directory, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._cache.get(name)
+            if cached and cached[0] == key:
+                return cached[1]
+        with open(path, 'rb') as f:
+            body = f.read()
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()[:20]
+        last_modified = format_datetime(datetime.fromtimestamp(int(stat.st_mtime), timezone.utc), usegmt=True)
+        document = (body, etag, stat.st_mtime, last_modified)
+        with self._lock:
+            self._cache[name] = (key, document)
+        return document
+
+
+class FeedServer:
+    """在后台线程中运行的订阅源HTTP服务"""
+
+    def __init__(self, directory, host='127.0.0.1', port=8090):
+        self.directory = directory
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    @classmethod
+    def from_env(cls, directory):
+        return cls(
+            directory,
+            host=os.getenv('FEED_SERVER_HOST', '127.0.0.1'),
+            port=int(os.getenv('FEED_SERVER_PORT', 8090))
+        )
+
+    def start(self):
+        self._server = ThreadingHTTPServer((self.host, self.port), _FeedHandler)
+        self._server.daemon_threads = True
+        self._server.feeds = FeedFiles(self.directory)
+        self._thread = threading.Thread(target=self._server.serve_forever, name='feed-server', daemon=True)
+        self._thread.start()
+        logging.info(f"📡 订阅源服务已启动: http://{self.host}:{self.port}/feed.xml")
+
+    def close(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+def seed(writer, csv_file):
+    """用CSV中已补全的新闻初始化订阅源（一次性，之后由爬虫增量更新）"""
+    import pandas as pd
+    from news_item import NewsItem
+
+    df = pd.read_csv(csv_file, encoding='utf-8')
+    items = [news for news in NewsItem.from_frame(df) if news.enriched]
+    items.sort(key=lambda news: str(news.crawl_time))
+    writer.update(items[-writer.max_items:])
+    return min(len(items), writer.max_items)
+
+
+def main():
+    from dotenv import load_dotenv
+
+    load_dotenv('config.env')
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    data_dir = os.getenv('DATA_DIR', 'data')
+    feed_dir = os.getenv('FEED_DIR', os.path.join(data_dir, 'feeds'))
+
+    parser = argparse.ArgumentParser(description='Hacker News 订阅源输出')
+    sub = parser.add_subparsers(dest='command', required=True)
+    serve_parser = sub.add_parser('serve', help='运行订阅源HTTP服务')
+    serve_parser.add_argument('--host', default=os.getenv('FEED_SERVER_HOST', '127.0.0.1'))
+    serve_parser.add_argument('--port', type=int, default=int(os.getenv('FEED_SERVER_PORT', 8090)))
+    seed_parser = sub.add_parser('seed', help='用某天CSV中已补全的新闻初始化订阅源')
+    seed_parser.add_argument('--date', default=datetime.now().strftime('%Y-%m-%d'))
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        server = FeedServer(feed_dir, args.host, args.port)
+        server.start()
+        try:
+            server._thread.join()
+        except KeyboardInterrupt:
+            server.close()
+    elif args.command == 'seed':
+        csv_file = os.path.join(data_dir, f'hn_news_{args.date}.csv')
+        if not os.path.exists(csv_file):
+            print(f"❌ 文件不存在: {csv_file}")
+            return
+        count = seed(FeedWriter.from_env(data_dir), csv_file)
+        print(f"✅ 订阅源已写入 {count} 条: {feed_dir}")
+
+
+if __name__ == "__main__":
+    main()
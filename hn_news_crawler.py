@@ -19,6 +19,7 @@ Hacker News 爬虫 - 完整版本
 import os
 import sys
 import json
+import html
 import time
 import asyncio
 import logging
@@ -27,18 +28,46 @@ import threading
 import subprocess
 import urllib.parse
 import csv
+import fcntl
 import pandas as pd
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from urllib.parse import urljoin
 
 import requests
+from requests.adapters import HTTPAdapter
+from http.cookiejar import DefaultCookiePolicy
 from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 from telegram import Bot
 import httpx
 
+from memory_budget import BoundedCache
+from search_index import SearchIndex
+from dedup import NearDuplicateIndex
+import summarizer
+import extractors
+from comments import CommentFetcher, discussion_highlights
+from hn_updates import UpdatesRefresher
+from raw_archive import RawArchive
+from proxy_pool import ProxyPool, StaticProxies
+from politeness import PolitenessScheduler, HostBusy
+from feeds import FeedWriter
+import fault_injection
+import tracing
+import log_setup
+import live_config
+import state_snapshot
+from news_item import NewsItem, CSV_FIELDS
+
 class HackerNewsCrawler:
-    def __init__(self):
+    def __init__(self, snapshot=None, offline=False):
+        """snapshot: 热重启快照（state_snapshot.Snapshot），用于恢复缓存和索引，跳过启动时的重建
+
+        offline: 离线工具（归档回放、历史回填）使用，只构造解析、提取、摘要和CSV写入所需的部分：
+        不要求Telegram配置，不创建/清理当日CSV，不启动代理池、礼貌调度、近似去重、追踪、订阅源和评论
+        """
+        self.offline = offline
         # 加载环境变量
         load_dotenv('config.env')
         
@@ -46,6 +75,8 @@ class HackerNewsCrawler:
         self.base_url = os.getenv('BASE_URL', 'https://news.ycombinator.com')
         self.max_news_count = int(os.getenv('MAX_NEWS_COUNT', 100))
         self.min_score = int(os.getenv('MIN_SCORE', 0))
+        # 当前生效的检查间隔（分钟），守护进程启用自适应间隔时会动态更新
+        self.check_interval_minutes = float(os.getenv('CHECK_INTERVAL_MINUTES', 5))
         
         # 网络配置
         self.request_timeout = int(os.getenv('REQUEST_TIMEOUT', 15))
@@ -64,39 +95,53 @@ class HackerNewsCrawler:
         # 功能开关
         self.enable_translation = os.getenv('ENABLE_TRANSLATION', 'true').lower() == 'true'
         self.enable_content_summary = os.getenv('ENABLE_CONTENT_SUMMARY', 'true').lower() == 'true'
+        self.enable_site_extractors = os.getenv('ENABLE_SITE_EXTRACTORS', 'true').lower() == 'true'
         
         # 性能配置
         self.max_translation_length = int(os.getenv('MAX_TRANSLATION_LENGTH', 400))
         self.max_summary_length = int(os.getenv('MAX_SUMMARY_LENGTH', 200))
         self.max_title_length = int(os.getenv('MAX_TITLE_LENGTH', 200))
+        self.max_content_lines = int(os.getenv('MAX_CONTENT_LINES', 40))
+        
+        # 摘要算法: textrank（抽取式，默认）或 lead（取前两句）
+        self.summary_algorithm = os.getenv('SUMMARY_ALGORITHM', 'textrank').lower()
+        self.summary_sentences = int(os.getenv('SUMMARY_SENTENCES', 2))
         
         # Telegram配置
         self.bot_token = os.getenv('TELEGRAM_BOT_TOKEN')
         self.chat_id = os.getenv('TELEGRAM_CHAT_ID')
         
-        if not self.bot_token or not self.chat_id:
+        if not offline and (not self.bot_token or not self.chat_id):
             raise ValueError("请配置TELEGRAM_BOT_TOKEN和TELEGRAM_CHAT_ID")
         
         # 配置代理 - 支持开关控制
-        self.proxies = {}
-        enable_proxy = os.getenv('ENABLE_PROXY', 'false').lower() == 'true'
+        # 代理池：按线路（hn/article/translate/telegram）选择当前最快的健康代理，
+        # 未配置 PROXY_POOL 时所有请求使用固定代理
+        self.proxies, self.proxy_pool = self.build_proxies()
+        if offline:
+            # 离线工具不需要后台健康探测，固定使用配置的代理
+            self.proxy_pool = StaticProxies(self.proxies)
         
-        if enable_proxy:
-            proxy_http = os.getenv('PROXY_HTTP') or os.getenv('http_proxy')
-            proxy_https = os.getenv('PROXY_HTTPS') or os.getenv('https_proxy')
-            
-            if proxy_http:
-                self.proxies['http'] = proxy_http
-                self.proxies['https'] = proxy_https or proxy_http
-                logging.info(f"✅ 代理已启用: {proxy_http}")
-            else:
-                logging.warning("⚠️ 代理开关已开启但未配置代理地址，使用直连模式")
-        else:
-            logging.info("🌐 代理开关已关闭，使用直连模式")
+        # HTTP会话：礼貌调度、增量刷新、评论抓取的线程池和发送路径共享同一个会话，
+        # 连接池按最大并发线程数设置；测试环境配置了 FAULT_INJECTION 时挂载故障注入传输层
+        self.http_pool_size = max(
+            10,
+            int(os.getenv('FETCH_WORKERS', 8)),
+            int(os.getenv('UPDATES_WORKERS', 8)),
+            int(os.getenv('COMMENTS_WORKERS', 8))
+        )
+        self.session = self.build_session()
+        self.fault_injector = fault_injection.install(self.session, pool_maxsize=self.http_pool_size)
+        
+        # Telegram Bot 按需创建，内存紧张时可释放
+        self._bot = None
         
-        # 初始化Telegram Bot
-        self.bot = Bot(token=self.bot_token)
-        logging.info("🤖 Telegram Bot 初始化成功")
+        # 翻译缓存：相同文本（如重复出现的摘要）不再重复请求翻译服务
+        self.translation_cache = BoundedCache(
+            'translation',
+            max_entries=int(os.getenv('TRANSLATION_CACHE_SIZE', 2000)),
+            max_bytes=int(float(os.getenv('TRANSLATION_CACHE_MB', 8)) * 1024 * 1024)
+        )
         
         # HTTP请求头
         self.headers = {
@@ -108,55 +153,231 @@ class HackerNewsCrawler:
         if not os.path.exists(self.data_dir):
             os.makedirs(self.data_dir)
         
+        # 全文检索索引，随CSV保存增量更新
+        self.search_index = None
+        if os.getenv('ENABLE_SEARCH_INDEX', 'true').lower() == 'true':
+            try:
+                self.search_index = SearchIndex(
+                    os.getenv('SEARCH_INDEX_DB', os.path.join(self.data_dir, 'search_index.db'))
+                )
+            except Exception as e:
+                logging.warning(f"⚠️ 全文检索索引不可用: {e}")
+        
         # 今日CSV文件
         today = datetime.now().strftime('%Y-%m-%d')
         self.csv_file = os.path.join(self.data_dir, f'hn_news_{today}.csv')
         
         # CSV列名 - 从配置文件读取
-        csv_columns_str = os.getenv('CSV_COLUMNS', 'id,title,title_cn,url,hn_url,score,comments,content_summary,content_summary_cn,crawl_time,sent_time,is_sent')
+        csv_columns_str = os.getenv('CSV_COLUMNS', ','.join(CSV_FIELDS))
         self.csv_columns = [col.strip() for col in csv_columns_str.split(',')]
         
-        # 初始化CSV文件
-        self.init_csv_file()
+        # 初始化CSV文件；快照之后CSV没有被修改过时，启动时不必再整表去重
+        if not offline:
+            self.init_csv_file(clean=not (snapshot and snapshot.csv_unchanged(self.csv_file)))
+        
+        # 近似重复检测（URL规范化 + MinHash/LSH），在抓取和翻译之前合并重复提交
+        self.dedup_index = None
+        if not offline and os.getenv('ENABLE_NEAR_DEDUP', 'true').lower() == 'true':
+            self.dedup_index = NearDuplicateIndex(
+                max_entries=int(os.getenv('DEDUP_MAX_ENTRIES', 5000)),
+                title_threshold=float(os.getenv('DEDUP_TITLE_THRESHOLD', 0.7)),
+                content_threshold=float(os.getenv('DEDUP_CONTENT_THRESHOLD', 0.5))
+            )
+            if snapshot:
+                self.restore_dedup_index(snapshot)
+            self.seed_dedup_index()
+        
+        # 单条新闻的端到端延迟追踪（发现 -> 抓取 -> 解析 -> 翻译 -> 保存 -> 推送）
+        self.tracer = None
+        if not offline and os.getenv('ENABLE_TRACING', 'true').lower() == 'true':
+            self.tracer = tracing.TraceLog(
+                os.getenv('TRACE_LOG', os.path.join(self.data_dir, 'traces.jsonl')),
+                retention_days=int(os.getenv('TRACE_RETENTION_DAYS', 7))
+            )
+        
+        # 通过HN updates接口增量刷新已入库新闻（包括已跌出首页的）的分数/评论数
+        self.updates_refresher = None
+        if not offline and os.getenv('ENABLE_UPDATES_REFRESH', 'true').lower() == 'true':
+            self.updates_refresher = UpdatesRefresher(
+                self.fetch_url,
+                max_workers=int(os.getenv('UPDATES_WORKERS', 8))
+            )
+        # 跟踪最近几天的CSV：前一天的热门新闻过了午夜仍在变化
+        self.updates_track_days = max(1, int(os.getenv('UPDATES_TRACK_DAYS', 2)))
+        
+        # 正文抓取的按域名礼貌调度：每个域名限制并发和请求间隔，遵守 robots.txt
+        self.politeness = None
+        if not offline and os.getenv('ENABLE_POLITE_FETCH', 'true').lower() == 'true':
+            self.politeness = PolitenessScheduler(
+                # robots.txt 的超时不超过正文请求超时，无响应的域名不会拖得更久
+                lambda url, timeout: self.fetch_url(url, timeout=min(timeout, self.request_timeout), route='article'),
+                max_workers=int(os.getenv('FETCH_WORKERS', 8)),
+                per_host_concurrency=int(os.getenv('PER_HOST_CONCURRENCY', 1)),
+                per_host_delay=float(os.getenv('PER_HOST_DELAY', 1.0)),
+                max_crawl_delay=float(os.getenv('MAX_CRAWL_DELAY', 30)),
+                respect_robots=os.getenv('RESPECT_ROBOTS_TXT', 'true').lower() == 'true',
+                user_agent=os.getenv('ROBOTS_USER_AGENT', '*'),
+                robots_ttl=float(os.getenv('ROBOTS_CACHE_TTL', 86400)),
+                max_wait=float(os.getenv('PER_HOST_MAX_WAIT', 60))
+            )
+        
+        # 原始响应归档（首页、正文、翻译），供改进解析/摘要后离线回放
+        self.raw_archive = None
+        if not offline and os.getenv('ENABLE_RAW_ARCHIVE', 'false').lower() == 'true':
+            self.raw_archive = RawArchive(
+                os.getenv('RAW_ARCHIVE_DIR', os.path.join(self.data_dir, 'raw')),
+                segment_max_bytes=int(float(os.getenv('RAW_ARCHIVE_SEGMENT_MB', 64)) * 1024 * 1024),
+                level=int(os.getenv('RAW_ARCHIVE_LEVEL', 3)),
+                retention_days=int(os.getenv('RAW_ARCHIVE_RETENTION_DAYS', 14))
+            )
+        # 回放模式下由 raw_archive.replay 设置，所有请求改为读取归档
+        self.replay = None
+        
+        # RSS/Atom/JSON Feed 订阅源：保存补全结果和分数变化后增量更新
+        self.feed_writer = None
+        if not offline and os.getenv('ENABLE_FEEDS', 'false').lower() == 'true':
+            self.feed_writer = FeedWriter.from_env(self.data_dir)
+        
+        # 热门新闻的评论抓取（讨论要点），在推送之后进行，受每轮时间预算限制
+        self.enable_comments = not offline and os.getenv('ENABLE_COMMENTS', 'false').lower() == 'true'
+        self.comments_min_count = int(os.getenv('COMMENTS_MIN_COUNT', 50))
+        self.comments_time_budget = float(os.getenv('COMMENTS_TIME_BUDGET', 15))
+        self.comments_highlights = int(os.getenv('COMMENTS_HIGHLIGHTS', 3))
+        self.comment_fetcher = CommentFetcher(
+            self.fetch_url,
+            max_workers=int(os.getenv('COMMENTS_WORKERS', 8)),
+            top_k=int(os.getenv('COMMENTS_TOP_K', 5)),
+            max_depth=int(os.getenv('COMMENTS_MAX_DEPTH', 3)),
+            max_children=int(os.getenv('COMMENTS_MAX_CHILDREN', 5))
+        )
+        self.comments_file = os.path.join(self.data_dir, f'hn_comments_{today}.jsonl')
+        self.discussions = BoundedCache('discussions', max_entries=int(os.getenv('COMMENTS_CACHE_SIZE', 2000)))
+        if self.enable_comments:
+            self.load_discussions()
         
         # 配置日志
         self.setup_logging()
         
+        # 从快照恢复翻译缓存、按域名限速状态和代理池状态
+        if snapshot:
+            self.restore_state(snapshot)
+        
+        # 代理池的后台健康探测
+        self.proxy_pool.start()
+        
         logging.info(f"CSV文件: {self.csv_file}")
     
+    def build_proxies(self):
+        """按当前环境变量构造固定代理和代理池，返回 (proxies, proxy_pool)"""
+        proxies = {}
+        enable_proxy = os.getenv('ENABLE_PROXY', 'false').lower() == 'true'
+        
+        if enable_proxy:
+            proxy_http = os.getenv('PROXY_HTTP') or os.getenv('http_proxy')
+            proxy_https = os.getenv('PROXY_HTTPS') or os.getenv('https_proxy')
+            
+            if proxy_http:
+                proxies['http'] = proxy_http
+                proxies['https'] = proxy_https or proxy_http
+                logging.info(f"✅ 代理已启用: {proxy_http}")
+            else:
+                logging.warning("⚠️ 代理开关已开启但未配置代理地址，使用直连模式")
+        else:
+            logging.info("🌐 代理开关已关闭，使用直连模式")
+        
+        return proxies, ProxyPool.from_env(proxies) if enable_proxy else StaticProxies()
+    
+    def apply_config(self, config, changed):
+        """把热加载的新配置（live_config.Config）应用到运行中的实例，在两轮任务之间调用
+
+        需要替换的组件先构造好，再与其他属性一起替换
+        """
+        proxy_pool = None
+        if live_config.proxy_changed(changed):
+            proxies, proxy_pool = self.build_proxies()
+        
+        for key, attr in live_config.CRAWLER_ATTRIBUTES.items():
+            if key in changed:
+                setattr(self, attr, config[key])
+        if 'TELEGRAM_BOT_TOKEN' in changed:
+            self._bot = None
+        if 'USER_AGENT' in changed and config['USER_AGENT']:
+            self.headers['User-Agent'] = config['USER_AGENT']
+        if self.politeness:
+            for key, attr in live_config.POLITENESS_ATTRIBUTES.items():
+                if key in changed:
+                    setattr(self.politeness, attr, config[key])
+        if proxy_pool is not None:
+            old_pool, self.proxies, self.proxy_pool = self.proxy_pool, proxies, proxy_pool
+            proxy_pool.start()
+            old_pool.stop()
+    
+    def build_session(self):
+        """多线程共享的HTTP会话
+
+        Session 中多线程下会被修改的只有 cookie jar，这里用拒绝所有cookie的策略禁用它
+        （HN、翻译和Telegram接口都不需要cookie）；连接池（urllib3）本身是线程安全的，
+        大小不小于并发线程数，连接在各线程和各轮之间复用
+        """
+        session = requests.Session()
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(pool_connections=self.http_pool_size, pool_maxsize=self.http_pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+    
+    @property
+    def bot(self):
+        """Telegram Bot，首次使用时创建"""
+        if self._bot is None:
+            self._bot = Bot(token=self.bot_token)
+            logging.info("🤖 Telegram Bot 初始化成功")
+        return self._bot
+    
+    def release_resources(self):
+        """释放可按需重建的资源（内存超预算时调用）"""
+        self._bot = None
+        if self.politeness:
+            self.politeness.prune()
+    
     def setup_logging(self):
-        """配置日志系统"""
-        log_level = getattr(logging, os.getenv('LOG_LEVEL', 'INFO').upper())
-        log_file = os.getenv('LOG_FILE', 'hn_crawler.log')
-        log_format = os.getenv('LOG_FORMAT', '%(asctime)s - %(levelname)s - %(message)s')
-        
-        # 清除现有的处理器
-        for handler in logging.root.handlers[:]:
-            logging.root.removeHandler(handler)
-        
-        # 重新配置日志
-        logging.basicConfig(
-            level=log_level,
-            format=log_format,
-            handlers=[
-                logging.FileHandler(log_file, encoding='utf-8'),
-                logging.StreamHandler()
-            ]
-        )
+        """配置日志系统（异步写入、轮转，见 log_setup）；进程内已配置时保持不变"""
+        log_setup.configure()
     
-    def init_csv_file(self):
+    def init_csv_file(self, clean=True):
         """初始化CSV文件"""
         if not os.path.exists(self.csv_file):
             with open(self.csv_file, 'w', newline='', encoding='utf-8') as f:
                 writer = csv.DictWriter(f, fieldnames=self.csv_columns)
                 writer.writeheader()
             logging.info(f"创建新的CSV文件: {self.csv_file}")
-        else:
+        elif clean:
             # 清理重复数据
             self.clean_duplicate_data()
     
+    @contextmanager
+    def csv_lock(self, csv_file=None):
+        """CSV文件的进程间互斥锁，协调器和工作进程共享同一份CSV"""
+        with open(f"{csv_file or self.csv_file}.lock", 'w') as lockfd:
+            fcntl.flock(lockfd.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lockfd.fileno(), fcntl.LOCK_UN)
+    
+    def write_news_data(self, df, csv_file=None):
+        """原子写入CSV，避免其他进程读到写了一半的文件"""
+        csv_file = csv_file or self.csv_file
+        tmp_file = f"{csv_file}.{os.getpid()}.tmp"
+        df.to_csv(tmp_file, index=False, encoding='utf-8')
+        os.replace(tmp_file, csv_file)
+    
     def clean_duplicate_data(self):
         """清理CSV中的重复数据，保留最新的记录"""
+        with self.csv_lock():
+            self._clean_duplicate_data()
+    
+    def _clean_duplicate_data(self):
         try:
             df = self.load_news_data()
             
@@ -173,7 +394,7 @@ class HackerNewsCrawler:
             
             if len(df_cleaned) < original_count:
                 # 保存清理后的数据
-                df_cleaned.to_csv(self.csv_file, index=False, encoding='utf-8')
+                self.write_news_data(df_cleaned)
                 removed_count = original_count - len(df_cleaned)
                 logging.info(f"清理重复数据: 移除 {removed_count} 条重复记录，保留 {len(df_cleaned)} 条")
             else:
@@ -182,12 +403,15 @@ class HackerNewsCrawler:
         except Exception as e:
             logging.error(f"清理重复数据失败: {e}")
     
-    def load_news_data(self):
-        """加载今日新闻数据"""
+    def load_news_data(self, csv_file=None):
+        """加载今日（或指定CSV文件的）新闻数据"""
+        csv_file = csv_file or self.csv_file
         try:
-            if os.path.exists(self.csv_file):
-                df = pd.read_csv(self.csv_file)
-                return df
+            if os.path.exists(csv_file):
+                df = pd.read_csv(csv_file)
+                # id 统一为整数，后续比较不再需要逐行转换为字符串
+                df['id'] = pd.to_numeric(df['id'], errors='coerce')
+                return df.dropna(subset=['id']).astype({'id': 'int64'})
             else:
                 return pd.DataFrame(columns=self.csv_columns)
         except Exception as e:
@@ -195,68 +419,287 @@ class HackerNewsCrawler:
             return pd.DataFrame(columns=self.csv_columns)
     
     def save_news_to_csv(self, news_item):
-        """保存新闻到CSV，严格去重"""
+        """保存新闻到CSV，严格去重（多进程安全）"""
+        with self.csv_lock():
+            return self._save_news_to_csv(news_item)
+    
+    def _save_news_to_csv(self, news_item):
         try:
             df = self.load_news_data()
             
-            # 修复数据类型问题：统一转换为字符串进行比较
-            news_id = str(news_item['id'])
-            existing = df[df['id'].astype(str) == news_id]
+            mask = df['id'] == news_item.id
             
-            if not existing.empty:
+            if mask.any():
                 # 如果记录已存在，只更新分数和评论数（这些可能会变化）
-                mask = df['id'].astype(str) == news_id
                 df.loc[mask, ['score', 'comments']] = [
-                    news_item['score'],
-                    news_item['comments']
+                    news_item.score,
+                    news_item.comments
                 ]
                 
                 # 保存到CSV
-                df.to_csv(self.csv_file, index=False, encoding='utf-8')
-                logging.debug(f"更新现有新闻分数/评论: {news_item['title']}")
+                self.write_news_data(df)
+                self.index_stats(news_item.id, news_item.score, news_item.comments)
+                logging.debug(f"更新现有新闻分数/评论: {news_item.title}")
                 return False  # 返回False表示不是新增记录
             else:
                 # 添加新记录
-                new_row = {
-                    'id': news_item['id'],  # 保持原始类型，CSV会自动转换
-                    'title': news_item['title'],
-                    'title_cn': news_item.get('title_cn', ''),
-                    'url': news_item['url'],
-                    'hn_url': news_item['hn_url'],
-                    'score': news_item['score'],
-                    'comments': news_item['comments'],
-                    'content_summary': news_item.get('content_summary', ''),
-                    'content_summary_cn': news_item.get('content_summary_cn', ''),
-                    'crawl_time': datetime.now().isoformat(),
-                    'sent_time': '',
-                    'is_sent': False
-                }
+                new_row = self.build_news_row(news_item)
                 df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
                 
                 # 保存到CSV
-                df.to_csv(self.csv_file, index=False, encoding='utf-8')
-                logging.info(f"保存新新闻: {news_item['title']}")
+                self.write_news_data(df)
+                self.index_news(new_row)
+                logging.info(f"保存新新闻: {news_item.title}", extra={'sample': 'saved'})
                 return True  # 返回True表示是新增记录
             
         except Exception as e:
             logging.error(f"保存新闻失败: {e}")
             return False
     
-    def mark_news_as_sent(self, news_id):
-        """标记新闻为已发送"""
+    def build_news_row(self, news_item):
+        """新记录的CSV行；未补全的昂贵字段（翻译、摘要）留空"""
+        news_item.crawl_time = datetime.now().isoformat()
+        news_item.sent_time = ''
+        news_item.is_sent = False
+        return news_item.to_row()
+    
+    def save_new_news_batch(self, news_list):
+        """批量保存新发现的新闻（只含廉价字段），整批只读写一次CSV，返回实际新增数量"""
+        if not news_list:
+            return 0
+        with self.csv_lock():
+            try:
+                df = self.load_news_data()
+                existing_ids = set(df['id'].tolist())
+                new_rows = []
+                for news in news_list:
+                    if news.id not in existing_ids:
+                        existing_ids.add(news.id)
+                        new_rows.append(self.build_news_row(news))
+                if not new_rows:
+                    return 0
+                df = pd.concat([df, pd.DataFrame(new_rows)], ignore_index=True)
+                self.write_news_data(df)
+            except Exception as e:
+                logging.error(f"批量保存新闻失败: {e}")
+                return 0
+        
+        for new_row in new_rows:
+            self.index_news(new_row)
+        return len(new_rows)
+    
+    def bulk_insert_news(self, news_list, csv_file):
+        """把已填好字段的新闻批量写入指定的每日CSV（历史回填），不经过逐条保存
+
+        已存在的id跳过；整批只读写一次CSV，检索索引在单个事务中更新，返回新增数量
+        """
+        if not news_list:
+            return 0
+        with self.csv_lock(csv_file):
+            df = self.load_news_data(csv_file)
+            existing_ids = set(df['id'].tolist())
+            new_rows = []
+            for news in news_list:
+                if news.id not in existing_ids:
+                    existing_ids.add(news.id)
+                    new_rows.append(news.to_row())
+            if not new_rows:
+                return 0
+            new_df = pd.DataFrame(new_rows, columns=self.csv_columns)
+            df = new_df if df.empty else pd.concat([df, new_df], ignore_index=True)
+            self.write_news_data(df, csv_file)
+        
+        if self.search_index:
+            try:
+                self.search_index.add_many(new_rows)
+            except Exception as e:
+                logging.warning(f"⚠️ 批量更新检索索引失败: {e}")
+        return len(new_rows)
+    
+    def save_enrichment(self, news):
+        """把按需补全的昂贵字段写回CSV（多进程安全），之后不再重复计算"""
+        fields = ('title_cn', 'content_summary', 'content_summary_cn')
+        with self.csv_lock():
+            try:
+                df = self.load_news_data()
+                mask = df['id'] == news.id
+                if not mask.any():
+                    return False
+                for field in fields:
+                    # 全部为空的列会被pandas读成float64，写入字符串前先转为object
+                    df[field] = df[field].astype(object)
+                    df.loc[mask, field] = getattr(news, field)
+                self.write_news_data(df)
+                row = df.loc[mask].iloc[0].to_dict()
+            except Exception as e:
+                logging.error(f"保存补全字段失败: {e}")
+                return False
+        self.index_news(row)
+        self.publish_feed([news])
+        return True
+    
+    def mark_duplicate(self, news):
+        """在CSV中记录补全时发现的正文重复（duplicate_of 列），并从检索索引中移除
+
+        保留这一行而不是删除：工作进程各自有近似重复索引，协调器看不到它们的判断，
+        行还在时首页发现阶段不会重新入库，推送阶段按 duplicate_of 跳过
+        """
+        with self.csv_lock():
+            try:
+                df = self.load_news_data()
+                mask = df['id'] == news.id
+                if mask.any():
+                    df['duplicate_of'] = df['duplicate_of'].astype(object) if 'duplicate_of' in df else None
+                    df.loc[mask, 'duplicate_of'] = int(news.duplicate_of)
+                    self.write_news_data(df)
+            except Exception as e:
+                logging.error(f"记录重复新闻失败: {e}")
+                return
+        if self.search_index:
+            try:
+                self.search_index.remove(news.id)
+            except Exception as e:
+                logging.warning(f"⚠️ 更新检索索引失败: {e}")
+    
+    def index_news(self, row):
+        """同步更新全文检索索引：新记录或补全后的记录写入倒排索引"""
+        if not self.search_index:
+            return
+        try:
+            self.search_index.add(row)
+        except Exception as e:
+            logging.warning(f"⚠️ 更新检索索引失败: {e}")
+    
+    def index_stats(self, news_id, score, comments):
+        """已有记录只更新检索索引中的分数/评论数"""
+        if not self.search_index:
+            return
+        try:
+            self.search_index.update_stats(news_id, score, comments)
+        except Exception as e:
+            logging.warning(f"⚠️ 更新检索索引失败: {e}")
+    
+    def publish_feed(self, news_list):
+        """把补全后的新闻写入订阅源"""
+        if not self.feed_writer:
+            return
+        try:
+            self.feed_writer.update(news_list)
+        except Exception as e:
+            logging.warning(f"⚠️ 更新订阅源失败: {e}")
+    
+    def update_news_stats(self, stats, csv_file=None):
+        """批量更新已入库新闻的分数/评论数，整批只读写一次CSV（多进程安全）
+
+        stats: {新闻id: (分数, 评论数)}，csv_file 默认为今日CSV，返回实际发生变化的记录数
+        """
+        changed_ids = self._update_stat_columns(stats, ('score', 'comments'), csv_file)
+        for news_id in changed_ids:
+            self.index_stats(news_id, *stats[news_id])
+        if changed_ids and self.feed_writer:
+            try:
+                self.feed_writer.update_stats({news_id: stats[news_id] for news_id in changed_ids})
+            except Exception as e:
+                logging.warning(f"⚠️ 更新订阅源失败: {e}")
+        return len(changed_ids)
+    
+    def record_shown_stats(self, stats):
+        """记录已发送消息当前显示的分数/评论数 {新闻id: (分数, 评论数)}"""
+        return len(self._update_stat_columns(stats, ('shown_score', 'shown_comments')))
+    
+    def _update_stat_columns(self, stats, columns, csv_file=None):
+        """把 {新闻id: (值1, 值2)} 批量写入两列，返回值有变化的新闻id列表"""
+        if not stats:
+            return []
+        with self.csv_lock(csv_file):
+            try:
+                df = self.load_news_data(csv_file)
+                if df.empty:
+                    return []
+                ids = df['id']
+                mask = ids.isin(stats.keys())
+                if not mask.any():
+                    return []
+                changed = pd.Series(False, index=df.index[mask])
+                for position, column in enumerate(columns):
+                    values = ids[mask].map(lambda news_id: stats[news_id][position])
+                    current = df.loc[mask, column] if column in df else pd.Series(None, index=changed.index)
+                    changed |= current != values
+                    df.loc[mask, column] = values
+                if not changed.any():
+                    return []
+                self.write_news_data(df, csv_file)
+                return ids[changed.index[changed]].tolist()
+            except Exception as e:
+                logging.error(f"批量更新 {'/'.join(columns)} 失败: {e}")
+                return []
+    
+    def tracked_csv_files(self):
+        """增量刷新跟踪的CSV：今日CSV及之前 UPDATES_TRACK_DAYS-1 天中存在的每日CSV"""
+        files = [self.csv_file]
+        for days_ago in range(self.updates_track_days):
+            day = (datetime.now() - timedelta(days=days_ago)).strftime('%Y-%m-%d')
+            csv_file = os.path.join(self.data_dir, f'hn_news_{day}.csv')
+            if csv_file not in files and os.path.exists(csv_file):
+                files.append(csv_file)
+        return files
+    
+    def refresh_tracked_news(self):
+        """通过 updates 接口刷新最近几天已入库新闻中发生变化的条目，返回更新的记录数"""
+        if not self.updates_refresher:
+            return 0
+        try:
+            tracked = {}
+            for csv_file in self.tracked_csv_files():
+                df = self.load_news_data(csv_file)
+                if not df.empty:
+                    tracked[csv_file] = set(df['id'].tolist())
+            tracked_count = sum(len(ids) for ids in tracked.values())
+            if not tracked_count:
+                return 0
+            # 一次 updates 请求覆盖所有跟踪的新闻，再按所在的CSV分别写回
+            updates = self.updates_refresher.refresh(set().union(*tracked.values()))
+            updated = 0
+            for csv_file, ids in tracked.items():
+                updated += self.update_news_stats(
+                    {news_id: stats for news_id, stats in updates.items() if news_id in ids}, csv_file
+                )
+            if updated:
+                logging.info(f"🔄 增量刷新: {tracked_count} 条已跟踪新闻中 {updated} 条分数/评论数有变化")
+            return updated
+        except Exception as e:
+            logging.warning(f"⚠️ 增量刷新失败: {e}")
+            return 0
+    
+    def mark_news_as_sent(self, news_id, message_id=None, position=None, score=None, comments=None):
+        """标记新闻为已发送（多进程安全）
+
+        同时记录消息的 message_id、在批次中的位置（如 3/12）以及消息中显示的分数/评论数，
+        供 MessageEditor 之后原地更新消息
+        """
+        with self.csv_lock():
+            return self._mark_news_as_sent(news_id, message_id, position, score, comments)
+    
+    def _mark_news_as_sent(self, news_id, message_id=None, position=None, score=None, comments=None):
         try:
             df = self.load_news_data()
             
-            # 修复数据类型问题：统一转换为字符串进行比较
-            news_id_str = str(news_id)
-            mask = (df['id'].astype(str) == news_id_str) & (df['is_sent'] == False)
+            mask = (df['id'] == int(news_id)) & (df['is_sent'] == False)
             
             if mask.any():
+                # 空列被pandas读成float64，写入字符串前先转为object
+                for column in ('sent_time', 'message_position'):
+                    df[column] = df[column].astype(object) if column in df else None
                 df.loc[mask, 'is_sent'] = True
                 df.loc[mask, 'sent_time'] = datetime.now().isoformat()
+                if message_id:
+                    df.loc[mask, 'message_id'] = int(message_id)
+                    df.loc[mask, 'message_position'] = position or ''
+                    df.loc[mask, 'shown_score'] = score
+                    df.loc[mask, 'shown_comments'] = comments
                 
                 # 保存到CSV
-                df.to_csv(self.csv_file, index=False, encoding='utf-8')
+                self.write_news_data(df)
                 logging.debug(f"标记为已发送: {news_id}")
                 return True
             else:
@@ -281,34 +724,29 @@ class HackerNewsCrawler:
             
             unsent = df[df['is_sent'] == False].copy()
             
+            # 补全时判定为正文重复的新闻不推送
+            if 'duplicate_of' in unsent:
+                unsent = unsent[unsent['duplicate_of'].isna()]
+            
+            # 分数未达到 MIN_SCORE 的新闻暂不推送，分数上涨后再补全和推送
+            scores = pd.to_numeric(unsent['score'], errors='coerce').fillna(0)
+            held_back = int((scores < self.min_score).sum())
+            unsent = unsent[scores >= self.min_score]
+            if held_back:
+                logging.info(f"{held_back} 条新闻分数低于 {self.min_score}，暂不推送")
+            
             if unsent.empty:
                 logging.info("没有符合条件的未发送新闻")
                 return []
             
             # 按爬取时间排序（最新的在前）
-            unsent['crawl_time'] = pd.to_datetime(unsent['crawl_time'])
-            unsent = unsent.sort_values('crawl_time', ascending=False)
+            unsent = unsent.sort_values('crawl_time', ascending=False, key=pd.to_datetime)
             
             # 发送所有未发送的新闻，不限制数量
             
             logging.info(f"找到 {len(unsent)} 条未发送新闻")
             
-            news_list = []
-            for _, row in unsent.iterrows():
-                news_list.append({
-                    'id': row['id'],
-                    'title': row['title'],
-                    'title_cn': row['title_cn'] if pd.notna(row['title_cn']) else row['title'],  # 如果没有翻译就用原标题
-                    'url': row['url'],
-                    'hn_url': row['hn_url'],
-                    'score': int(row['score']),
-                    'comments': int(row['comments']),
-                    'content_summary': row['content_summary'] if pd.notna(row['content_summary']) else '',
-                    'content_summary_cn': row['content_summary_cn'] if pd.notna(row['content_summary_cn']) else '暂无内容摘要',
-                    'crawl_time': row['crawl_time']
-                })
-            
-            return news_list
+            return NewsItem.from_frame(unsent)
             
         except Exception as e:
             logging.error(f"获取未发送新闻失败: {e}")
@@ -318,71 +756,10 @@ class HackerNewsCrawler:
         """获取HN首页所有新闻"""
         try:
             logging.info("🔍 开始获取HN首页新闻...")
-            response = requests.get(
-                self.base_url,
-                headers=self.headers,
-                proxies=self.proxies,
-                timeout=self.request_timeout
-            )
+            response = self.fetch_url(self.base_url, archive_kind='frontpage')
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            news_items = []
-            
-            rows = soup.find_all('tr', class_='athing')
-            
-            # 获取首页所有新闻，不限制数量
-            for i, row in enumerate(rows):
-                try:
-                    news_id = row.get('id')
-                    if not news_id:
-                        continue
-                    
-                    title_cell = row.find('span', class_='titleline')
-                    if not title_cell:
-                        continue
-                    
-                    title_link = title_cell.find('a')
-                    if not title_link:
-                        continue
-                    
-                    title = title_link.get_text().strip()
-                    url = title_link.get('href', '')
-                    
-                    if url.startswith('item?'):
-                        url = urljoin(self.base_url, url)
-                    
-                    # 获取分数和评论数
-                    next_row = row.find_next_sibling('tr')
-                    score = 0
-                    comments = 0
-                    
-                    if next_row:
-                        score_span = next_row.find('span', class_='score')
-                        if score_span:
-                            score_text = score_span.get_text()
-                            score = int(score_text.split()[0]) if score_text else 0
-                        
-                        comments_link = next_row.find('a', string=lambda text: text and 'comment' in text)
-                        if comments_link:
-                            comments_text = comments_link.get_text()
-                            comments = int(comments_text.split()[0]) if comments_text.split()[0].isdigit() else 0
-                    
-                    # 添加所有新闻，不过滤分数
-                    news_items.append({
-                        'id': news_id,
-                        'title': title,
-                        'url': url,
-                        'score': score,
-                        'comments': comments,
-                        'hn_url': f"{self.base_url}/item?id={news_id}",
-                        'rank': i + 1  # 保存原始排名
-                    })
-                    
-                except Exception as e:
-                    logging.error(f"解析新闻失败: {e}")
-                    continue
-            
+            news_items = self.parse_frontpage(response.content)
             logging.info(f"获取到 {len(news_items)} 条新闻")
             return news_items
             
@@ -390,61 +767,175 @@ class HackerNewsCrawler:
             logging.error(f"获取HN首页失败: {e}")
             return []
     
+    def parse_frontpage(self, content):
+        """解析HN首页HTML，返回 NewsItem 列表"""
+        soup = BeautifulSoup(content, 'html.parser')
+        news_items = []
+        
+        rows = soup.find_all('tr', class_='athing')
+        
+        # 获取首页所有新闻，不限制数量
+        for i, row in enumerate(rows):
+            try:
+                news_id = row.get('id')
+                if not news_id:
+                    continue
+                
+                title_cell = row.find('span', class_='titleline')
+                if not title_cell:
+                    continue
+                
+                title_link = title_cell.find('a')
+                if not title_link:
+                    continue
+                
+                title = title_link.get_text().strip()
+                url = title_link.get('href', '')
+                
+                if url.startswith('item?'):
+                    url = urljoin(self.base_url, url)
+                
+                # 获取分数和评论数
+                next_row = row.find_next_sibling('tr')
+                score = 0
+                comments = 0
+                
+                if next_row:
+                    score_span = next_row.find('span', class_='score')
+                    if score_span:
+                        score_text = score_span.get_text()
+                        score = int(score_text.split()[0]) if score_text else 0
+                    
+                    comments_link = next_row.find('a', string=lambda text: text and 'comment' in text)
+                    if comments_link:
+                        comments_text = comments_link.get_text()
+                        comments = int(comments_text.split()[0]) if comments_text.split()[0].isdigit() else 0
+                
+                # 添加所有新闻，不过滤分数
+                news_items.append(NewsItem(
+                    id=news_id,
+                    title=title,
+                    url=url,
+                    score=score,
+                    comments=comments,
+                    hn_url=f"{self.base_url}/item?id={news_id}",
+                    rank=i + 1  # 保存原始排名
+                ))
+                
+            except Exception as e:
+                logging.error(f"解析新闻失败: {e}")
+                continue
+        
+        # 及时释放解析树，避免长时间运行时内存增长
+        soup.decompose()
+        return news_items
+    
+    def fetch_url(self, url, headers=None, stream=False, timeout=None, archive_kind=None, route='hn'):
+        """使用爬虫的请求头、代理和超时发起GET请求
+
+        route 决定从代理池的哪条线路选择代理（hn/article/translate）；
+        archive_kind 不为空且启用了原始响应归档时归档响应体（流式响应在调用方读完后归档）；
+        回放模式下直接返回归档中的响应，不访问网络
+        """
+        if self.replay is not None:
+            return self.replay(url, headers=headers, stream=stream)
+        request_headers = dict(self.headers)
+        if headers:
+            request_headers.update(headers)
+        with tracing.network_timer(), self.proxy_pool.use(route) as proxies:
+            response = self.session.get(
+                url,
+                headers=request_headers,
+                proxies=proxies,
+                timeout=timeout or self.request_timeout,
+                allow_redirects=True,
+                stream=stream
+            )
+        if archive_kind and self.raw_archive is not None:
+            if stream:
+                return self.raw_archive.wrap_stream(url, response, archive_kind)
+            self.raw_archive.record(url, response, archive_kind)
+        return response
+    
+    def fetch_article(self, url, headers=None, stream=False):
+        """正文及站点提取器的请求，响应会被归档；限流响应会暂停该域名"""
+        response = self.fetch_url(url, headers=headers, stream=stream, archive_kind='article', route='article')
+        if self.politeness and response.status_code in (429, 503):
+            self.politeness.penalize(url, response.headers.get('Retry-After'))
+        return response
+    
     def get_article_content(self, url):
-        """获取文章内容，改进错误处理"""
+        """获取文章内容，启用礼貌调度时先等待该域名的抓取名额"""
+        if self.politeness is None:
+            return self._get_article_content(url)
+        try:
+            with self.politeness.slot(url):
+                return self._get_article_content(url)
+        except HostBusy as e:
+            logging.warning(f"⏳ {e}，跳过: {url}")
+            return "无法获取文章内容"
+    
+    def prefetch_articles(self, news_list):
+        """按域名轮转并发抓取一批新闻的正文
+
+        返回 {新闻id: (正文, 开始时间, 网络耗时, 总耗时, 摘要)}，供 enrich_news 直接使用；
+        摘要对整批正文一次生成，耗时平摊到每条的总耗时（计入extract）。
+        未启用礼貌调度或只有一条时返回空字典，由 enrich_news 顺序抓取
+        """
+        if self.politeness is None or len(news_list) < 2:
+            return {}
+        
+        def fetch(news):
+            start = time.time()
+            network_before = tracing.network_time()
+            content = self.get_article_content(news.url)
+            return content, start, tracing.network_time() - network_before, time.time() - start
+        
+        results = self.politeness.run(news_list, fetch, lambda news: news.url)
+        fetched = {
+            news_list[index].id: result for index, result in results.items() if result is not None
+        }
+        if not fetched:
+            return {}
+        
+        summary_start = time.time()
+        summaries = self.summarize_contents([result[0] for result in fetched.values()])
+        share = (time.time() - summary_start) / len(fetched)
+        return {
+            news_id: (content, start, network, elapsed + share, summary)
+            for (news_id, (content, start, network, elapsed)), summary in zip(fetched.items(), summaries)
+        }
+    
+    def _get_article_content(self, url):
+        """获取文章内容，改进错误处理
+
+        优先使用站点专用提取器（GitHub/arXiv/PDF/YouTube/X/HN），失败时回退到通用整页解析
+        """
         try:
+            if self.enable_site_extractors:
+                extractor_name, text = extractors.registry.extract(url, self.fetch_article)
+                if text:
+                    lines = [line.strip() for line in text.split('\n') if line.strip()]
+                    return '\n'.join(lines[:self.max_content_lines])
+                if extractor_name == 'pdf':
+                    # PDF不适合通用HTML解析
+                    return "无法获取文章内容"
+            
             if 'news.ycombinator.com' in url and '/item?' in url:
                 return "这是一个HN讨论帖"
             
-            # 添加更多请求头，避免403错误
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.5',
-                'Accept-Encoding': 'gzip, deflate',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-            }
-            
-            response = requests.get(
-                url,
-                headers=self.headers,
-                proxies=self.proxies,
-                timeout=self.request_timeout,
-                allow_redirects=True
-            )
+            if self.politeness and not self.politeness.allowed(url):
+                logging.info(f"🤖 robots.txt 不允许抓取: {url}", extra={'sample': 'robots'})
+                return "无法获取文章内容"
+            
+            response = self.fetch_article(url)
             
             # 如果状态码不是200，返回简单描述
             if response.status_code != 200:
                 logging.warning(f"HTTP {response.status_code} for {url}")
                 return "无法获取文章内容"
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # 移除不需要的元素
-            for element in soup(['script', 'style', 'nav', 'header', 'footer', 'aside']):
-                element.decompose()
-            
-            # 尝试找到主要内容
-            content = ""
-            for selector in ['article', 'main', '.content', '.post', '.entry']:
-                element = soup.select_one(selector)
-                if element:
-                    content = element.get_text()
-                    break
-            
-            if not content:
-                content = soup.get_text()
-            
-            # 清理内容
-            lines = content.split('\n')
-            cleaned_lines = []
-            for line in lines:
-                line = line.strip()
-                if len(line) > 20 and not line.startswith(('http', 'www', '@')):
-                    cleaned_lines.append(line)
-            
-            return '\n'.join(cleaned_lines[:8])  # 取前8行
+            return extractors.extract_generic(response.content, self.max_content_lines)
             
         except requests.exceptions.RequestException as e:
             logging.warning(f"网络请求失败 {url}: {e}")
@@ -474,15 +965,19 @@ class HackerNewsCrawler:
             if chinese_chars > len(text) * 0.3:
                 return text
             
+            cached = self.translation_cache.get(text)
+            if cached is not None:
+                return cached
+            
             # 构建翻译URL
             encoded_text = urllib.parse.quote(text)
             translate_url = f"https://translate.googleapis.com/translate_a/single?client=gtx&sl=auto&tl=zh&dt=t&q={encoded_text}"
             
-            response = requests.get(
+            response = self.fetch_url(
                 translate_url,
-                headers=self.headers,
-                proxies=self.proxies,
-                timeout=self.translation_timeout
+                timeout=self.translation_timeout,
+                archive_kind='translate',
+                route='translate'
             )
             
             if response.status_code == 200:
@@ -499,6 +994,7 @@ class HackerNewsCrawler:
                     
                     # 简单的翻译质量检查
                     if len(translated) > 5 and translated != text:
+                        self.translation_cache.set(text, translated)
                         return translated
             
             return text
@@ -512,12 +1008,19 @@ class HackerNewsCrawler:
         if not content or len(content) < 30:
             return "暂无内容摘要"
         
+        if self.summary_algorithm == 'textrank':
+            return summarizer.summarize(
+                content,
+                max_sentences=self.summary_sentences,
+                max_chars=self.max_summary_length
+            )
+        
         import re
         
         # 移除HTML标签
         content = re.sub(r'<[^>]+>', '', content)
         
-        # 分句
+        # 分句（lead算法：取前2句）
         sentences = re.split(r'[.!?]+\s+', content)
         good_sentences = []
         
@@ -535,8 +1038,21 @@ class HackerNewsCrawler:
         
         return summary if summary else "暂无内容摘要"
     
+    def summarize_contents(self, contents):
+        """批量生成摘要，textrank 时整批一起计算句子得分"""
+        if self.summary_algorithm == 'textrank':
+            return summarizer.summarize_batch(
+                contents,
+                max_sentences=self.summary_sentences,
+                max_chars=self.max_summary_length
+            )
+        return [self.clean_and_summarize_content(content) for content in contents]
+    
     async def send_telegram_message(self, message, max_retries=None):
-        """发送Telegram消息，兼容不同版本的httpx"""
+        """发送Telegram消息，兼容不同版本的httpx
+
+        成功时返回消息的 message_id（供之后原地编辑），失败返回False
+        """
         if max_retries is None:
             max_retries = self.message_max_retries
             
@@ -552,18 +1068,19 @@ class HackerNewsCrawler:
                     'disable_web_page_preview': False
                 }
                 
-                response = requests.post(
-                    url,
-                    data=data,
-                    proxies=self.proxies,
-                    timeout=self.telegram_timeout
-                )
+                with self.proxy_pool.use('telegram') as proxies:
+                    response = self.session.post(
+                        url,
+                        data=data,
+                        proxies=proxies,
+                        timeout=self.telegram_timeout
+                    )
                 
                 if response.status_code == 200:
                     result = response.json()
                     if result.get('ok'):
                         await asyncio.sleep(self.message_send_interval)
-                        return True
+                        return result.get('result', {}).get('message_id') or True
                     else:
                         logging.error(f"Telegram API错误: {result.get('description', '未知错误')}")
                         if attempt < max_retries:
@@ -592,12 +1109,12 @@ class HackerNewsCrawler:
     def format_message(self, news, index, total):
         """商务风格的消息格式，移除翻译条件限制"""
         # 如果有中文翻译就用翻译，否则用原标题
-        title = news.get('title_cn') if news.get('title_cn') and news.get('title_cn') != news['title'] else news['title']
+        title = news.title_cn if news.title_cn and news.title_cn != news.title else news.title
         
         # 摘要处理：优先使用中文摘要，其次英文摘要，最后默认文本
-        summary = news.get('content_summary_cn')
+        summary = news.content_summary_cn
         if not summary or summary == '暂无内容摘要':
-            summary = news.get('content_summary', '暂无内容摘要')
+            summary = news.content_summary
         if not summary:
             summary = "暂无内容摘要"
         
@@ -606,13 +1123,13 @@ class HackerNewsCrawler:
             summary = summary[:180] + "..."
         
         # 商务化的分数等级描述
-        if news['score'] > 500:
+        if news.score > 500:
             popularity = "🔥 热门话题"
             score_level = "极高关注"
-        elif news['score'] > 200:
+        elif news.score > 200:
             popularity = "⭐ 高度关注"
             score_level = "高关注度"
-        elif news['score'] > 100:
+        elif news.score > 100:
             popularity = "📈 持续关注"
             score_level = "中等关注"
         else:
@@ -620,27 +1137,33 @@ class HackerNewsCrawler:
             score_level = "初期关注"
         
         # 讨论活跃度描述
-        if news['comments'] > 100:
+        if news.comments > 100:
             discussion = "💬 讨论热烈"
-        elif news['comments'] > 50:
+        elif news.comments > 50:
             discussion = "💭 讨论活跃"
-        elif news['comments'] > 10:
+        elif news.comments > 10:
             discussion = "📝 有所讨论"
         else:
             discussion = "🔍 待深入讨论"
         
         # 时间格式化
         crawl_time = ""
-        if 'crawl_time' in news:
+        if news.crawl_time:
             try:
-                if isinstance(news['crawl_time'], str):
-                    dt = datetime.fromisoformat(news['crawl_time'].replace('Z', '+00:00'))
-                else:
-                    dt = news['crawl_time']
+                dt = datetime.fromisoformat(news.crawl_time.replace('Z', '+00:00'))
                 crawl_time = dt.strftime("%H:%M")
             except:
                 crawl_time = ""
         
+        # 讨论要点（热门新闻抓取评论后才有）
+        highlights_section = ""
+        discussion_info = self.discussions.get(str(news.id))
+        if discussion_info:
+            highlights = discussion_info['highlights_cn'] or discussion_info['highlights']
+            if highlights:
+                points = '\n'.join(f"• {html.escape(point)}" for point in highlights)
+                highlights_section = f"\n\n<b>💬 讨论要点</b>\n{points}"
+        
         # 商务风格的消息格式
         message = f"""<b>📰 Hacker News 科技资讯 #{index}</b>
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -648,16 +1171,16 @@ class HackerNewsCrawler:
 <b>🔥 {title}</b>
 
 <b>📊 数据概览</b>
-• {popularity} ({news['score']} 分)
-• {discussion} ({news['comments']} 条评论)
+• {popularity} ({news.score} 分)
+• {discussion} ({news.comments} 条评论)
 • 发布时间: {crawl_time}
 
 <b>📝 内容摘要</b>
-{summary}
+{summary}{highlights_section}
 
 <b>🔗 相关链接</b>
-• <a href="{news['url']}">查看原文</a>
-• <a href="{news['hn_url']}">参与讨论</a>
+• <a href="{news.url}">查看原文</a>
+• <a href="{news.hn_url}">参与讨论</a>
 
 <i>第 {index} 条，共 {total} 条资讯</i>"""
         
@@ -684,7 +1207,7 @@ class HackerNewsCrawler:
     
     async def send_completion_message(self, success_count, total_count):
         """简化的完成消息"""
-        next_time = (datetime.now() + timedelta(minutes=int(os.getenv('CHECK_INTERVAL_MINUTES', 1)))).strftime('%H:%M')
+        next_time = (datetime.now() + timedelta(minutes=self.check_interval_minutes)).strftime('%H:%M')
         
         completion_msg = f"""✅ <b>推送完成</b>
 
@@ -702,79 +1225,301 @@ class HackerNewsCrawler:
         except Exception as e:
             logging.error(f"发送完成消息失败: {e}")
     
-    async def crawl_and_send(self):
-        """主要爬取和发送逻辑，优化去重"""
-        logging.info("开始爬取...")
-        
-        # 获取新闻
+    def seed_dedup_index(self):
+        """用今日已入库的新闻初始化近似重复索引（已从快照恢复的新闻跳过）"""
+        df = self.load_news_data()
+        if df.empty:
+            return
+        added = 0
+        for news in NewsItem.from_frame(df[['id', 'title', 'url']]):
+            if news.id not in self.dedup_index:
+                self.dedup_index.add(news)
+                added += 1
+        logging.debug(f"近似重复索引已加载 {added}/{len(df)} 条新闻")
+    
+    def restore_dedup_index(self, snapshot):
+        """从快照恢复近似重复索引（包括正文签名）"""
+        state = snapshot.json('dedup')
+        if not state:
+            return
+        _, state['title'] = snapshot.signatures('dedup_title')
+        _, state['content'] = snapshot.signatures('dedup_content')
+        if not self.dedup_index.load_state(state):
+            logging.info("近似重复索引参数已变化，不使用快照")
+    
+    def restore_state(self, snapshot):
+        """从快照恢复翻译缓存、按域名限速状态和代理池状态"""
+        for text, translated in snapshot.pairs('translation'):
+            self.translation_cache.set(text, translated)
+        if self.politeness:
+            self.politeness.load_state(snapshot.json('politeness', {}))
+        self.proxy_pool.load_state(snapshot.json('proxies', {}))
+        logging.info(
+            f"♨️ 已从快照恢复: 翻译缓存 {len(self.translation_cache)} 条, "
+            f"近似重复索引 {len(self.dedup_index.entries) if self.dedup_index else 0} 条"
+        )
+    
+    def capture_state(self):
+        """当前内存状态 -> 快照分段 {名称: bytes}"""
+        sections = {
+            'meta': state_snapshot.pack_json({
+                'pid': os.getpid(),
+                'csv_file': self.csv_file,
+                'csv_signature': state_snapshot.file_signature(self.csv_file),
+            }),
+            'translation': state_snapshot.pack_pairs(self.translation_cache.items()),
+            'proxies': state_snapshot.pack_json(self.proxy_pool.export_state()),
+        }
+        if self.politeness:
+            sections['politeness'] = state_snapshot.pack_json(self.politeness.export_state())
+        if self.dedup_index:
+            state = self.dedup_index.export_state()
+            num_perm = state['num_perm']
+            sections['dedup_title'] = state_snapshot.pack_signatures(state.pop('title'), num_perm)
+            sections['dedup_content'] = state_snapshot.pack_signatures(state.pop('content'), num_perm)
+            sections['dedup'] = state_snapshot.pack_json(state)
+        return sections
+    
+    def load_discussions(self):
+        """读取今日已生成的讨论要点到 self.discussions，同一新闻以最后一次抓取为准"""
+        if not os.path.exists(self.comments_file):
+            return
+        try:
+            with open(self.comments_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    self.discussions.set(str(record['story_id']), {
+                        'comments': record.get('comments', 0),
+                        'complete': record.get('complete', True),
+                        'highlights': record.get('highlights', []),
+                        'highlights_cn': record.get('highlights_cn', []),
+                    })
+        except Exception as e:
+            logging.warning(f"⚠️ 读取评论要点失败: {e}")
+    
+    def crawl_comments(self):
+        """为评论数达到阈值的新闻抓取评论树并生成讨论要点
+
+        只处理尚未抓取、上次抓取不完整或评论数比上次增长一半以上的新闻，按评论数从高到低；
+        超出 COMMENTS_TIME_BUDGET 后剩余的新闻留到下一轮。返回本轮处理的新闻数量
+        """
+        if not self.enable_comments:
+            return 0
+        try:
+            df = self.load_news_data()
+            if df.empty:
+                return 0
+            df['comments'] = pd.to_numeric(df['comments'], errors='coerce').fillna(0).astype(int)
+            hot = df[df['comments'] >= self.comments_min_count].sort_values('comments', ascending=False)
+            
+            candidates = []
+            for row in hot[['id', 'comments']].itertuples(index=False):
+                previous = self.discussions.get(str(row.id))
+                if previous is None or not previous['complete'] or row.comments >= previous['comments'] * 1.5:
+                    candidates.append((str(row.id), int(row.comments)))
+            if not candidates:
+                return 0
+            
+            start = time.time()
+            deadline = start + self.comments_time_budget
+            # 开启翻译时预留三成预算翻译要点
+            fetch_deadline = start + self.comments_time_budget * (0.7 if self.enable_translation else 1.0)
+            trees = self.comment_fetcher.fetch_threads([story_id for story_id, _ in candidates], fetch_deadline)
+            
+            processed = 0
+            comment_total = 0
+            with open(self.comments_file, 'a', encoding='utf-8') as f:
+                for story_id, comment_count in candidates:
+                    tree = trees[story_id]
+                    if not len(tree):
+                        continue
+                    highlights = discussion_highlights(tree, self.comments_highlights)
+                    highlights_cn = []
+                    if self.enable_translation and time.time() < deadline:
+                        highlights_cn = [self.translate_text(text) for text in highlights]
+                    
+                    record = tree.to_dict()
+                    record.update({
+                        'comments': comment_count,
+                        'highlights': highlights,
+                        'highlights_cn': highlights_cn,
+                        'fetch_time': datetime.now().isoformat(),
+                    })
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                    self.discussions.set(story_id, {
+                        'comments': comment_count,
+                        'complete': tree.complete,
+                        'highlights': highlights,
+                        'highlights_cn': highlights_cn,
+                    })
+                    processed += 1
+                    comment_total += len(tree)
+            
+            logging.info(
+                f"💬 讨论要点: {processed}/{len(candidates)} 条热门新闻, {comment_total} 条评论, "
+                f"耗时 {time.time() - start:.1f}s"
+            )
+            return processed
+        except Exception as e:
+            logging.error(f"❌ 抓取评论失败: {e}")
+            return 0
+    
+    def discover_news(self):
+        """获取首页新闻，更新已入库新闻的分数/评论数
+
+        返回尚未入库、需要进一步处理的新新闻列表；首页获取失败时返回None
+        """
+        discover_start = time.time()
         news_list = self.get_hn_frontpage()
+        discover_time = time.time() - discover_start
         if not news_list:
             logging.warning("未获取到新闻")
-            return
+            return None
         
         # 加载现有数据，避免重复处理
         existing_df = self.load_news_data()
-        # 修复数据类型问题：将ID统一转换为字符串进行比较
-        existing_ids = set(str(id_val) for id_val in existing_df['id'].tolist()) if not existing_df.empty else set()
+        existing_ids = set(existing_df['id'].tolist())
         
-        # 处理新闻
-        new_count = 0
-        updated_count = 0
-        processed_count = 0
+        new_news = []
+        existing_stats = {}
+        duplicate_count = 0
         
-        for news in news_list:
+        for processed_count, news in enumerate(news_list, 1):
             try:
-                processed_count += 1
-                # 确保新闻ID也是字符串
-                news_id = str(news['id'])
-                
-                # 如果新闻已存在，只更新分数和评论数
-                if news_id in existing_ids:
-                    # 通过save_news_to_csv来更新，它会正确处理现有记录
-                    self.save_news_to_csv(news)
-                    updated_count += 1
-                    logging.info(f"更新现有新闻 ({processed_count}/{len(news_list)}): {news['title']}")
+                # 如果新闻已存在，只更新分数和评论数（循环结束后批量写入）
+                if news.id in existing_ids:
+                    existing_stats[news.id] = (news.score, news.comments)
+                    logging.debug(f"更新现有新闻 ({processed_count}/{len(news_list)}): {news.title}",
+                                  extra={'sample': 'existing'})
                     continue
                 
-                # 处理新新闻
-                logging.info(f"处理新新闻 ({processed_count}/{len(news_list)}): {news['title']}")
-                
-                # 获取内容
-                content = self.get_article_content(news['url'])
-                
-                # 翻译标题
-                news['title_cn'] = self.translate_text(news['title'])
-                
-                # 处理摘要
-                news['content_summary'] = self.clean_and_summarize_content(content)
-                news['content_summary_cn'] = self.translate_text(news['content_summary'])
+                existing_ids.add(news.id)
                 
-                # 保存到CSV
-                if self.save_news_to_csv(news):
-                    new_count += 1
-                    existing_ids.add(news_id)  # 添加到已存在ID集合
+                # 重复提交/同一事件的不同来源，跳过后续的抓取、翻译和推送
+                if self.dedup_index:
+                    if self.dedup_index.find_duplicate(news):
+                        duplicate_count += 1
+                        continue
+                    self.dedup_index.add(news)
                 
-                await asyncio.sleep(0.3)  # 避免请求过快
+                if self.tracer:
+                    tracing.begin(news, t0=discover_start)
+                    tracing.add_span(news, 'discover', discover_start, discover_time)
+                new_news.append(news)
                 
             except Exception as e:
                 logging.error(f"处理新闻失败: {e}")
                 continue
         
-        # 分数和评论数的更新已经在save_news_to_csv中处理了
+        updated_count = self.update_news_stats(existing_stats)
         if updated_count > 0:
             logging.info(f"更新 {updated_count} 条现有新闻的分数/评论数")
+        if duplicate_count > 0:
+            logging.info(f"合并 {duplicate_count} 条重复新闻")
         
-        if new_count > 0:
-            logging.info(f"新增 {new_count} 条新闻")
+        return new_news
+    
+    def enrich_news(self, news, prefetched=None):
+        """获取正文、生成摘要并翻译标题和摘要
+
+        prefetched 为 prefetch_articles 的结果时不再抓取正文；
+        正文与已处理的新闻近似重复时设置 news.duplicate_of 并跳过翻译，调用方不应保存
+        """
+        # 获取内容（网络请求计入fetch，其余解析时间计入extract）
+        if prefetched is None:
+            fetch_start = time.time()
+            network_before = tracing.network_time()
+            content = self.get_article_content(news.url)
+            network = tracing.network_time() - network_before
+            elapsed = time.time() - fetch_start
         else:
-            logging.info("没有新增新闻")
+            content, fetch_start, network, elapsed, summary = prefetched
+        tracing.add_span(news, 'fetch', fetch_start, network)
+        tracing.add_span(news, 'extract', fetch_start + network, elapsed - network)
+        
+        if self.dedup_index:
+            original_id = self.dedup_index.check_content(news.id, content)
+            if original_id:
+                news.duplicate_of = int(original_id)
+                return news
         
+        # 翻译标题
+        with tracing.span(news, 'translate'):
+            news.title_cn = self.translate_text(news.title)
+        
+        # 处理摘要（预取时已批量生成）
+        if prefetched is None:
+            with tracing.span(news, 'extract'):
+                summary = self.clean_and_summarize_content(content)
+        news.content_summary = summary
+        with tracing.span(news, 'translate'):
+            news.content_summary_cn = self.translate_text(news.content_summary)
+        
+        return news
+    
+    def store_new_news(self, news_list):
+        """发现阶段：只保存廉价字段，返回新增数量"""
+        persist_start = time.time()
+        saved = self.save_new_news_batch(news_list)
+        persist_time = time.time() - persist_start
+        if self.tracer:
+            for news in news_list:
+                tracing.add_span(news, 'persist', persist_start, persist_time)
+                self.tracer.record_processing(news)
+        return saved
+    
+    def ensure_enriched(self, news, prefetched=None):
+        """按需补全昂贵字段（正文、摘要、标题和摘要翻译）并写回CSV，已补全的直接返回
+
+        返回False表示正文与已处理的新闻近似重复，已在CSV中记录 duplicate_of、不应推送
+        """
+        if news.enriched:
+            return True
+        if self.tracer and not news.trace:
+            crawl_time = pd.Timestamp(news.crawl_time or datetime.now())
+            tracing.begin(news, t0=crawl_time.to_pydatetime().timestamp())
+        
+        self.enrich_news(news, prefetched)
+        if news.duplicate_of:
+            self.mark_duplicate(news)
+            return False
+        
+        with tracing.span(news, 'persist'):
+            self.save_enrichment(news)
+        if self.tracer:
+            self.tracer.record_processing(news)
+        news.enriched = True
+        return True
+    
+    async def send_unsent_news(self, skip_ids=None):
+        """发送所有未发送的新闻，返回成功发送的数量
+
+        skip_ids: 本轮跳过的新闻ID（协调模式下工作进程仍持有租约、正在补全的新闻）
+        """
         # 获取未发送的新闻
         unsent_news = self.get_unsent_news_from_csv()
+        if skip_ids:
+            unsent_news = [news for news in unsent_news if str(news.id) not in skip_ids]
+        
+        # 只为即将推送的新闻补全正文、摘要和翻译，正文按域名轮转并发抓取
+        prefetched = self.prefetch_articles([news for news in unsent_news if not news.enriched])
+        deliverable = []
+        for news in unsent_news:
+            try:
+                cached = news.enriched
+                if self.ensure_enriched(news, prefetched.get(news.id)):
+                    deliverable.append(news)
+                if not cached:
+                    await asyncio.sleep(self.request_interval)  # 避免请求过快
+            except Exception as e:
+                logging.error(f"❌ 补全新闻失败: {e}")
+        unsent_news = deliverable
         
         if not unsent_news:
             logging.info("没有新闻需要发送")
-            return
+            return 0
         
         logging.info(f"准备发送 {len(unsent_news)} 条新闻")
         
@@ -783,14 +1528,24 @@ class HackerNewsCrawler:
         for i, news in enumerate(unsent_news, 1):
             try:
                 message = self.format_message(news, i, len(unsent_news))
-                success = await self.send_telegram_message(message)
+                send_start = time.time()
+                message_id = await self.send_telegram_message(message)
+                send_time = time.time() - send_start
                 
-                if success:
-                    self.mark_news_as_sent(news['id'])
+                if message_id:
+                    self.mark_news_as_sent(
+                        news.id,
+                        message_id=message_id if message_id is not True else None,
+                        position=f"{i}/{len(unsent_news)}",
+                        score=news.score,
+                        comments=news.comments
+                    )
+                    if self.tracer:
+                        self.tracer.record_send(news.id, time.time(), send_time)
                     success_count += 1
-                    logging.info(f"✅ 发送成功 ({i}/{len(unsent_news)}): {news['title']}")
+                    logging.info(f"✅ 发送成功 ({i}/{len(unsent_news)}): {news.title}", extra={'sample': 'sent'})
                 else:
-                    logging.error(f"❌ 发送失败 ({i}/{len(unsent_news)}): {news['title']}")
+                    logging.error(f"❌ 发送失败 ({i}/{len(unsent_news)}): {news.title}")
                 
                 # 控制发送频率，避免API限制
                 if i < len(unsent_news):  # 不是最后一条消息
@@ -812,17 +1567,46 @@ class HackerNewsCrawler:
                 logging.warning(f"发送完成消息失败: {e}")
         
         logging.info(f"发送完成: {success_count}/{len(unsent_news)}")
+        return success_count
+    
+    async def crawl_and_send(self):
+        """主要爬取和发送逻辑，优化去重
+
+        返回本轮新增的新闻数量，供调度器估算首页变化速率
+        """
+        logging.info("开始爬取...")
+        
+        # 获取新闻
+        new_news = self.discover_news()
+        if new_news is None:
+            return 0
+        
+        # 只保存廉价字段，正文、摘要和翻译在推送前按需补全
+        new_count = self.store_new_news(new_news)
+        
+        if new_count > 0:
+            logging.info(f"新增 {new_count} 条新闻")
+        else:
+            logging.info("没有新增新闻")
+        
+        await self.send_unsent_news()
+        
+        # 增量刷新和评论抓取放在推送之后，不影响新闻送达
+        self.refresh_tracked_news()
+        self.crawl_comments()
+        return new_count
 
     def test_network_connection(self):
         """测试网络连接"""
         try:
             # 测试HN网站连接
-            response = requests.get(
-                self.base_url,
-                headers=self.headers,
-                proxies=self.proxies,
-                timeout=self.connection_test_timeout
-            )
+            with self.proxy_pool.use('hn') as proxies:
+                response = self.session.get(
+                    self.base_url,
+                    headers=self.headers,
+                    proxies=proxies,
+                    timeout=self.connection_test_timeout
+                )
             
             if response.status_code == 200:
                 logging.info("✅ HN网站连接正常")
@@ -831,11 +1615,12 @@ class HackerNewsCrawler:
             
             # 测试Telegram API连接 - 统一使用requests
             try:
-                telegram_response = requests.get(
-                    f"https://api.telegram.org/bot{self.bot_token}/getMe",
-                    proxies=self.proxies,
-                    timeout=self.connection_test_timeout
-                )
+                with self.proxy_pool.use('telegram') as proxies:
+                    telegram_response = self.session.get(
+                        f"https://api.telegram.org/bot{self.bot_token}/getMe",
+                        proxies=proxies,
+                        timeout=self.connection_test_timeout
+                    )
                 
                 if telegram_response.status_code == 200:
                     result = telegram_response.json()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hacker News 爬虫 - 基于 updates 接口的增量刷新
+
+HN官方API的 /v0/updates.json 返回最近发生变化的条目id和用户名。
+每轮只拉取这一个列表，与已入库的新闻id求交集，再并发获取变化的条目，
+即可让已跌出首页的新闻也保持分数/评论数最新，请求量只与变化量成正比。
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+HN_API = "https://hacker-news.firebaseio.com/v0"
+
+
+class UpdatesRefresher:
+    """轮询 updates 接口，只刷新发生变化的已跟踪新闻"""
+
+    def __init__(self, fetch, max_workers=8):
+        self.fetch = fetch
+        self.max_workers = max_workers
+        self.stats = {'polls': 0, 'changed': 0, 'fetched': 0, 'errors': 0}
+
+    def changed_ids(self):
+        """最近发生变化的条目id集合"""
+        response = self.fetch(f"{HN_API}/updates.json")
+        if response.status_code != 200:
+            raise RuntimeError(f"updates 接口返回 HTTP {response.status_code}")
+        self.stats['polls'] += 1
+        return {int(item_id) for item_id in (response.json() or {}).get('items', [])}
+
+    def _get_item(self, item_id):
+        try:
+            response = self.fetch(f"{HN_API}/item/{item_id}.json")
+            if response.status_code != 200:
+                return None
+            return response.json()
+        except Exception as e:
+            self.stats['errors'] += 1
+            logging.debug(f"获取条目 {item_id} 失败: {e}")
+            return None
+
+    def refresh(self, tracked_ids):
+        """返回变化的已跟踪新闻的最新数据 {id: (score, comments)}"""
+        changed = sorted(self.changed_ids() & {int(i) for i in tracked_ids})
+        if not changed:
+            return {}
+        self.stats['changed'] += len(changed)
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(changed))) as executor:
+            items = list(executor.map(self._get_item, changed))
+
+        updates = {}
+        for story_id, item in zip(changed, items):
+            if not item or item.get('deleted') or item.get('dead'):
+                continue
+            updates[story_id] = (int(item.get('score', 0)), int(item.get('descendants', 0)))
+        self.stats['fetched'] += len(updates)
+        return updates
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hacker News 爬虫 - 配置热加载
+
+守护进程收到 SIGHUP、控制命令 reload-config，或发现 config.env 被修改时重新读取配置，
+不需要重启（保留连接、缓存和内存中的状态）:
+
+- 新配置先整体做类型转换和校验（必需项和配置分组来自 validate_config），任何一项
+  不合法都整份拒绝并继续使用旧配置
+- 校验通过后才写入环境变量，由主循环在两轮任务之间一次性应用到爬虫实例和守护进程组件，
+  一轮任务中不会混用新旧配置
+- 只在启动时读取的配置项（数据目录、日志文件、各功能的开关等）发生变化时记录警告，需要重启
+- 进程环境中显式设置的变量优先于文件（与 load_dotenv 不覆盖已有环境变量一致）
+"""
+
+import os
+import signal
+import logging
+import threading
+
+from dotenv import dotenv_values
+
+from validate_config import CONFIG_GROUPS, REQUIRED_CONFIGS
+
+LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+
+# 配置项 -> (类型, 默认值, 最小值)；类型为元组时表示可选值（不区分大小写）
+SCHEMA = {
+    'TELEGRAM_BOT_TOKEN': (str, None, None),
+    'TELEGRAM_CHAT_ID': (str, None, None),
+    'BASE_URL': (str, 'https://news.ycombinator.com', None),
+    'MAX_NEWS_COUNT': (int, 100, 1),
+    'MIN_SCORE': (int, 0, 0),
+    'CHECK_INTERVAL_MINUTES': (float, 5, 0.1),
+    'MIN_CHECK_INTERVAL_MINUTES': (float, 2, 0.1),
+    'MAX_CHECK_INTERVAL_MINUTES': (float, 30, 0.1),
+    'DAEMON_CHECK_INTERVAL': (int, 30, 1),
+    'PROCESS_WAIT_TIME': (int, 2, 0),
+    'PROCESS_STOP_WAIT_TIME': (int, 3, 0),
+    'REQUEST_TIMEOUT': (int, 15, 1),
+    'CONNECTION_TEST_TIMEOUT': (int, 10, 1),
+    'TRANSLATION_TIMEOUT': (int, 10, 1),
+    'TELEGRAM_TIMEOUT': (int, 15, 1),
+    'MAX_RETRIES': (int, 3, 0),
+    'REQUEST_INTERVAL': (float, 0.3, 0),
+    'USER_AGENT': (str, '', None),
+    'MESSAGE_SEND_INTERVAL': (float, 1.0, 0),
+    'MESSAGE_RETRY_INTERVAL': (float, 2.0, 0),
+    'BULK_MESSAGE_INTERVAL': (float, 3.0, 0),
+    'MESSAGE_MAX_RETRIES': (int, 2, 0),
+    'ENABLE_TRANSLATION': (bool, True, None),
+    'ENABLE_CONTENT_SUMMARY': (bool, True, None),
+    'ENABLE_SITE_EXTRACTORS': (bool, True, None),
+    'ENABLE_PROXY': (bool, False, None),
+    'ENABLE_WEB': (bool, False, None),
+    'MAX_TRANSLATION_LENGTH': (int, 400, 1),
+    'MAX_SUMMARY_LENGTH': (int, 200, 1),
+    'MAX_TITLE_LENGTH': (int, 200, 1),
+    'MAX_CONTENT_LINES': (int, 40, 1),
+    'SUMMARY_ALGORITHM': (('textrank', 'lead'), 'textrank', None),
+    'SUMMARY_SENTENCES': (int, 2, 1),
+    'DATA_DIR': (str, 'data', None),
+    'CSV_ENCODING': (str, 'utf-8', None),
+    'CSV_COLUMNS': (str, '', None),
+    'LOG_LEVEL': (LOG_LEVELS, 'INFO', None),
+    'LOG_FILE': (str, 'hn_crawler.log', None),
+    'LOG_FORMAT': (str, '', None),
+    'PROXY_HTTP': (str, '', None),
+    'PROXY_HTTPS': (str, '', None),
+    'PROXY_POOL': (str, '', None),
+    'PROXY_POOL_HN': (str, '', None),
+    'PROXY_POOL_ARTICLE': (str, '', None),
+    'PROXY_POOL_TRANSLATE': (str, '', None),
+    'PROXY_POOL_TELEGRAM': (str, '', None),
+    'PROXY_PROBE_INTERVAL': (float, 30, 1),
+    'PROXY_PROBE_TIMEOUT': (float, 5, 0.1),
+    'PROXY_EJECT_FAILURES': (int, 3, 1),
+    'PER_HOST_CONCURRENCY': (int, 1, 1),
+    'PER_HOST_DELAY': (float, 1.0, 0),
+    'MAX_CRAWL_DELAY': (float, 30, 0),
+    'PER_HOST_MAX_WAIT': (float, 60, 0),
+    'BOT_ALLOWED_CHAT_IDS': (str, '', None),
+    'MEMORY_LIMIT': (float, 512, 0),
+}
+
+# 热加载时直接写入爬虫实例属性的配置项
+CRAWLER_ATTRIBUTES = {
+    'BASE_URL': 'base_url',
+    'MAX_NEWS_COUNT': 'max_news_count',
+    'MIN_SCORE': 'min_score',
+    'REQUEST_TIMEOUT': 'request_timeout',
+    'CONNECTION_TEST_TIMEOUT': 'connection_test_timeout',
+    'TRANSLATION_TIMEOUT': 'translation_timeout',
+    'TELEGRAM_TIMEOUT': 'telegram_timeout',
+    'MAX_RETRIES': 'max_retries',
+    'REQUEST_INTERVAL': 'request_interval',
+    'MESSAGE_SEND_INTERVAL': 'message_send_interval',
+    'MESSAGE_RETRY_INTERVAL': 'message_retry_interval',
+    'BULK_MESSAGE_INTERVAL': 'bulk_message_interval',
+    'MESSAGE_MAX_RETRIES': 'message_max_retries',
+    'ENABLE_TRANSLATION': 'enable_translation',
+    'ENABLE_CONTENT_SUMMARY': 'enable_content_summary',
+    'ENABLE_SITE_EXTRACTORS': 'enable_site_extractors',
+    'MAX_TRANSLATION_LENGTH': 'max_translation_length',
+    'MAX_SUMMARY_LENGTH': 'max_summary_length',
+    'MAX_TITLE_LENGTH': 'max_title_length',
+    'MAX_CONTENT_LINES': 'max_content_lines',
+    'SUMMARY_ALGORITHM': 'summary_algorithm',
+    'SUMMARY_SENTENCES': 'summary_sentences',
+    'TELEGRAM_BOT_TOKEN': 'bot_token',
+    'TELEGRAM_CHAT_ID': 'chat_id',
+}
+
+# 按域名礼貌调度器的属性
+POLITENESS_ATTRIBUTES = {
+    'PER_HOST_CONCURRENCY': 'per_host_concurrency',
+    'PER_HOST_DELAY': 'per_host_delay',
+    'MAX_CRAWL_DELAY': 'max_crawl_delay',
+    'PER_HOST_MAX_WAIT': 'max_wait',
+}
+
+# 变化时需要重建代理池的配置项
+PROXY_KEYS = {
+    'ENABLE_PROXY', 'PROXY_HTTP', 'PROXY_HTTPS', 'PROXY_POOL', 'PROXY_POOL_HN', 'PROXY_POOL_ARTICLE',
+    'PROXY_POOL_TRANSLATE', 'PROXY_POOL_TELEGRAM', 'PROXY_PROBE_INTERVAL', 'PROXY_PROBE_TIMEOUT',
+    'PROXY_EJECT_FAILURES',
+}
+
+# 由守护进程主循环应用的配置项
+DAEMON_KEYS = {
+    'CHECK_INTERVAL_MINUTES', 'MIN_CHECK_INTERVAL_MINUTES', 'MAX_CHECK_INTERVAL_MINUTES',
+    'DAEMON_CHECK_INTERVAL', 'BOT_ALLOWED_CHAT_IDS', 'MEMORY_LIMIT',
+}
+
+# 可以热加载的全部配置项，其余配置项变化时提示需要重启
+HOT_KEYS = set(CRAWLER_ATTRIBUTES) | set(POLITENESS_ATTRIBUTES) | PROXY_KEYS | DAEMON_KEYS | {'USER_AGENT'}
+
+
+def proxy_changed(changed):
+    """变化的配置项中是否有代理相关的（包括逐线路的探测URL PROXY_PROBE_URL_*）"""
+    return any(key in PROXY_KEYS or key.startswith('PROXY_PROBE_URL_') for key in changed)
+
+
+class ConfigError(ValueError):
+    """配置不合法，errors 为所有问题的列表"""
+
+    def __init__(self, errors):
+        super().__init__('; '.join(errors))
+        self.errors = errors
+
+
+def _convert(key, value, kind, minimum):
+    if isinstance(kind, tuple):
+        for choice in kind:
+            if value.lower() == choice.lower():
+                return choice
+        raise ValueError(f"{key}={value} 不是可选值 {'/'.join(kind)} 之一")
+    if kind is bool:
+        if value.lower() not in ('true', 'false'):
+            raise ValueError(f"{key}={value} 应为 true 或 false")
+        return value.lower() == 'true'
+    if kind in (int, float):
+        try:
+            number = kind(value)
+        except ValueError:
+            raise ValueError(f"{key}={value} 不是有效的{'整数' if kind is int else '数字'}")
+        if minimum is not None and number < minimum:
+            raise ValueError(f"{key}={value} 不能小于 {minimum}")
+        return number
+    return value
+
+
+class Config:
+    """一份经过类型转换和校验的配置（只读），按配置项名称取值"""
+
+    __slots__ = ('raw', '_values')
+
+    def __init__(self, raw, values):
+        self.raw = raw
+        self._values = values
+
+    @classmethod
+    def parse(cls, raw):
+        """raw: {配置项: 字符串}；不合法时抛出 ConfigError，列出全部问题"""
+        errors = []
+        values = {}
+        for key in REQUIRED_CONFIGS:
+            if not raw.get(key, '').strip():
+                errors.append(f"缺少必需配置 {key}")
+        # validate_config 分组中的配置项都在 SCHEMA 中有类型，其余按字符串处理
+        keys = set(SCHEMA) | {key for group in CONFIG_GROUPS.values() for key in group}
+        for key in keys:
+            kind, default, minimum = SCHEMA.get(key, (str, None, None))
+            value = raw.get(key)
+            if value is None or value == '':
+                values[key] = default
+                continue
+            try:
+                values[key] = _convert(key, value.strip(), kind, minimum)
+            except ValueError as e:
+                errors.append(str(e))
+        if not errors and values['MIN_CHECK_INTERVAL_MINUTES'] > values['MAX_CHECK_INTERVAL_MINUTES']:
+            errors.append("MIN_CHECK_INTERVAL_MINUTES 不能大于 MAX_CHECK_INTERVAL_MINUTES")
+        for key in PROXY_KEYS:
+            if key.startswith('PROXY_POOL') and raw.get(key):
+                for proxy in raw[key].split(','):
+                    proxy = proxy.strip()
+                    if proxy and proxy != 'DIRECT' and '://' not in proxy:
+                        errors.append(f"{key} 中的代理地址 {proxy} 缺少协议 (如 http://)")
+        if errors:
+            raise ConfigError(errors)
+        return cls(dict(raw), values)
+
+    def __getitem__(self, key):
+        return self._values[key]
+
+    def get(self, key, default=None):
+        return self._values.get(key, default)
+
+    def changed(self, other):
+        """与另一份配置相比原始值不同的配置项"""
+        keys = set(self.raw) | set(other.raw)
+        return {key for key in keys if self.raw.get(key) != other.raw.get(key)}
+
+
+class ConfigReloader:
+    """监视配置文件，按请求或文件变化重新加载并校验"""
+
+    def __init__(self, path='config.env'):
+        self.path = path
+        file_values = self._read_file()
+        # 进程环境中显式设置（与文件不同）的变量优先，重新加载时保持不变
+        self.overrides = {
+            key: os.environ[key] for key, value in file_values.items()
+            if key in os.environ and os.environ[key] != value
+        }
+        self.keys = set(file_values)
+        self.current = Config(self._merge(file_values), {})
+        try:
+            self.current = Config.parse(self.current.raw)
+        except ConfigError as e:
+            logging.warning(f"⚠️ 当前配置未通过校验，热加载时将以新配置为准: {e}")
+        self.reloads = 0
+        self.rejected = 0
+        self._mtime = self._stat()
+        self._requested = threading.Event()
+
+    def _read_file(self):
+        if not os.path.exists(self.path):
+            return {}
+        return {key: value for key, value in dotenv_values(self.path).items() if value is not None}
+
+    def _stat(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _merge(self, file_values):
+        """文件中的值 + 未在文件中出现的已知配置项的进程环境值 + 显式覆盖"""
+        raw = {key: os.environ[key] for key in SCHEMA if key in os.environ and key not in self.keys}
+        raw.update(file_values)
+        raw.update(self.overrides)
+        return raw
+
+    def request(self):
+        """请求重新加载（可在信号处理函数中调用）"""
+        self._requested.set()
+
+    def install_signal_handler(self, wakeup=None):
+        """SIGHUP 时请求重新加载，wakeup 用于唤醒正在等待的主循环"""
+        def handler(signum, frame):
+            self.request()
+            if wakeup:
+                wakeup()
+        signal.signal(signal.SIGHUP, handler)
+
+    def pending(self):
+        """是否收到重新加载请求或配置文件已被修改"""
+        return self._requested.is_set() or self._stat() != self._mtime
+
+    def reload(self):
+        """重新读取并校验配置，成功时写入环境变量并返回 (新配置, 变化的配置项)
+
+        没有变化时返回 (当前配置, 空集合)；校验失败时记录错误、保留旧配置并返回 (None, 空集合)
+        """
+        self._requested.clear()
+        self._mtime = self._stat()
+        file_values = self._read_file()
+        raw = self._merge(file_values)
+        try:
+            config = Config.parse(raw)
+        except ConfigError as e:
+            self.rejected += 1
+            logging.error(f"❌ 新配置未通过校验，继续使用旧配置: {e}")
+            return None, set()
+
+        changed = config.changed(self.current)
+        if not changed:
+            return self.current, changed
+        # 文件中删除的配置项从环境中移除，恢复为默认值
+        for key in self.keys - set(file_values):
+            if key not in self.overrides:
+                os.environ.pop(key, None)
+        for key in changed:
+            if key in raw:
+                os.environ[key] = raw[key]
+        self.keys = set(file_values)
+        self.current = config
+        self.reloads += 1
+
+        restart_keys = sorted(key for key in changed if key not in HOT_KEYS and not proxy_changed([key]))
+        hot = sorted(key for key in changed if key not in restart_keys)
+        logging.info(f"🔁 配置已重新加载: {', '.join(hot) or '无可热加载的变化'}")
+        if restart_keys:
+            logging.warning(f"⚠️ 以下配置需要重启才能生效: {', '.join(restart_keys)}")
+        return config, changed
+
+    def snapshot(self):
+        return {'path': self.path, 'reloads': self.reloads, 'rejected': self.rejected}
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hacker News 爬虫 - 日志配置
+
+- 调用方（包括事件循环线程）只把日志记录放入内存队列，文件和控制台写入由
+  QueueListener 的后台线程完成，不阻塞抓取和发送
+- 日志文件按大小（LOG_MAX_SIZE）或时间（LOG_ROTATION_WHEN）轮转；协调器和工作进程
+  写同一个文件时只由协调器轮转，工作进程在文件被轮转后自动重新打开
+- 可选JSON行格式（LOG_JSON），便于日志采集
+- 逐条新闻的重复日志（带 extra={'sample': 类别}）按类别限流：每个窗口内只输出前几条，
+  其余计数，在下一个窗口的第一条中注明省略的条数
+- tail() 从文件末尾倒序读取最后几行，不读取整个日志文件
+"""
+
+import os
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from logging.handlers import (
+    QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler, WatchedFileHandler
+)
+
+DEFAULT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+_listener = None
+
+
+class SamplingFilter(logging.Filter):
+    """对带 sample 标记的日志按类别限流：每个窗口内最多输出 burst 条"""
+
+    def __init__(self, burst=5, window=60.0):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        # 类别 -> [窗口开始时间, 已输出条数, 已省略条数]
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = getattr(record, 'sample', None)
+        if key is None or self.burst <= 0:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            state = self.counts.get(key)
+            if state is None or now - state[0] >= self.window:
+                suppressed = state[2] if state else 0
+                state = self.counts[key] = [now, 0, 0]
+                if suppressed:
+                    record.msg = f"{record.getMessage()} (此前 {self.window:g} 秒内省略 {suppressed} 条同类日志)"
+                    record.args = None
+            if state[1] < self.burst:
+                state[1] += 1
+                return True
+            state[2] += 1
+            return False
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志输出为一行JSON"""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'process': record.process,
+            'thread': record.threadName,
+            'msg': record.getMessage(),
+        }
+        sample = getattr(record, 'sample', None)
+        if sample:
+            entry['sample'] = sample
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def _file_handler(log_file, rotate):
+    """rotate=False（工作进程）时用 WatchedFileHandler：文件被其他进程轮转后重新打开"""
+    enable_rotation = os.getenv('ENABLE_LOG_ROTATION', 'true').lower() == 'true'
+    if not rotate or not enable_rotation:
+        return WatchedFileHandler(log_file, encoding='utf-8')
+    backup_count = int(os.getenv('LOG_BACKUP_COUNT', 5))
+    when = os.getenv('LOG_ROTATION_WHEN', '')
+    if when:
+        return TimedRotatingFileHandler(log_file, when=when, backupCount=backup_count, encoding='utf-8')
+    max_bytes = int(float(os.getenv('LOG_MAX_SIZE', 10)) * 1024 * 1024)
+    return RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+
+
+def configure(rotate=True, force=False):
+    """配置根日志器（同一进程内重复调用时保持已有配置，force=True 时重建）
+
+    rotate: 是否由本进程负责轮转日志文件
+    """
+    global _listener
+    if _listener is not None:
+        if not force:
+            return
+        _listener.stop()
+        _listener = None
+
+    level = getattr(logging, os.getenv('LOG_LEVEL', 'INFO').upper(), logging.INFO)
+    log_file = os.getenv('LOG_FILE', 'hn_crawler.log')
+    text_formatter = logging.Formatter(os.getenv('LOG_FORMAT', DEFAULT_FORMAT))
+
+    file_handler = _file_handler(log_file, rotate)
+    if os.getenv('LOG_JSON', 'false').lower() == 'true':
+        file_handler.setFormatter(JsonFormatter())
+    else:
+        file_handler.setFormatter(text_formatter)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(text_formatter)
+
+    # 队列不设上限：日志量远小于处理能力，丢弃日志比短暂占用内存更难排查
+    records = queue.SimpleQueue()
+    queue_handler = QueueHandler(records)
+    queue_handler.addFilter(SamplingFilter(
+        burst=int(os.getenv('LOG_SAMPLE_BURST', 5)),
+        window=float(os.getenv('LOG_SAMPLE_WINDOW', 60))
+    ))
+
+    # 清除现有的处理器
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = QueueListener(records, file_handler, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown():
+    """写出队列中剩余的日志并停止后台线程"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(shutdown)
+
+
+def tail(path, lines=20, block_size=8192):
+    """从文件末尾按块倒序读取，返回最后 lines 行"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b''
+        while position > 0 and data.count(b'\n') <= lines:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            data = f.read(read_size) + data
+    return [line.decode('utf-8', errors='replace') for line in data.splitlines()[-lines:]]
+
+
+def format_line(line):
+    """JSON行日志转为与文本格式一致的可读形式，其他行原样返回"""
+    if not line.startswith('{'):
+        return line
+    try:
+        entry = json.loads(line)
+        return f"{entry['time']} - {entry['level']} - {entry['msg']}"
+    except (ValueError, KeyError):
+        return line
@@ -2,7 +2,11 @@
 # -*- coding: utf-8 -*-
 """
 Hacker News 爬虫管理工具
-用于启动、停止、检查爬虫进程状态
+通过守护进程的控制接口启动、停止、查询状态和下发命令
+
+用法:
+  python manage_crawler.py            交互式菜单
+  python manage_crawler.py <命令>      status/stats/start/stop/crawl/drain/pause/resume/reload/logs
 """
 
 import os
@@ -10,9 +14,10 @@ import sys
 import subprocess
 import signal
 import time
-from datetime import datetime
 import logging
 from dotenv import load_dotenv
+from control_socket import send_command, DEFAULT_SOCKET_PATH
+from log_setup import tail, format_line
 
 # 加载配置
 load_dotenv('config.env')
@@ -23,106 +28,142 @@ logging.basicConfig(
     format=os.getenv('LOG_FORMAT', '%(asctime)s - %(levelname)s - %(message)s')
 )
 
-def get_crawler_processes():
-    """获取爬虫相关进程"""
+CONTROL_SOCKET = os.getenv('CONTROL_SOCKET', DEFAULT_SOCKET_PATH)
+LOCK_FILE = '/tmp/hn_crawler.lock'
+
+def control(cmd):
+    """通过控制接口发送命令，守护进程未运行时返回None"""
     try:
-        # 查找爬虫进程
-        result = subprocess.run(
-            ['ps', 'aux'], 
-            capture_output=True, 
-            text=True
-        )
-        
-        processes = []
-        for line in result.stdout.split('\n'):
-            if ('hn_news_crawler.py' in line or 'run.py' in line) and 'grep' not in line:
-                parts = line.split()
-                if len(parts) >= 2:
-                    pid = parts[1]
-                    command = ' '.join(parts[10:])
-                    processes.append({'pid': pid, 'command': command})
-        
-        return processes
-    except Exception as e:
-        print(f"❌ 获取进程失败: {e}")
-        return []
+        response = send_command(cmd, CONTROL_SOCKET)
+    except (ConnectionError, OSError):
+        return None
+    if not response.get('ok'):
+        print(f"❌ 命令执行失败: {response.get('error')}")
+    return response
+
+def get_daemon_pid():
+    """从文件锁中读取守护进程PID（控制接口不可用时的后备方案）"""
+    try:
+        with open(LOCK_FILE, 'r') as f:
+            pid = int(f.read().strip())
+        os.kill(pid, 0)
+        return pid
+    except (OSError, ValueError):
+        return None
 
 def show_status():
     """显示爬虫状态"""
-    print("🔍 检查爬虫进程状态...")
+    print("🔍 检查爬虫守护进程状态...")
     print("=" * 60)
     
-    processes = get_crawler_processes()
-    
-    if not processes:
-        print("✅ 没有运行中的爬虫进程")
-    else:
-        print(f"🔄 发现 {len(processes)} 个运行中的爬虫进程:")
-        for proc in processes:
-            print(f"  PID: {proc['pid']} | {proc['command']}")
+    response = control('status')
+    if response is None:
+        pid = get_daemon_pid()
+        if pid:
+            print(f"⚠️ 守护进程 (PID: {pid}) 控制接口无响应")
+        else:
+            print("✅ 没有运行中的守护进程")
+    elif response.get('ok'):
+        status = response['result']
+        print(f"🔄 守护进程运行中 (PID: {status['pid']}, 模式: {status['role']})")
+        print(f"  运行时长: {status['uptime_seconds']:.0f} 秒")
+        print(f"  状态: {'⏸️ 已暂停' if status['paused'] else '▶️ 运行中'}"
+              f"{' | 正在执行: ' + status['busy'] if status['busy'] else ''}")
+        print(f"  上次执行: {status['last_run'] or '-'}")
+        print(f"  下次执行: {status['next_run'] or '-'}")
     
     print()
 
-def stop_crawler(self):
-    """停止爬虫进程"""
-    processes = get_crawler_processes()
-    if not processes:
-        print("❌ 没有找到运行中的爬虫进程")
+def show_stats():
+    """显示实时统计"""
+    response = control('stats')
+    if response is None:
+        print("❌ 守护进程未运行")
+        return
+    if response.get('ok'):
+        print("📊 实时统计:")
+        print("=" * 60)
+        for key, value in response['result'].items():
+            print(f"  {key}: {value}")
+
+def run_command(cmd):
+    """发送简单控制命令并打印结果"""
+    response = control(cmd)
+    if response is None:
+        print("❌ 守护进程未运行")
         return False
+    if response.get('ok'):
+        print(f"✅ {response['result']}")
+    return response.get('ok', False)
+
+def stop_crawler():
+    """停止爬虫守护进程"""
+    pid = get_daemon_pid()
+    if control('stop') is None:
+        if not pid:
+            print("❌ 没有找到运行中的守护进程")
+            return False
+        print(f"🛑 控制接口无响应，发送SIGTERM到进程 {pid}")
+        os.kill(pid, signal.SIGTERM)
+    else:
+        print("🛑 已发送停止命令")
+    
+    if not pid:
+        return True
     
     process_wait_time = int(os.getenv('PROCESS_WAIT_TIME', 2))
     process_stop_wait_time = int(os.getenv('PROCESS_STOP_WAIT_TIME', 3))
     
-    for pid, cmd in processes:
+    # 守护进程会在当前任务结束后退出
+    deadline = time.time() + process_wait_time + process_stop_wait_time
+    while time.time() < deadline:
         try:
-            print(f"🛑 停止进程 {pid}: {cmd}")
-            os.kill(pid, signal.SIGTERM)
-            time.sleep(process_wait_time)  # 从配置文件读取等待时间
-            
-            # 检查进程是否已停止
-            try:
-                os.kill(pid, 0)  # 检查进程是否存在
-                print(f"⚠️ 进程 {pid} 未响应SIGTERM，使用SIGKILL")
-                os.kill(pid, signal.SIGKILL)
-                time.sleep(process_stop_wait_time)  # 从配置文件读取停止等待时间
-            except ProcessLookupError:
-                print(f"✅ 进程 {pid} 已停止")
-                
+            os.kill(pid, 0)  # 检查进程是否存在
         except ProcessLookupError:
-            print(f"⚠️ 进程 {pid} 不存在")
-        except Exception as e:
-            print(f"❌ 停止进程 {pid} 失败: {e}")
+            print(f"✅ 进程 {pid} 已停止")
+            return True
+        time.sleep(0.2)
     
+    print(f"⚠️ 进程 {pid} 仍在执行任务，将在当前任务完成后退出")
     return True
 
 def start_daemon():
     """启动后台守护进程"""
     print("🚀 启动后台守护进程...")
     
-    # 先停止现有进程
-    stop_crawler()
+    if control('status') is not None:
+        print("⚠️ 守护进程已在运行")
+        return
     
     try:
         # 启动新的后台进程
         subprocess.Popen(
-            [sys.executable, 'run.py'],
+            [sys.executable, 'run_daemon.py'],
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
             start_new_session=True
         )
         print("✅ 后台守护进程已启动")
         
-        # 等待一下再检查状态
-        time.sleep(3)
+        # 等待控制接口就绪
+        for _ in range(30):
+            time.sleep(0.5)
+            if control('status') is not None:
+                break
         show_status()
         
     except Exception as e:
         print(f"❌ 启动失败: {e}")
 
 def run_once():
-    """运行一次"""
+    """运行一次：守护进程运行时直接触发，否则启动单次运行脚本"""
     print("⚡ 执行单次爬取...")
     
+    # 守护进程运行中：复用其进程和缓存，立即返回
+    if control('status') is not None:
+        run_command('trigger-crawl-now')
+        return
+    
     try:
         result = subprocess.run(
             [sys.executable, 'run_once.py'],
@@ -143,43 +184,79 @@ def show_logs():
     print("📋 最近的日志 (最后20行):")
     print("=" * 60)
     
+    log_file = os.getenv('LOG_FILE', 'hn_crawler.log')
     try:
-        if os.path.exists('hn_crawler.log'):
-            with open('hn_crawler.log', 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                for line in lines[-20:]:
-                    print(line.rstrip())
+        if os.path.exists(log_file):
+            # 从文件末尾倒序读取，日志文件很大时也只读最后几个块
+            for line in tail(log_file, 20):
+                print(format_line(line.rstrip()))
         else:
             print("❌ 日志文件不存在")
     except Exception as e:
         print(f"❌ 读取日志失败: {e}")
 
+CLI_COMMANDS = {
+    'status': show_status,
+    'stats': show_stats,
+    'start': start_daemon,
+    'stop': stop_crawler,
+    'crawl': run_once,
+    'drain': lambda: run_command('drain-outbox'),
+    'pause': lambda: run_command('pause'),
+    'resume': lambda: run_command('resume'),
+    'reload': lambda: run_command('reload-config'),
+    'logs': show_logs,
+}
+
 def main():
     """主菜单"""
+    if len(sys.argv) > 1:
+        action = CLI_COMMANDS.get(sys.argv[1])
+        if not action:
+            print(f"❌ 未知命令: {sys.argv[1]}，可用命令: {', '.join(CLI_COMMANDS)}")
+            sys.exit(1)
+        action()
+        return
+    
     while True:
         print("\n" + "="*60)
         print("🤖 Hacker News 爬虫管理工具")
         print("="*60)
         print("1. 查看状态")
         print("2. 启动后台守护进程")
-        print("3. 停止所有进程")
+        print("3. 停止守护进程")
         print("4. 运行一次")
         print("5. 查看日志")
+        print("6. 实时统计")
+        print("7. 立即发送待发送新闻")
+        print("8. 暂停定时任务")
+        print("9. 恢复定时任务")
+        print("r. 重新加载配置")
         print("0. 退出")
         print("-"*60)
         
-        choice = input("请选择操作 (0-5): ").strip()
+        choice = input("请选择操作 (0-9, r): ").strip()
         
         if choice == '1':
             show_status()
         elif choice == '2':
             start_daemon()
         elif choice == '3':
-            stop_all()
+            stop_crawler()
         elif choice == '4':
             run_once()
         elif choice == '5':
             show_logs()
+        elif choice == '6':
+            show_stats()
+        elif choice == '7':
+            run_command('drain-outbox')
+        elif choice == '8':
+            run_command('pause')
+        elif choice == '9':
+            run_command('resume')
+        elif choice == 'r':
+            run_command('reload-config')
         elif choice == '0':
             print("👋 再见!")
             break
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hacker News 爬虫 - 内存预算
+
+- BoundedCache: 带条目数和字节数上限的LRU缓存，爬虫中所有缓存/索引都应使用它
+- MemoryMonitor: 每轮采样进程RSS，超出预算时主动收缩已注册的缓存，并按组件汇总内存占用
+"""
+
+import gc
+import os
+import sys
+import logging
+import resource
+import threading
+from collections import OrderedDict
+
+
+def estimate_size(obj):
+    """粗略估算对象占用的字节数（容器只展开一层）"""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(sys.getsizeof(item) for item in obj)
+    return size
+
+
+class BoundedCache:
+    """有界LRU缓存，按条目数和估算字节数双重限制"""
+
+    def __init__(self, name, max_entries=1000, max_bytes=None, sizeof=estimate_size):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        size = self.sizeof(key) + self.sizeof(value)
+        with self._lock:
+            if key in self._data:
+                self._bytes -= self._sizes[key]
+            self._data[key] = value
+            self._data.move_to_end(key)
+            self._sizes[key] = size
+            self._bytes += size
+            self._evict(self.max_entries, self.max_bytes)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._bytes -= self._sizes.pop(key)
+            return self._data.pop(key)
+
+    def _evict(self, max_entries, max_bytes):
+        evicted = 0
+        while self._data and (
+            (max_entries is not None and len(self._data) > max_entries) or
+            (max_bytes is not None and self._bytes > max_bytes)
+        ):
+            key, _ = self._data.popitem(last=False)
+            self._bytes -= self._sizes.pop(key)
+            evicted += 1
+        self.evictions += evicted
+        return evicted
+
+    def trim(self, fraction=0.5):
+        """按比例淘汰最久未使用的条目，返回淘汰数量"""
+        with self._lock:
+            keep = int(len(self._data) * (1 - fraction))
+            return self._evict(keep, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    def items(self):
+        with self._lock:
+            return list(self._data.items())
+
+    def stats(self):
+        return {
+            'entries': len(self._data),
+            'bytes': self._bytes,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+def read_rss_bytes():
+    """读取当前进程RSS（Linux读取/proc，其他平台退化为峰值RSS）"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS以字节为单位，Linux以KB为单位
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class MemoryMonitor:
+    """进程内存预算监控
+
+    通过 register() 登记组件（BoundedCache 或返回字节数的函数），
+    check() 在每轮结束时调用：采样RSS，超预算时先收缩缓存再强制GC。
+    """
+
+    def __init__(self, limit_mb=512, trim_fraction=0.5):
+        self.limit_bytes = int(limit_mb * 1024 * 1024) if limit_mb else None
+        self.trim_fraction = trim_fraction
+        self.components = {}
+        self.last_rss = 0
+        self.peak_rss = 0
+        self.trim_count = 0
+
+    def register(self, name, component):
+        self.components[name] = component
+
+    def component_bytes(self):
+        breakdown = {}
+        for name, component in self.components.items():
+            try:
+                if isinstance(component, BoundedCache):
+                    breakdown[name] = component.nbytes
+                else:
+                    breakdown[name] = int(component())
+            except Exception as e:
+                logging.debug(f"统计组件内存失败 {name}: {e}")
+        return breakdown
+
+    def trim(self):
+        """收缩所有已注册的缓存，返回淘汰的条目数"""
+        evicted = 0
+        for component in self.components.values():
+            if isinstance(component, BoundedCache):
+                evicted += component.trim(self.trim_fraction)
+        gc.collect()
+        self.trim_count += 1
+        return evicted
+
+    def check(self):
+        """采样RSS，超出预算时收缩缓存；返回 (是否仍超预算, 报告)"""
+        self.last_rss = read_rss_bytes()
+        self.peak_rss = max(self.peak_rss, self.last_rss)
+        over_budget = bool(self.limit_bytes and self.last_rss > self.limit_bytes)
+
+        if over_budget:
+            evicted = self.trim()
+            before = self.last_rss
+            self.last_rss = read_rss_bytes()
+            over_budget = self.last_rss > self.limit_bytes
+            logging.warning(
+                f"⚠️ 内存超出预算: RSS {before / 1048576:.1f}MB > {self.limit_bytes / 1048576:.0f}MB，"
+                f"已淘汰 {evicted} 个缓存条目，当前 {self.last_rss / 1048576:.1f}MB"
+            )
+
+        return over_budget, self.report()
+
+    def resample(self):
+        """释放其他资源之后重新采样RSS，返回 (是否仍超预算, 报告)"""
+        gc.collect()
+        self.last_rss = read_rss_bytes()
+        return bool(self.limit_bytes and self.last_rss > self.limit_bytes), self.report()
+
+    def report(self):
+        components = self.component_bytes()
+        return {
+            'rss_mb': round(self.last_rss / 1048576, 1),
+            'peak_rss_mb': round(self.peak_rss / 1048576, 1),
+            'limit_mb': round(self.limit_bytes / 1048576) if self.limit_bytes else None,
+            'trim_count': self.trim_count,
+            'components_kb': {name: round(size / 1024, 1) for name, size in components.items()},
+        }
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hacker News 爬虫 - 已发送消息的原地更新
+
+推送时记录每条消息的 message_id 以及消息中显示的分数/评论数。后台线程每个窗口期
+扫描一次今日已发送的新闻，只有分数档位或评论档位发生变化的消息才调用
+editMessageText，同一窗口内的多次数值变化合并为一次编辑，并按最小间隔限速。
+"""
+
+import logging
+import threading
+from bisect import bisect_right
+
+import pandas as pd
+import requests
+
+from news_item import NewsItem
+
+# 档位边界：数值跨过边界才编辑消息，避免每一分都触发API调用
+SCORE_BUCKETS = (25, 50, 100, 200, 300, 500, 750, 1000, 1500, 2000, 3000)
+COMMENT_BUCKETS = (10, 25, 50, 100, 200, 300, 500, 1000)
+
+
+def bucket(value, edges):
+    """数值所在的档位序号"""
+    if value is None or pd.isna(value):
+        return -1
+    return bisect_right(edges, int(value))
+
+
+class MessageEditor:
+    """按窗口合并、限速的 editMessageText 后台任务"""
+
+    def __init__(self, crawler, window_seconds=300, min_interval=3.0, max_edits_per_window=20):
+        self.crawler = crawler
+        self.api_url = f"https://api.telegram.org/bot{crawler.bot_token}"
+        self.window_seconds = window_seconds
+        self.min_interval = min_interval
+        self.max_edits_per_window = max_edits_per_window
+        self.stats = {'windows': 0, 'edits': 0, 'skipped': 0, 'failed': 0, 'rate_limited': 0}
+        self._session = requests.Session()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='message-editor', daemon=True)
+        self._thread.start()
+        logging.info(f"✏️ 消息原地更新已启动: 每 {self.window_seconds:.0f} 秒合并一次")
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.window_seconds):
+            try:
+                self.run_once()
+            except Exception as e:
+                logging.error(f"❌ 更新已发送消息失败: {e}")
+
+    def pending_edits(self, df):
+        """档位发生变化、需要编辑的已发送新闻行"""
+        if df.empty or 'message_id' not in df:
+            return df.iloc[0:0]
+        sent = df[df['is_sent'].fillna(False).astype(bool) & df['message_id'].notna()]
+        if sent.empty:
+            return sent
+        changed = [
+            bucket(row.score, SCORE_BUCKETS) != bucket(row.shown_score, SCORE_BUCKETS)
+            or bucket(row.comments, COMMENT_BUCKETS) != bucket(row.shown_comments, COMMENT_BUCKETS)
+            for row in sent.itertuples(index=False)
+        ]
+        # 变化最大的（分数最高的）优先
+        return sent[changed].sort_values('score', ascending=False)
+
+    def run_once(self):
+        """处理一个窗口：编辑档位变化的消息，批量记录新的显示值，返回编辑成功的数量"""
+        self.stats['windows'] += 1
+        pending = self.pending_edits(self.crawler.load_news_data())
+        if pending.empty:
+            return 0
+
+        shown = {}
+        items = NewsItem.from_frame(pending)
+        for i, news in enumerate(items):
+            if i >= self.max_edits_per_window:
+                self.stats['skipped'] += len(items) - i
+                break
+            index, _, total = (news.message_position or '1/1').partition('/')
+            text = self.crawler.format_message(news, int(index), int(total or index))
+
+            result = self._edit(news.message_id, text)
+            if result == 'rate_limited':
+                break
+            if result:
+                shown[news.id] = (news.score, news.comments)
+            if i + 1 < len(pending):
+                self._stop.wait(self.min_interval)
+
+        recorded = self.crawler.record_shown_stats(shown)
+        if shown:
+            logging.info(f"✏️ 更新 {len(shown)}/{len(pending)} 条已发送消息的分数/评论数")
+        return recorded
+
+    def _edit(self, message_id, text):
+        """调用editMessageText；返回True/False，触发限流时返回 'rate_limited'"""
+        try:
+            with self.crawler.proxy_pool.use('telegram') as proxies:
+                response = self._session.post(
+                    f"{self.api_url}/editMessageText",
+                    data={
+                        'chat_id': self.crawler.chat_id,
+                        'message_id': message_id,
+                        'text': text,
+                        'parse_mode': 'HTML',
+                        'disable_web_page_preview': False,
+                    },
+                    proxies=proxies,
+                    timeout=self.crawler.telegram_timeout
+                )
+            result = response.json()
+        except Exception as e:
+            self.stats['failed'] += 1
+            logging.warning(f"⚠️ 编辑消息 {message_id} 失败: {e}")
+            return False
+
+        if result.get('ok'):
+            self.stats['edits'] += 1
+            return True
+
+        description = result.get('description', '')
+        if response.status_code == 429:
+            retry_after = (result.get('parameters') or {}).get('retry_after', self.window_seconds)
+            self.stats['rate_limited'] += 1
+            logging.warning(f"⚠️ 编辑消息被限流，{retry_after} 秒后再试")
+            self._stop.wait(retry_after)
+            return 'rate_limited'
+        if 'message is not modified' in description or 'message to edit not found' in description:
+            # 内容未变或消息已被删除，记录为已显示，之后不再重试
+            return True
+        self.stats['failed'] += 1
+        logging.warning(f"⚠️ 编辑消息 {message_id} 失败: {description}")
+        return False
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hacker News 爬虫 - 新闻记录类型
+
+NewsItem 是贯穿整个流程（首页解析 -> 补全 -> CSV -> 工作队列 -> 推送/编辑）的统一记录:
+- 使用 __slots__，没有每个实例的 __dict__，字段固定
+- id 统一为 int；CSV 中的 NaN 在构造时一次性规整为 '' / 0 / None，下游不再做类型和空值判断
+- pack()/unpack() 提供紧凑的二进制序列化（定长数值头 + 变长UTF-8字符串），用于工作队列
+"""
+
+import json
+import struct
+
+# CSV 中持久化的字段，顺序即默认列顺序
+CSV_FIELDS = (
+    'id', 'title', 'title_cn', 'url', 'hn_url', 'score', 'comments',
+    'content_summary', 'content_summary_cn', 'crawl_time', 'sent_time', 'is_sent',
+    'message_id', 'message_position', 'shown_score', 'shown_comments', 'duplicate_of',
+)
+
+_TEXT_FIELDS = (
+    'title', 'title_cn', 'url', 'hn_url', 'content_summary', 'content_summary_cn',
+    'crawl_time', 'sent_time', 'message_position',
+)
+
+# id, score, comments, rank, message_id, shown_score, shown_comments, duplicate_of, flags
+_HEADER = struct.Struct('<qqqqqqqqB')
+# 各字符串字段及 trace(JSON) 的字节长度
+_LENGTHS = struct.Struct(f'<{len(_TEXT_FIELDS) + 1}I')
+_NONE = -1
+_FLAG_SENT = 1
+_FLAG_ENRICHED = 2
+
+
+def _text(value):
+    if value is None or (isinstance(value, float) and value != value):
+        return ''
+    return str(value)
+
+
+def _int(value, default=0):
+    if value is None or value == '' or (isinstance(value, float) and value != value):
+        return default
+    return int(value)
+
+
+def _bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() == 'true'
+    if value is None or (isinstance(value, float) and value != value):
+        return False
+    return bool(value)
+
+
+class NewsItem:
+    """一条新闻记录"""
+
+    __slots__ = CSV_FIELDS + ('rank', 'enriched', 'trace')
+
+    def __init__(self, id, title='', url='', hn_url='', score=0, comments=0, title_cn='',
+                 content_summary='', content_summary_cn='', crawl_time='', sent_time='', is_sent=False,
+                 message_id=None, message_position='', shown_score=None, shown_comments=None,
+                 rank=0, enriched=False, duplicate_of=None, trace=None):
+        self.id = int(id)
+        self.title = title
+        self.title_cn = title_cn
+        self.url = url
+        self.hn_url = hn_url
+        self.score = score
+        self.comments = comments
+        self.content_summary = content_summary
+        self.content_summary_cn = content_summary_cn
+        self.crawl_time = crawl_time
+        self.sent_time = sent_time
+        self.is_sent = is_sent
+        self.message_id = message_id
+        self.message_position = message_position
+        self.shown_score = shown_score
+        self.shown_comments = shown_comments
+        self.rank = rank
+        self.enriched = enriched
+        self.duplicate_of = duplicate_of
+        self.trace = trace
+
+    def __repr__(self):
+        return f"NewsItem(id={self.id}, score={self.score}, title={self.title!r})"
+
+    @classmethod
+    def from_row(cls, row):
+        """从CSV行（或任意映射）构造，NaN 在这里统一规整"""
+        content_summary = _text(row.get('content_summary'))
+        return cls(
+            id=row['id'],
+            title=_text(row.get('title')),
+            title_cn=_text(row.get('title_cn')),
+            url=_text(row.get('url')),
+            hn_url=_text(row.get('hn_url')),
+            score=_int(row.get('score')),
+            comments=_int(row.get('comments')),
+            content_summary=content_summary,
+            content_summary_cn=_text(row.get('content_summary_cn')),
+            crawl_time=_text(row.get('crawl_time')),
+            sent_time=_text(row.get('sent_time')),
+            is_sent=_bool(row.get('is_sent')),
+            message_id=_int(row.get('message_id'), None),
+            message_position=_text(row.get('message_position')),
+            shown_score=_int(row.get('shown_score'), None),
+            shown_comments=_int(row.get('shown_comments'), None),
+            duplicate_of=_int(row.get('duplicate_of'), None),
+            # 摘要为空说明昂贵字段尚未补全
+            enriched=bool(content_summary),
+        )
+
+    @classmethod
+    def from_frame(cls, df):
+        """按列批量转换 DataFrame，避免 iterrows() 逐行构造 Series"""
+        columns = [column for column in CSV_FIELDS if column in df.columns]
+        return [
+            cls.from_row(dict(zip(columns, values)))
+            for values in zip(*(df[column].tolist() for column in columns))
+        ]
+
+    def to_row(self):
+        """CSV行"""
+        return {field: getattr(self, field) for field in CSV_FIELDS}
+
+    def pack(self):
+        """紧凑二进制序列化"""
+        flags = (_FLAG_SENT if self.is_sent else 0) | (_FLAG_ENRICHED if self.enriched else 0)
+        header = _HEADER.pack(
+            self.id, self.score, self.comments, self.rank,
+            _NONE if self.message_id is None else self.message_id,
+            _NONE if self.shown_score is None else self.shown_score,
+            _NONE if self.shown_comments is None else self.shown_comments,
+            _NONE if self.duplicate_of is None else int(self.duplicate_of),
+            flags
+        )
+        encoded = [getattr(self, field).encode('utf-8') for field in _TEXT_FIELDS]
+        encoded.append(json.dumps(self.trace, separators=(',', ':')).encode('utf-8') if self.trace else b'')
+        return header + _LENGTHS.pack(*map(len, encoded)) + b''.join(encoded)
+
+    @classmethod
+    def unpack(cls, data):
+        (news_id, score, comments, rank, message_id, shown_score, shown_comments,
+         duplicate_of, flags) = _HEADER.unpack_from(data, 0)
+        lengths = _LENGTHS.unpack_from(data, _HEADER.size)
+        view = memoryview(data)
+        offset = _HEADER.size + _LENGTHS.size
+        values = []
+        for length in lengths:
+            values.append(bytes(view[offset:offset + length]).decode('utf-8'))
+            offset += length
+        item = cls(
+            news_id, score=score, comments=comments, rank=rank,
+            message_id=None if message_id == _NONE else message_id,
+            shown_score=None if shown_score == _NONE else shown_score,
+            shown_comments=None if shown_comments == _NONE else shown_comments,
+            duplicate_of=None if duplicate_of == _NONE else duplicate_of,
+            is_sent=bool(flags & _FLAG_SENT),
+            enriched=bool(flags & _FLAG_ENRICHED),
+            trace=json.loads(values[-1]) if values[-1] else None,
+        )
+        for field, value in zip(_TEXT_FIELDS, values):
+            setattr(item, field, value)
+        return item
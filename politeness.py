@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hacker News 爬虫 - 按域名的礼貌抓取调度
+
+正文抓取（get_article_content）前先在这里排队:
+
+- 每个域名有独立的并发上限和两次请求之间的最小间隔，间隔取 PER_HOST_DELAY 与
+  robots.txt 中 Crawl-delay 的较大值（有上限）；429/503 响应按 Retry-After 暂停该域名
+- robots.txt 按域名缓存（有TTL，获取失败时缓存较短时间），不允许抓取的页面直接跳过
+- 批量抓取时按域名轮转分派到线程池：同一域名的链接依次进行，不同域名之间并行，
+  总吞吐量不受单个慢域名影响
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+from memory_budget import BoundedCache
+
+
+class HostBusy(RuntimeError):
+    """域名被暂停的时间超过可接受的等待上限"""
+
+
+def host_of(url):
+    try:
+        return (urlsplit(url).hostname or '').lower()
+    except ValueError:
+        return ''
+
+
+class HostState:
+    """一个域名的调度状态"""
+
+    __slots__ = ('active', 'next_allowed', 'requests', 'penalties')
+
+    def __init__(self):
+        self.active = 0
+        self.next_allowed = 0.0
+        self.requests = 0
+        self.penalties = 0
+
+
+class PolitenessScheduler:
+    """按域名限制并发和频率、遵守 robots.txt 的抓取调度器"""
+
+    def __init__(self, fetch, max_workers=8, per_host_concurrency=1, per_host_delay=1.0,
+                 max_crawl_delay=30.0, respect_robots=True, user_agent='*',
+                 robots_ttl=86400, robots_error_ttl=3600, robots_cache_size=2000, max_wait=60.0,
+                 max_hosts=1000):
+        """fetch(url, timeout=...) 用于获取 robots.txt；
+        需要等待超过 max_wait 秒（通常是域名被限流暂停）时不再等待，抛出 HostBusy；
+        域名状态超过 max_hosts 个时清理空闲的域名"""
+        self.fetch = fetch
+        self.max_wait = max_wait
+        self.max_workers = max_workers
+        self.per_host_concurrency = per_host_concurrency
+        self.per_host_delay = per_host_delay
+        self.max_crawl_delay = max_crawl_delay
+        self.respect_robots = respect_robots
+        self.user_agent = user_agent
+        self.robots_ttl = robots_ttl
+        self.robots_error_ttl = robots_error_ttl
+        # host -> (RobotFileParser或None, 过期时间, robots.txt原文)
+        self.robots = BoundedCache('robots', max_entries=robots_cache_size)
+        self.hosts = {}
+        self.max_hosts = max_hosts
+        self.stats = {'scheduled': 0, 'robots_fetched': 0, 'robots_blocked': 0, 'penalties': 0, 'waited_s': 0.0}
+        self._cond = threading.Condition()
+        # 当前线程占用的域名：站点提取器会请求API域名，限流时应暂停的是文章所在的域名
+        self._local = threading.local()
+
+    def _state(self, host):
+        state = self.hosts.get(host)
+        if state is None:
+            if len(self.hosts) >= self.max_hosts:
+                self.prune()
+            state = self.hosts[host] = HostState()
+        return state
+
+    def prune(self):
+        """删除空闲的域名状态（没有进行中的请求、间隔/暂停期已过），返回删除数量"""
+        now = time.time()
+        with self._cond:
+            idle = [host for host, state in self.hosts.items() if state.active == 0 and state.next_allowed <= now]
+            for host in idle:
+                del self.hosts[host]
+        return len(idle)
+
+    def _robots(self, host, scheme='https'):
+        """域名的 robots.txt 解析结果（带TTL缓存）；没有或获取失败时返回None，视为全部允许"""
+        cached = self.robots.get(host)
+        if cached is not None and cached[1] > time.time():
+            return cached[0]
+
+        parser, ttl, text = None, self.robots_error_ttl, None
+        try:
+            response = self.fetch(f"{scheme}://{host}/robots.txt", timeout=10)
+            self.stats['robots_fetched'] += 1
+            if response.status_code == 200:
+                text = response.text
+                parser = RobotFileParser()
+                parser.parse(text.splitlines())
+                ttl = self.robots_ttl
+            elif 400 <= response.status_code < 500:
+                # 不存在 robots.txt：全部允许，按正常TTL缓存
+                ttl = self.robots_ttl
+        except Exception as e:
+            logging.debug(f"获取 {host} 的 robots.txt 失败: {e}")
+        self.robots.set(host, (parser, time.time() + ttl, text))
+        return parser
+
+    def allowed(self, url):
+        """robots.txt 是否允许抓取该URL"""
+        if not self.respect_robots:
+            return True
+        parts = urlsplit(url)
+        if not parts.hostname:
+            return True
+        parser = self._robots(parts.hostname.lower(), parts.scheme or 'https')
+        if parser is None or parser.can_fetch(self.user_agent, url):
+            return True
+        self.stats['robots_blocked'] += 1
+        return False
+
+    def host_delay(self, host):
+        """两次请求之间的最小间隔：PER_HOST_DELAY 与 Crawl-delay 取较大值"""
+        delay = self.per_host_delay
+        if self.respect_robots:
+            cached = self.robots.get(host)
+            parser = cached[0] if cached else None
+            crawl_delay = parser.crawl_delay(self.user_agent) if parser else None
+            if crawl_delay:
+                delay = max(delay, min(float(crawl_delay), self.max_crawl_delay))
+        return delay
+
+    def penalize(self, url, retry_after=None):
+        """收到 429/503 时暂停该域名（在 slot() 内调用时为当前占用的域名）"""
+        host = getattr(self._local, 'host', None) or host_of(url)
+        try:
+            pause = float(retry_after) if retry_after else 60.0
+        except ValueError:
+            pause = 60.0
+        pause = min(pause, 600.0)
+        with self._cond:
+            state = self._state(host)
+            state.next_allowed = max(state.next_allowed, time.time() + pause)
+            state.penalties += 1
+            self.stats['penalties'] += 1
+        logging.info(f"🐢 {host} 返回限流响应，暂停 {pause:.0f} 秒")
+
+    def ready(self, host, now=None):
+        state = self.hosts.get(host)
+        if state is None:
+            return True
+        return state.active < self.per_host_concurrency and state.next_allowed <= (now or time.time())
+
+    @contextmanager
+    def slot(self, url):
+        """占用域名的一个抓取名额，必要时等待并发名额和请求间隔"""
+        host = host_of(url)
+        start = time.time()
+        with self._cond:
+            while True:
+                state = self._state(host)
+                now = time.time()
+                if state.active < self.per_host_concurrency and state.next_allowed <= now:
+                    break
+                if state.next_allowed - now > self.max_wait:
+                    raise HostBusy(f"{host} 暂停中，{state.next_allowed - now:.0f} 秒后才能抓取")
+                timeout = state.next_allowed - now if state.active < self.per_host_concurrency else None
+                self._cond.wait(timeout)
+            state.active += 1
+            state.requests += 1
+            self.stats['scheduled'] += 1
+            self.stats['waited_s'] += time.time() - start
+        self._local.host = host
+        try:
+            yield
+        finally:
+            self._local.host = None
+            delay = self.host_delay(host)
+            with self._cond:
+                state.active -= 1
+                state.next_allowed = max(state.next_allowed, time.time() + delay)
+                self._cond.notify_all()
+
+    def run(self, items, func, url_of):
+        """按域名轮转并发执行 func(item)，返回 {序号: 结果}（异常时为None）
+
+        func 内部应通过 slot() 占用名额；这里只负责挑选当前可以开始的域名，
+        避免线程阻塞在同一个繁忙的域名上
+        """
+        queues = OrderedDict()
+        for index, item in enumerate(items):
+            queues.setdefault(host_of(url_of(item)), []).append((index, item))
+        results = {}
+        in_flight = {}
+        dispatched = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while queues or in_flight:
+                now = time.time()
+                for host in list(queues):
+                    if len(in_flight) >= self.max_workers:
+                        break
+                    if dispatched.get(host, 0) >= self.per_host_concurrency:
+                        continue
+                    # 暂停时间超过上限的域名直接分派，由 slot() 立即抛出 HostBusy
+                    state = self.hosts.get(host)
+                    if state and not self.ready(host, now) and state.next_allowed - now <= self.max_wait:
+                        continue
+                    index, item = queues[host].pop(0)
+                    if not queues[host]:
+                        del queues[host]
+                    else:
+                        # 轮转：刚分派过的域名排到最后
+                        queues.move_to_end(host)
+                    dispatched[host] = dispatched.get(host, 0) + 1
+                    in_flight[executor.submit(func, item)] = (index, host)
+
+                if not in_flight:
+                    # 所有待抓取的域名都在间隔期内，等到最早的一个可以开始
+                    states = [self.hosts.get(h) for h in queues]
+                    wake = min((state.next_allowed for state in states if state), default=now)
+                    time.sleep(min(max(0.01, wake - now), 1.0))
+                    continue
+
+                done, _ = wait(list(in_flight), timeout=0.5, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, host = in_flight.pop(future)
+                    dispatched[host] -= 1
+                    try:
+                        results[index] = future.result()
+                    except Exception as e:
+                        logging.error(f"❌ 抓取任务失败: {e}")
+                        results[index] = None
+        return results
+
+    def export_state(self):
+        """导出未过期的 robots.txt 缓存和仍在间隔/暂停期内的域名（供热重启快照）"""
+        now = time.time()
+        robots = [[host, cached[2], cached[1]] for host, cached in self.robots.items() if cached[1] > now]
+        with self._cond:
+            hosts = {host: [state.next_allowed, state.penalties]
+                     for host, state in self.hosts.items() if state.next_allowed > now}
+        return {'robots': robots, 'hosts': hosts}
+
+    def load_state(self, state):
+        now = time.time()
+        for host, text, expires in state.get('robots', []):
+            if expires <= now:
+                continue
+            parser = None
+            if text is not None:
+                parser = RobotFileParser()
+                parser.parse(text.splitlines())
+            self.robots.set(host, (parser, expires, text))
+        with self._cond:
+            for host, (next_allowed, penalties) in state.get('hosts', {}).items():
+                host_state = self._state(host)
+                host_state.next_allowed = max(host_state.next_allowed, next_allowed)
+                host_state.penalties = penalties
+
+    def snapshot(self):
+        with self._cond:
+            busiest = sorted(self.hosts.items(), key=lambda item: item[1].requests, reverse=True)[:10]
+            return dict(self.stats, hosts=len(self.hosts), robots_cached=len(self.robots),
+                        busiest={host: state.requests for host, state in busiest})
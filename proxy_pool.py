@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hacker News 爬虫 - 代理池
+
+按线路（hn / article / translate / telegram）分别配置一组代理，每次请求使用该线路上
+当前延迟最低的健康代理:
+
+- 后台线程定期通过每个代理访问该线路的探测URL，测量延迟（EWMA平滑）
+- 实际请求中连接代理失败（ProxyError、连接超时）同样计入，连续失败达到阈值即剔除
+- 被剔除的代理继续接受探测，连续探测成功后重新加入
+- 线路上所有代理都不健康时退回失败次数最少的一个，不会让请求无代理可用
+
+配置中的 DIRECT 表示直连，可与代理一起参与延迟比较。
+"""
+
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+import requests
+
+ROUTES = ('hn', 'article', 'translate', 'telegram')
+
+DIRECT = 'DIRECT'
+
+# 各线路默认的探测URL：只看代理能否快速建立连接并收到响应，不关心状态码
+DEFAULT_PROBE_URLS = {
+    'hn': 'https://news.ycombinator.com/robots.txt',
+    'article': 'https://www.google.com/generate_204',
+    'translate': 'https://translate.googleapis.com/',
+    'telegram': 'https://api.telegram.org/',
+}
+
+# 实际请求中只有这些异常计入代理失败，目标站点本身不可达（文章链接失效等）不算代理的问题
+PROXY_ERRORS = (
+    requests.exceptions.ProxyError,
+    requests.exceptions.ConnectTimeout,
+)
+
+
+def to_requests_proxies(proxy):
+    """代理地址 -> requests 的 proxies 参数"""
+    if proxy == DIRECT:
+        return {}
+    return {'http': proxy, 'https': proxy}
+
+
+class ProxyState:
+    """某条线路上一个代理的健康状态"""
+
+    __slots__ = ('proxy', 'latency', 'healthy', 'failures', 'successes', 'requests', 'errors', 'last_error')
+
+    def __init__(self, proxy):
+        self.proxy = proxy
+        self.latency = None
+        self.healthy = True
+        self.failures = 0
+        self.successes = 0
+        self.requests = 0
+        self.errors = 0
+        self.last_error = ''
+
+    def to_dict(self):
+        return {
+            'proxy': self.proxy,
+            'latency_ms': round(self.latency * 1000, 1) if self.latency is not None else None,
+            'healthy': self.healthy,
+            'failures': self.failures,
+            'requests': self.requests,
+            'errors': self.errors,
+            'last_error': self.last_error,
+        }
+
+
+class StaticProxies:
+    """未配置代理池时的兼容实现：所有线路使用同一组固定代理"""
+
+    def __init__(self, proxies=None):
+        self.proxies = proxies or {}
+
+    @contextmanager
+    def use(self, route):
+        yield self.proxies
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def export_state(self):
+        return {}
+
+    def load_state(self, state):
+        pass
+
+    def snapshot(self):
+        return {}
+
+
+class ProxyPool:
+    """按线路分组、延迟优先、自动剔除和恢复的代理池"""
+
+    def __init__(self, routes, fallback=None, probe_urls=None, probe_interval=30, probe_timeout=5,
+                 eject_failures=3, readmit_successes=2, alpha=0.3):
+        """routes: {线路: [代理地址, ...]}；未配置的线路使用 fallback（固定代理）"""
+        self.fallback = fallback or {}
+        self.probe_urls = dict(DEFAULT_PROBE_URLS, **(probe_urls or {}))
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.eject_failures = eject_failures
+        self.readmit_successes = readmit_successes
+        self.alpha = alpha
+        self.routes = {
+            route: [ProxyState(proxy) for proxy in proxies]
+            for route, proxies in routes.items() if proxies
+        }
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_env(cls, fallback=None):
+        """从环境变量构造：PROXY_POOL 为默认列表，PROXY_POOL_<线路> 覆盖单条线路
+
+        没有任何线路配置代理时返回 StaticProxies(fallback)
+        """
+        default = os.getenv('PROXY_POOL', '')
+        routes = {}
+        probe_urls = {}
+        for route in ROUTES:
+            value = os.getenv(f'PROXY_POOL_{route.upper()}', default)
+            proxies = [item.strip() for item in value.split(',') if item.strip()]
+            if proxies:
+                routes[route] = proxies
+            probe_url = os.getenv(f'PROXY_PROBE_URL_{route.upper()}')
+            if probe_url:
+                probe_urls[route] = probe_url
+        if not routes:
+            return StaticProxies(fallback)
+        return cls(
+            routes,
+            fallback=fallback,
+            probe_urls=probe_urls,
+            probe_interval=float(os.getenv('PROXY_PROBE_INTERVAL', 30)),
+            probe_timeout=float(os.getenv('PROXY_PROBE_TIMEOUT', 5)),
+            eject_failures=int(os.getenv('PROXY_EJECT_FAILURES', 3))
+        )
+
+    def select(self, route):
+        """线路上当前延迟最低的健康代理；未配置的线路返回None"""
+        states = self.routes.get(route)
+        if not states:
+            return None
+        with self._lock:
+            healthy = [state for state in states if state.healthy]
+            if not healthy:
+                return min(states, key=lambda state: state.failures)
+            # 尚未测得延迟的代理按配置顺序排在已测得延迟的之后
+            return min(healthy, key=lambda state: (state.latency is None, state.latency or 0.0))
+
+    @contextmanager
+    def use(self, route):
+        """为一次请求选择代理，返回 requests 的 proxies 参数，并把请求成败反馈给代理池"""
+        state = self.select(route)
+        if state is None:
+            yield self.fallback
+            return
+        try:
+            yield to_requests_proxies(state.proxy)
+        except PROXY_ERRORS as e:
+            self._record(route, state, None, e)
+            raise
+        else:
+            self._record(route, state, None, None, passive=True)
+
+    def _record(self, route, state, latency, error, passive=False):
+        with self._lock:
+            state.requests += 1
+            if error is not None:
+                state.errors += 1
+                state.failures += 1
+                state.successes = 0
+                state.last_error = f"{type(error).__name__}: {error}"[:200]
+                if state.healthy and state.failures >= self.eject_failures:
+                    state.healthy = False
+                    logging.warning(f"🚫 代理 {state.proxy} 在线路 {route} 上连续失败 {state.failures} 次，暂时剔除")
+                return
+
+            state.failures = 0
+            state.successes += 1
+            # 延迟只取探测结果：实际请求的耗时取决于目标站点和响应大小
+            if latency is not None:
+                state.latency = latency if state.latency is None else (
+                    self.alpha * latency + (1 - self.alpha) * state.latency
+                )
+            if not state.healthy and not passive and state.successes >= self.readmit_successes:
+                state.healthy = True
+                logging.info(f"✅ 代理 {state.proxy} 在线路 {route} 上恢复，重新加入")
+
+    def probe(self, route, state):
+        """通过代理访问线路的探测URL，任何HTTP响应都视为代理可用"""
+        start = time.time()
+        try:
+            response = requests.head(
+                self.probe_urls[route],
+                proxies=to_requests_proxies(state.proxy),
+                timeout=self.probe_timeout,
+                allow_redirects=False
+            )
+            response.close()
+        except requests.exceptions.RequestException as e:
+            self._record(route, state, None, e)
+            return False
+        self._record(route, state, time.time() - start, None)
+        return True
+
+    def probe_all(self):
+        for route, states in self.routes.items():
+            for state in states:
+                if self._stop.is_set():
+                    return
+                self.probe(route, state)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='proxy-health', daemon=True)
+        self._thread.start()
+        summary = ', '.join(f"{route} {len(states)} 个" for route, states in self.routes.items())
+        logging.info(f"🧭 代理池已启用 ({summary})，每 {self.probe_interval:g} 秒探测一次")
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.probe_all()
+            except Exception as e:
+                logging.error(f"❌ 代理健康探测失败: {e}")
+            self._stop.wait(self.probe_interval)
+
+    def export_state(self):
+        """各代理的延迟和健康状态（供热重启快照）"""
+        with self._lock:
+            return {
+                route: {state.proxy: [state.latency, state.healthy, state.failures] for state in states}
+                for route, states in self.routes.items()
+            }
+
+    def load_state(self, saved):
+        """恢复仍在配置中的代理的状态，配置已变化的线路/代理忽略"""
+        with self._lock:
+            for route, states in self.routes.items():
+                for state in states:
+                    if state.proxy in saved.get(route, {}):
+                        state.latency, state.healthy, state.failures = saved[route][state.proxy]
+
+    def snapshot(self):
+        """各线路代理状态，供状态查询"""
+        with self._lock:
+            return {route: [state.to_dict() for state in states] for route, states in self.routes.items()}
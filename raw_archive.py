@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hacker News 爬虫 - 原始响应归档与离线回放
+
+把抓取到的原始响应（HN首页、正文及站点提取器的API响应、翻译结果）按天写入
+只追加的分段文件，类似 WARC:
+
+    RAW_ARCHIVE_DIR/2025-05-24/seg-00001.zst    每条记录是一个独立的压缩帧
+    RAW_ARCHIVE_DIR/2025-05-24/index.jsonl      每行一条: url、类型、时间、状态码、分段、偏移、长度
+
+压缩帧内是一行JSON元数据（url、状态码、Content-Type）加原始响应体，
+通过索引可直接 seek 到任意一条记录解压，不需要扫描整个分段。
+流式响应（如PDF）在调用方读完响应体后归档，读到一半放弃的（超过大小限制）不归档，回放时按网络错误处理。
+超过保留天数（RAW_ARCHIVE_RETENTION_DAYS）的日期目录在每天第一次写入时删除。
+优先使用 zstandard，未安装时退回标准库 zlib（分段后缀为 .zz），读取时按后缀选择解码。
+
+回放模式用归档代替网络，重新执行首页解析、正文提取、摘要和翻译，
+改进解析/摘要算法后可以在历史数据上全速重跑；归档也可作为基准测试的真实语料。
+
+用法:
+  python raw_archive.py stats [--date 2025-05-24]
+  python raw_archive.py replay --date 2025-05-24 [--output data/replay/hn_news_2025-05-24.csv]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import fcntl
+import shutil
+import argparse
+import logging
+import threading
+from datetime import datetime, timedelta
+from collections import Counter, defaultdict
+
+import requests
+from requests.utils import get_encoding_from_headers
+from dotenv import load_dotenv
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖
+    zstandard = None
+
+DAY_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+INDEX_FILE = 'index.jsonl'
+KINDS = ('frontpage', 'article', 'translate')
+
+
+def _codec_suffix():
+    return '.zst' if zstandard is not None else '.zz'
+
+
+def _decompress(segment_name, data):
+    if segment_name.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError("读取 .zst 分段需要安装zstandard: pip install zstandard")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+class ArchivedResponse:
+    """归档中的一条响应，提供爬虫和提取器用到的 requests.Response 接口"""
+
+    def __init__(self, url, status_code, content, content_type=''):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = {'Content-Type': content_type} if content_type else {}
+        self.encoding = get_encoding_from_headers(self.headers) if content_type else None
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} (归档) for url: {self.url}", response=self)
+
+    def iter_content(self, chunk_size=65536):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def close(self):
+        pass
+
+
+class RecordingResponse:
+    """流式响应的包装：调用方通过 iter_content 读完响应体、close() 时归档"""
+
+    def __init__(self, archive, url, response, kind):
+        self._archive = archive
+        self._url = url
+        self._response = response
+        self._kind = kind
+        self._chunks = []
+        self._complete = False
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+    def iter_content(self, chunk_size=1, decode_unicode=False):
+        for chunk in self._response.iter_content(chunk_size=chunk_size, decode_unicode=decode_unicode):
+            self._chunks.append(chunk)
+            yield chunk
+        self._complete = True
+
+    def close(self):
+        self._response.close()
+        if self._complete and self._chunks is not None:
+            self._archive.record(self._url, self._response, self._kind, content=b''.join(self._chunks))
+        self._chunks = None
+
+
+class RawArchive:
+    """按天分目录的只追加分段归档，线程安全，多进程通过文件锁串行追加"""
+
+    def __init__(self, directory, segment_max_bytes=64 * 1024 * 1024, level=3, retention_days=14):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.level = level
+        self.retention_days = retention_days
+        self._day = None
+        self._lock = threading.Lock()
+        self._compressor = zstandard.ZstdCompressor(level=level) if zstandard is not None else None
+        self.stats = {'records': 0, 'raw_bytes': 0, 'stored_bytes': 0, 'errors': 0}
+        os.makedirs(directory, exist_ok=True)
+
+    def _compress(self, data):
+        if self._compressor is not None:
+            return self._compressor.compress(data)
+        return zlib.compress(data, min(self.level, 9))
+
+    def day_dir(self, day):
+        return os.path.join(self.directory, day)
+
+    def days(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name for name in os.listdir(self.directory) if DAY_PATTERN.match(name))
+
+    def _current_segment(self, day_dir):
+        """当前可追加的分段文件名，超过大小上限时开新分段"""
+        suffix = _codec_suffix()
+        segments = sorted(name for name in os.listdir(day_dir) if name.startswith('seg-') and name.endswith(suffix))
+        if segments:
+            last = segments[-1]
+            if os.path.getsize(os.path.join(day_dir, last)) < self.segment_max_bytes:
+                return last
+            number = int(last[4:9]) + 1
+        else:
+            number = 1
+        return f"seg-{number:05d}{suffix}"
+
+    def wrap_stream(self, url, response, kind):
+        """流式响应改为读完后归档（见 RecordingResponse）"""
+        return RecordingResponse(self, url, response, kind)
+
+    def _remove_expired(self, today):
+        """删除超过保留天数的日期目录；多个进程同时删除时忽略已不存在的目录"""
+        if not self.retention_days:
+            return
+        cutoff = (datetime.strptime(today, '%Y-%m-%d') - timedelta(days=self.retention_days - 1)).strftime('%Y-%m-%d')
+        for day in self.days():
+            if day < cutoff:
+                shutil.rmtree(self.day_dir(day), ignore_errors=True)
+                logging.info(f"🧹 删除过期的原始响应归档: {day}")
+
+    def record(self, url, response, kind, content=None):
+        """归档一条响应（content 为流式响应已读出的响应体），失败只记录日志，不影响抓取"""
+        try:
+            if content is None:
+                content = response.content or b''
+            meta = {
+                'url': url,
+                'final_url': getattr(response, 'url', url),
+                'status': response.status_code,
+                'content_type': response.headers.get('Content-Type', ''),
+            }
+            raw = json.dumps(meta, ensure_ascii=False).encode('utf-8') + b'\n' + content
+            frame = self._compress(raw)
+            day = datetime.now().strftime('%Y-%m-%d')
+            day_dir = self.day_dir(day)
+
+            with self._lock:
+                if day != self._day:
+                    self._day = day
+                    self._remove_expired(day)
+                os.makedirs(day_dir, exist_ok=True)
+                with open(os.path.join(day_dir, INDEX_FILE), 'a', encoding='utf-8') as index_file:
+                    # 索引文件锁同时保护分段追加，保证多进程下偏移量正确
+                    fcntl.flock(index_file.fileno(), fcntl.LOCK_EX)
+                    try:
+                        segment = self._current_segment(day_dir)
+                        with open(os.path.join(day_dir, segment), 'ab') as f:
+                            offset = f.tell()
+                            f.write(frame)
+                        index_file.write(json.dumps({
+                            'u': url, 'k': kind, 't': round(time.time(), 3), 's': response.status_code,
+                            'f': segment, 'o': offset, 'n': len(frame),
+                        }, ensure_ascii=False) + '\n')
+                    finally:
+                        fcntl.flock(index_file.fileno(), fcntl.LOCK_UN)
+
+                self.stats['records'] += 1
+                self.stats['raw_bytes'] += len(raw)
+                self.stats['stored_bytes'] += len(frame)
+        except Exception as e:
+            self.stats['errors'] += 1
+            logging.warning(f"⚠️ 归档原始响应失败 {url}: {e}")
+
+    def index(self, day):
+        """读取某天的索引，返回按写入顺序排列的条目列表"""
+        path = os.path.join(self.day_dir(day), INDEX_FILE)
+        entries = []
+        if not os.path.exists(path):
+            return entries
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue
+        return entries
+
+    def read(self, day, entry):
+        """按索引条目读取并解压一条记录"""
+        with open(os.path.join(self.day_dir(day), entry['f']), 'rb') as f:
+            f.seek(entry['o'])
+            data = f.read(entry['n'])
+        meta_line, _, content = _decompress(entry['f'], data).partition(b'\n')
+        meta = json.loads(meta_line)
+        return ArchivedResponse(meta.get('final_url', meta['url']), meta['status'], content, meta.get('content_type', ''))
+
+    def iter_records(self, days=None, kind=None):
+        """遍历归档记录 (day, entry, response)，可作为基准测试语料"""
+        for day in days or self.days():
+            for entry in self.index(day):
+                if kind is None or entry['k'] == kind:
+                    yield day, entry, self.read(day, entry)
+
+
+class ReplayFetcher:
+    """用归档代替网络的 fetch，同一URL取最后一次归档的响应；未归档的URL按网络错误处理"""
+
+    def __init__(self, archive, days):
+        self.archive = archive
+        self.entries = {}
+        for day in days:
+            for entry in archive.index(day):
+                self.entries[entry['u']] = (day, entry)
+        self.hits = 0
+        self.misses = Counter()
+
+    def __call__(self, url, headers=None, stream=False, timeout=None):
+        found = self.entries.get(url)
+        if found is None:
+            self.misses[_host(url)] += 1
+            raise requests.exceptions.ConnectionError(f"回放模式: 未归档 {url}")
+        self.hits += 1
+        return self.archive.read(*found)
+
+
+def _host(url):
+    match = re.match(r'^[a-z]+://([^/?#]+)', url or '')
+    return match.group(1) if match else ''
+
+
+def replay(archive, day, output=None, translate=True, limit=None):
+    """在归档数据上重跑首页解析 -> 正文提取 -> 摘要 -> 翻译，不访问网络
+
+    返回统计信息；output 不为空时把结果写入CSV（与每日CSV相同的列）
+    """
+    import pandas as pd
+    import tracing
+    from hn_news_crawler import HackerNewsCrawler
+    from news_item import CSV_FIELDS
+
+    # 离线模式只构造解析、提取和摘要所需部分：不碰线上的每日CSV，不做近似去重，
+    # 不写追踪日志和订阅源，不启动代理池和按域名限速
+    crawler = HackerNewsCrawler(offline=True)
+    # 按需补全可能发生在发现的次日，翻译也可能命中更早归档的结果，因此载入当天及之前的索引
+    fetcher = ReplayFetcher(archive, [d for d in archive.days() if d <= day])
+    crawler.replay = fetcher
+    if not translate:
+        crawler.translate_text = lambda text: text
+
+    # 合并当天所有首页快照，同一新闻保留最后一次的分数/评论数
+    stories = {}
+    frontpages = 0
+    parse_start = time.time()
+    for _, entry, response in archive.iter_records([day], kind='frontpage'):
+        frontpages += 1
+        for news in crawler.parse_frontpage(response.content):
+            news.crawl_time = datetime.fromtimestamp(entry['t']).isoformat()
+            stories[news.id] = news
+    parse_time = time.time() - parse_start
+
+    news_list = sorted(stories.values(), key=lambda n: n.score, reverse=True)
+    if limit:
+        news_list = news_list[:limit]
+
+    stage_ms = defaultdict(float)
+    start = time.time()
+    for news in news_list:
+        tracing.begin(news)
+        crawler.enrich_news(news)
+        for stage, _, duration in news.trace['spans']:
+            stage_ms[stage] += duration
+        news.trace = None
+    elapsed = time.time() - start
+
+    if output and news_list:
+        os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+        pd.DataFrame([news.to_row() for news in news_list], columns=list(CSV_FIELDS)).to_csv(
+            output, index=False, encoding='utf-8'
+        )
+
+    return {
+        'day': day,
+        'frontpages': frontpages,
+        'stories': len(news_list),
+        'parse_s': parse_time,
+        'enrich_s': elapsed,
+        'stage_ms': dict(stage_ms),
+        'hits': fetcher.hits,
+        'misses': sum(fetcher.misses.values()),
+        'miss_hosts': fetcher.misses.most_common(5),
+    }
+
+
+def print_stats(archive, days):
+    for day in days:
+        entries = archive.index(day)
+        by_kind = Counter(entry['k'] for entry in entries)
+        segments = sorted({entry['f'] for entry in entries})
+        stored = sum(os.path.getsize(os.path.join(archive.day_dir(day), name))
+                     for name in segments if os.path.exists(os.path.join(archive.day_dir(day), name)))
+        kinds = ', '.join(f"{kind} {by_kind.get(kind, 0)}" for kind in KINDS)
+        print(f"📦 {day}: {len(entries)} 条记录 ({kinds}) | {len(segments)} 个分段 | {stored / 1024 / 1024:.2f} MB")
+
+
+def main():
+    load_dotenv('config.env')
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    data_dir = os.getenv('DATA_DIR', 'data')
+    default_dir = os.getenv('RAW_ARCHIVE_DIR', os.path.join(data_dir, 'raw'))
+
+    parser = argparse.ArgumentParser(description='Hacker News 原始响应归档与离线回放')
+    parser.add_argument('--archive-dir', default=default_dir)
+    sub = parser.add_subparsers(dest='command')
+
+    stats_parser = sub.add_parser('stats', help='各天的归档记录数和体积')
+    stats_parser.add_argument('--date', help='只看某一天 (YYYY-MM-DD)')
+
+    replay_parser = sub.add_parser('replay', help='用归档数据离线重跑解析、摘要和翻译')
+    replay_parser.add_argument('--date', required=True, help='回放日期 (YYYY-MM-DD)')
+    replay_parser.add_argument('--output', help='结果CSV (默认 DATA_DIR/replay/hn_news_DATE.csv)')
+    replay_parser.add_argument('--no-translate', action='store_true', help='跳过翻译，只重跑提取和摘要')
+    replay_parser.add_argument('--limit', type=int, help='只回放分数最高的前N条')
+
+    args = parser.parse_args()
+    archive = RawArchive(args.archive_dir)
+
+    try:
+        if args.command == 'stats':
+            days = [args.date] if args.date else archive.days()
+            if not days:
+                print("📭 归档为空")
+            print_stats(archive, days)
+        elif args.command == 'replay':
+            output = args.output or os.path.join(data_dir, 'replay', f'hn_news_{args.date}.csv')
+            result = replay(archive, args.date, output=output, translate=not args.no_translate, limit=args.limit)
+            print(f"🔁 {result['day']}: {result['frontpages']} 个首页快照, {result['stories']} 条新闻")
+            rate = result['stories'] / result['enrich_s'] if result['enrich_s'] > 0 else 0
+            print(f"⏱️ 首页解析 {result['parse_s']:.2f}s | 补全 {result['enrich_s']:.2f}s ({rate:.1f} 条/秒)")
+            for stage, ms in sorted(result['stage_ms'].items()):
+                print(f"  {stage:<10} {ms / 1000:8.2f}s")
+            print(f"📦 归档命中 {result['hits']} 次, 未命中 {result['misses']} 次")
+            for host, count in result['miss_hosts']:
+                print(f"  未归档: {host} ({count})")
+            if result['stories']:
+                print(f"✅ 结果已写入 {output}")
+        else:
+            parser.print_help()
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
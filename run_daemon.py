@@ -3,26 +3,36 @@
 """
 Hacker News 爬虫 - 守护进程版本（带文件锁）
 确保只有一个实例运行，避免多进程竞争
+
+运行模式:
+  python run_daemon.py              单进程模式（默认，可用 DAEMON_ROLE 配置）
+  python run_daemon.py coordinator  协调器：发现新新闻并入队，负责发送（带文件锁，全局唯一）
+  python run_daemon.py worker       工作进程：领取队列任务，抓取/翻译/保存（可运行多个）
 """
 
 import os
 import sys
+import json
 import time
 import fcntl
+import signal
 import asyncio
 import logging
-import schedule
+import subprocess
+from datetime import datetime
+from dotenv import load_dotenv
 from hn_news_crawler import HackerNewsCrawler
+from work_queue import WorkQueue, PENDING, LEASED
+from control_socket import DaemonControl, ControlServer, DEFAULT_SOCKET_PATH
+from feeds import FeedServer
+from memory_budget import MemoryMonitor, estimate_size
+import archive
+from bot_commands import CommandBot
+from message_editor import MessageEditor
+import log_setup
+from live_config import ConfigReloader
+import state_snapshot
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('hn_crawler.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
 
 class SingleInstanceDaemon:
     def __init__(self, lockfile):
@@ -51,51 +61,585 @@ class SingleInstanceDaemon:
                 pass
             logging.info("🔓 释放文件锁")
 
+class AdaptiveInterval:
+    """根据首页新增新闻速率自适应调整检查间隔
+
+    每轮记录新增数量，按实际间隔换算成每分钟到达率并做EWMA平滑，
+    然后反推出"平均每轮约有 target_new 条新闻"所需的间隔，限制在[min, max]内。
+    """
+
+    def __init__(self, base_minutes, min_minutes, max_minutes, alpha=0.3, target_new=3.0, max_step=2.0):
+        self.min_minutes = max(0.5, min(min_minutes, max_minutes))
+        self.max_minutes = max(self.min_minutes, max_minutes)
+        self.alpha = min(max(alpha, 0.01), 1.0)
+        self.target_new = max(target_new, 0.1)
+        self.max_step = max(max_step, 1.0)  # 单次调整的最大倍数，避免间隔剧烈跳变
+        self.interval_minutes = self._clamp(base_minutes)
+        self.rate_ewma = None  # 每分钟新增新闻数
+        self.last_new_count = 0
+
+    def _clamp(self, minutes):
+        return min(max(minutes, self.min_minutes), self.max_minutes)
+
+    def update(self, new_count, elapsed_minutes):
+        """记录一轮结果并返回新的间隔（分钟）"""
+        self.last_new_count = new_count
+        elapsed_minutes = max(elapsed_minutes, 0.1)
+        rate = new_count / elapsed_minutes
+        
+        if self.rate_ewma is None:
+            self.rate_ewma = rate
+        else:
+            self.rate_ewma = self.alpha * rate + (1 - self.alpha) * self.rate_ewma
+        
+        if self.rate_ewma > 0:
+            desired = self.target_new / self.rate_ewma
+        else:
+            desired = self.max_minutes
+        
+        # 限制单次调整幅度
+        lower = self.interval_minutes / self.max_step
+        upper = self.interval_minutes * self.max_step
+        desired = min(max(desired, lower), upper)
+        
+        self.interval_minutes = self._clamp(desired)
+        return self.interval_minutes
+
+    def export_state(self):
+        """到达率等状态（供热重启快照）"""
+        return {
+            'interval_minutes': self.interval_minutes,
+            'rate_ewma': self.rate_ewma,
+            'last_new_count': self.last_new_count,
+        }
+
+    def load_state(self, state):
+        if state.get('interval_minutes'):
+            self.interval_minutes = self._clamp(state['interval_minutes'])
+        self.rate_ewma = state.get('rate_ewma', self.rate_ewma)
+        self.last_new_count = state.get('last_new_count', self.last_new_count)
+
+    def snapshot(self):
+        """返回当前调度状态，用于日志和指标"""
+        return {
+            'effective_interval_minutes': round(self.interval_minutes, 2),
+            'arrival_rate_ewma_per_minute': round(self.rate_ewma or 0.0, 4),
+            'last_new_count': self.last_new_count,
+            'min_interval_minutes': self.min_minutes,
+            'max_interval_minutes': self.max_minutes,
+        }
+
+def write_metrics(metrics_file, metrics):
+    """原子写入守护进程指标文件"""
+    try:
+        metrics_dir = os.path.dirname(metrics_file)
+        if metrics_dir and not os.path.exists(metrics_dir):
+            os.makedirs(metrics_dir)
+        tmp_file = f"{metrics_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(metrics, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, metrics_file)
+    except Exception as e:
+        logging.warning(f"⚠️ 写入指标文件失败: {e}")
+
+def snapshot_file(role):
+    """热重启快照路径；本机工作进程共用单独的一份"""
+    path = os.getenv('SNAPSHOT_FILE', os.path.join(os.getenv('DATA_DIR', 'data'), 'state.snap'))
+    return f"{path}.worker" if role == 'worker' else path
+
+def open_snapshot(role):
+    """打开并校验上次写入的快照，未启用或无效时返回None"""
+    if os.getenv('ENABLE_STATE_SNAPSHOT', 'true').lower() != 'true':
+        return None
+    return state_snapshot.load(snapshot_file(role))
+
+def save_snapshot(crawler, role, extra=None):
+    """写入热重启快照；extra 为额外的 {分段名: 可JSON序列化的状态}"""
+    if os.getenv('ENABLE_STATE_SNAPSHOT', 'true').lower() != 'true':
+        return
+    try:
+        start = time.time()
+        sections = crawler.capture_state()
+        for name, value in (extra or {}).items():
+            sections[name] = state_snapshot.pack_json(value)
+        size = state_snapshot.write(snapshot_file(role), sections)
+        logging.info(f"♨️ 状态快照已写入 ({size / 1024:.0f} KB, {(time.time() - start) * 1000:.0f} ms)")
+    except Exception as e:
+        logging.warning(f"⚠️ 写入状态快照失败: {e}")
+
+def create_work_queue(crawler):
+    """按配置创建共享工作队列"""
+    return WorkQueue(
+        os.getenv('WORK_QUEUE_DB', os.path.join(crawler.data_dir, 'work_queue.db')),
+        lease_seconds=int(os.getenv('WORK_LEASE_SECONDS', 300)),
+        max_attempts=int(os.getenv('WORK_MAX_ATTEMPTS', 3))
+    )
+
+async def coordinate_cycle(crawler, queue):
+    """协调器单轮：发现新新闻并入队，等待工作进程处理后统一发送
+
+    发送只在协调器中进行（全局唯一），保证每条新闻只推送一次
+    """
+    logging.info("开始爬取（协调模式）...")
+    new_news = crawler.discover_news()
+    if new_news is None:
+        return 0
+    
+    # 先保存廉价字段，只把达到 MIN_SCORE、将被推送的新闻交给工作进程补全
+    added = crawler.store_new_news(new_news)
+    deliverable = [news for news in new_news if news.score >= crawler.min_score]
+    queued = queue.enqueue(deliverable)
+    logging.info(f"📥 新增 {added} 条新闻，入队补全 {queued} 条")
+    
+    # 等待工作进程处理本轮任务，超时后先发送已完成的部分
+    drain_timeout = float(os.getenv('QUEUE_DRAIN_TIMEOUT', 120))
+    deadline = time.time() + drain_timeout
+    while True:
+        stats = queue.stats()
+        if stats[PENDING] == 0 and stats[LEASED] == 0:
+            break
+        if time.time() >= deadline:
+            logging.warning(f"⚠️ 队列未在 {drain_timeout:.0f} 秒内清空: 待处理 {stats[PENDING]}, 处理中 {stats[LEASED]}")
+            break
+        await asyncio.sleep(1)
+    
+    # 未被领取的任务由协调器接手；工作进程仍持有租约的新闻留到下一轮，避免重复补全
+    await crawler.send_unsent_news(skip_ids=queue.take_over_pending())
+    crawler.refresh_tracked_news()
+    crawler.crawl_comments()
+    
+    # 清理保留期之前已完成/失败的任务，队列表不随入库新闻无限增长
+    retention = float(os.getenv('QUEUE_RETENTION_HOURS', 24)) * 3600
+    purged = queue.purge_done(retention)
+    if purged:
+        logging.info(f"🧹 清理 {purged} 个已完成的队列任务")
+    return added
+
+def run_worker():
+    """工作进程：循环领取任务，抓取正文、翻译并保存到CSV"""
+    snapshot = open_snapshot('worker')
+    crawler = HackerNewsCrawler(snapshot=snapshot)
+    if snapshot:
+        snapshot.close()
+    queue = create_work_queue(crawler)
+    worker_id = WorkQueue.default_worker_id()
+    poll_interval = float(os.getenv('WORKER_POLL_INTERVAL', 5))
+    batch_size = int(os.getenv('WORKER_BATCH_SIZE', 1))
+    
+    # 工作进程超出内存预算时退出，由协调器重新拉起
+    restart_on_budget = os.getenv('MEMORY_RESTART_WORKERS', 'true').lower() == 'true'
+    memory_monitor = MemoryMonitor(float(os.getenv('WORKER_MEMORY_LIMIT', os.getenv('MEMORY_LIMIT', 512))))
+    memory_monitor.register('translation_cache', crawler.translation_cache)
+    if crawler.dedup_index:
+        memory_monitor.register('dedup_index', crawler.dedup_index.nbytes)
+    
+    # 配置热加载：协调器收到 SIGHUP 时会转发给本机工作进程，配置文件变化时也会重新加载
+    reloader = ConfigReloader('config.env')
+    reloader.install_signal_handler()
+    
+    # 协调器用 SIGTERM 停止工作进程：正常退出以便写入快照
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    snapshot_interval = float(os.getenv('SNAPSHOT_INTERVAL_MINUTES', 10)) * 60
+    last_snapshot = time.time()
+    
+    logging.info(f"👷 工作进程启动: {worker_id}")
+    try:
+        while True:
+            if time.time() - last_snapshot >= snapshot_interval:
+                save_snapshot(crawler, 'worker')
+                last_snapshot = time.time()
+            if reloader.pending():
+                config, changed = reloader.reload()
+                if changed:
+                    crawler.apply_config(config, changed)
+            items = queue.claim(worker_id, batch_size)
+            if not items:
+                time.sleep(poll_interval)
+                continue
+            
+            # 同一批任务的正文按域名轮转并发抓取
+            prefetched = crawler.prefetch_articles([news for _, news in items if not news.enriched])
+            for item_id, news in items:
+                try:
+                    logging.info(f"处理新新闻 [{worker_id}]: {news.title}", extra={'sample': 'worker'})
+                    crawler.ensure_enriched(news, prefetched.get(news.id))
+                    if not queue.complete(item_id, worker_id):
+                        logging.warning(f"⚠️ 租约已失效，结果可能被其他进程覆盖: {item_id}")
+                except Exception as e:
+                    logging.error(f"❌ 处理任务失败 {item_id}: {e}")
+                    queue.release(item_id, worker_id)
+                
+                time.sleep(crawler.request_interval)  # 避免请求过快
+            
+            over_budget, _ = memory_monitor.check()
+            if over_budget:
+                crawler.release_resources()
+                over_budget, _ = memory_monitor.resample()
+                if over_budget and restart_on_budget:
+                    logging.warning(f"♻️ 工作进程内存超出预算，退出等待重启: {worker_id}")
+                    return
+    except KeyboardInterrupt:
+        logging.info(f"👋 工作进程退出: {worker_id}")
+    finally:
+        save_snapshot(crawler, 'worker')
+
+def supervise_workers(workers, restart=False):
+    """重新拉起已退出的本地工作进程；restart=True 时先终止全部工作进程"""
+    if restart:
+        logging.warning("♻️ 内存超出预算，重启本地工作进程")
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.wait()
+    for i, worker in enumerate(workers):
+        if worker.poll() is not None:
+            workers[i] = subprocess.Popen([sys.executable, os.path.abspath(__file__), 'worker'])
+            logging.info(f"👷 工作进程 {worker.pid} 已退出，重新启动为 {workers[i].pid}")
+
+def spawn_local_workers(count):
+    """启动本机工作进程"""
+    workers = []
+    for _ in range(count):
+        workers.append(subprocess.Popen([sys.executable, os.path.abspath(__file__), 'worker']))
+    if workers:
+        logging.info(f"👷 已启动 {len(workers)} 个本地工作进程")
+    return workers
+
 def main():
     """主函数 - 带文件锁的守护进程"""
+    load_dotenv('config.env')
+    role = sys.argv[1] if len(sys.argv) > 1 else os.getenv('DAEMON_ROLE', 'standalone')
+    # 日志文件只由协调器/单进程轮转，工作进程在轮转后重新打开
+    log_setup.configure(rotate=role != 'worker')
+    
+    if role == 'worker':
+        run_worker()
+        return
+    if role not in ('standalone', 'coordinator'):
+        logging.error(f"❌ 未知运行模式: {role}")
+        sys.exit(1)
+    
     lockfile = '/tmp/hn_crawler.lock'
     
     with SingleInstanceDaemon(lockfile):
         logging.info("🚀 启动Hacker News爬虫守护进程")
         
-        # 创建爬虫实例
-        crawler = HackerNewsCrawler()
+        # 创建爬虫实例（有热重启快照时恢复缓存和索引）
+        snapshot = open_snapshot(role)
+        crawler = HackerNewsCrawler(snapshot=snapshot)
         
         # 测试网络连接
         if not crawler.test_network_connection():
             logging.error("❌ 网络连接测试失败，请检查代理配置")
             return
         
+        # 协调模式：新新闻交给工作进程处理
+        queue = None
+        workers = []
+        if role == 'coordinator':
+            queue = create_work_queue(crawler)
+            workers = spawn_local_workers(int(os.getenv('LOCAL_WORKERS', 2)))
+            logging.info(f"📋 协调模式，工作队列: {queue.db_path}")
+        
+        # 调度配置
+        base_interval = float(os.getenv('CHECK_INTERVAL_MINUTES', 5))
+        enable_adaptive = os.getenv('ENABLE_ADAPTIVE_INTERVAL', 'false').lower() == 'true'
+        scheduler = AdaptiveInterval(
+            base_minutes=base_interval,
+            min_minutes=float(os.getenv('MIN_CHECK_INTERVAL_MINUTES', 2)),
+            max_minutes=float(os.getenv('MAX_CHECK_INTERVAL_MINUTES', 30)),
+            alpha=float(os.getenv('INTERVAL_EWMA_ALPHA', 0.3)),
+            target_new=float(os.getenv('TARGET_NEW_PER_CYCLE', 3))
+        ) if enable_adaptive else None
+        if snapshot:
+            if scheduler:
+                scheduler.load_state(snapshot.json('scheduler', {}))
+            snapshot.close()
+        
+        # 热重启快照：定期和退出时写入
+        snapshot_interval = float(os.getenv('SNAPSHOT_INTERVAL_MINUTES', 10)) * 60
+        snapshot_state = {'last': time.time()}
+        
+        def write_snapshot():
+            save_snapshot(crawler, role, {'scheduler': scheduler.export_state()} if scheduler else None)
+            snapshot_state['last'] = time.time()
+        metrics_file = os.getenv('METRICS_FILE', os.path.join(crawler.data_dir, 'daemon_metrics.json'))
+        metrics = {'cycles': 0, 'total_new': 0}
+        
+        # 内存预算：每轮采样RSS，超出 MEMORY_LIMIT 时收缩缓存
+        memory_monitor = MemoryMonitor(
+            float(os.getenv('MEMORY_LIMIT', 512)),
+            trim_fraction=float(os.getenv('MEMORY_TRIM_FRACTION', 0.5))
+        )
+        memory_monitor.register('translation_cache', crawler.translation_cache)
+        memory_monitor.register('metrics', lambda: estimate_size(metrics))
+        memory_monitor.register('discussions', crawler.discussions)
+        if crawler.politeness:
+            memory_monitor.register('robots', crawler.politeness.robots)
+        if crawler.dedup_index:
+            memory_monitor.register('dedup_index', crawler.dedup_index.nbytes)
+        restart_workers_on_budget = os.getenv('MEMORY_RESTART_WORKERS', 'true').lower() == 'true'
+        
+        # 每天第一次执行后把已结束日期的CSV压缩到列式归档
+        enable_auto_archive = os.getenv('ENABLE_AUTO_ARCHIVE', 'false').lower() == 'true'
+        archive_state = {'last_day': None}
+        
+        def run_archive_compaction():
+            today = datetime.now().date()
+            if not enable_auto_archive or archive_state['last_day'] == today:
+                return
+            archive_state['last_day'] = today
+            try:
+                count = archive.compact(
+                    crawler.data_dir,
+                    os.getenv('ARCHIVE_DIR', os.path.join(crawler.data_dir, 'archive')),
+                    # 增量刷新仍在更新最近 UPDATES_TRACK_DAYS 天的CSV，这些天不压缩（也不删除CSV）
+                    keep_days=max(int(os.getenv('ARCHIVE_KEEP_DAYS', 1)), crawler.updates_track_days),
+                    delete_csv=os.getenv('ARCHIVE_DELETE_CSV', 'false').lower() == 'true',
+                    row_group_size=int(os.getenv('ARCHIVE_ROW_GROUP_SIZE', 256)),
+                    # 爬虫的CSV文件在启动时确定，跨天运行时仍在写入前一天的文件
+                    exclude=crawler.tracked_csv_files()
+                )
+                metrics['archived_files'] = metrics.get('archived_files', 0) + count
+            except Exception as e:
+                logging.error(f"❌ 归档压缩失败: {e}")
+        
+        # 控制接口：状态查询、立即爬取、清空待发送、暂停/恢复
+        control = DaemonControl(role)
+        control.publish_metrics(metrics)
+        control_server = ControlServer(control, os.getenv('CONTROL_SOCKET', DEFAULT_SOCKET_PATH))
+        control_server.start()
+        signal.signal(signal.SIGTERM, lambda signum, frame: control.stop())
+        
+        # 配置热加载：SIGHUP、控制命令 reload-config 或 config.env 被修改时，在两轮任务之间应用
+        reloader = ConfigReloader('config.env')
+        reloader.install_signal_handler(control.wake)
+        
+        # 订阅源的本地HTTP服务（支持ETag/Last-Modified条件请求）
+        feed_server = None
+        if crawler.feed_writer and os.getenv('ENABLE_FEED_SERVER', 'false').lower() == 'true':
+            try:
+                feed_server = FeedServer.from_env(crawler.feed_writer.directory)
+                feed_server.start()
+            except OSError as e:
+                logging.error(f"❌ 订阅源服务启动失败: {e}")
+                feed_server = None
+        
+        # Telegram 命令：从本地检索索引回答 /top /search /since
+        command_bot = None
+        if os.getenv('ENABLE_BOT_COMMANDS', 'false').lower() == 'true':
+            if crawler.search_index:
+                allowed_chats = [crawler.chat_id] + os.getenv('BOT_ALLOWED_CHAT_IDS', '').split(',')
+                command_bot = CommandBot(
+                    crawler.bot_token,
+                    [chat.strip() for chat in allowed_chats],
+                    crawler.search_index.db_path,
+                    proxy_pool=crawler.proxy_pool,
+                    poll_timeout=int(os.getenv('BOT_POLL_TIMEOUT', 30)),
+                    response_budget_ms=float(os.getenv('BOT_RESPONSE_BUDGET_MS', 100))
+                )
+                command_bot.start()
+                metrics['bot_commands'] = command_bot.stats
+            else:
+                logging.warning("⚠️ Bot命令需要启用全文检索索引 (ENABLE_SEARCH_INDEX=true)")
+        
+        # 已发送消息的原地更新：分数/评论档位变化时编辑消息
+        message_editor = None
+        if os.getenv('ENABLE_MESSAGE_EDITS', 'true').lower() == 'true':
+            message_editor = MessageEditor(
+                crawler,
+                window_seconds=float(os.getenv('MESSAGE_EDIT_WINDOW', 300)),
+                min_interval=float(os.getenv('MESSAGE_EDIT_MIN_INTERVAL', 3)),
+                max_edits_per_window=int(os.getenv('MESSAGE_EDIT_MAX_PER_WINDOW', 20))
+            )
+            message_editor.start()
+            metrics['message_edits'] = message_editor.stats
+        
         # 定义运行函数
         def run_crawler_instance():
-            """运行爬虫实例"""
+            """运行爬虫实例，返回本轮新增数量"""
+            control.busy = 'crawl'
             try:
                 logging.info("🔄 开始执行爬取任务...")
-                asyncio.run(crawler.crawl_and_send())
+                if queue:
+                    new_count = asyncio.run(coordinate_cycle(crawler, queue)) or 0
+                    metrics['queue'] = queue.stats()
+                else:
+                    new_count = asyncio.run(crawler.crawl_and_send()) or 0
                 logging.info("✅ 爬取任务完成")
+                return new_count
             except Exception as e:
                 logging.error(f"❌ 爬虫执行失败: {e}")
+                return 0
+            finally:
+                control.busy = None
+        
+        def drain_outbox():
+            """立即发送所有未发送的新闻"""
+            control.busy = 'drain'
+            try:
+                logging.info("📤 控制命令: 清空待发送新闻")
+                asyncio.run(crawler.send_unsent_news(skip_ids=queue.take_over_pending() if queue else None))
+            except Exception as e:
+                logging.error(f"❌ 发送待发送新闻失败: {e}")
+            finally:
+                control.busy = None
+        
+        def after_cycle(new_count, elapsed_minutes, observe=True):
+            """根据本轮结果更新间隔和指标"""
+            if scheduler and observe:
+                interval = scheduler.update(new_count, elapsed_minutes)
+                metrics.update(scheduler.snapshot())
+                logging.info(
+                    f"⏱️ 自适应间隔: 新增 {new_count} 条, "
+                    f"到达率 {scheduler.rate_ewma:.3f} 条/分钟, 下次间隔 {interval:.1f} 分钟"
+                )
+            elif scheduler:
+                interval = scheduler.interval_minutes
+                metrics.update(scheduler.snapshot())
+            else:
+                interval = base_interval
+                metrics['effective_interval_minutes'] = interval
+                metrics['last_new_count'] = new_count
+            
+            # 超预算时先收缩协调器自己的缓存并释放可重建的资源，仍超预算才重启工作进程
+            over_budget, metrics['memory'] = memory_monitor.check()
+            if over_budget:
+                crawler.release_resources()
+                over_budget, metrics['memory'] = memory_monitor.resample()
+            if workers:
+                supervise_workers(workers, restart=over_budget and restart_workers_on_budget)
+            
+            run_archive_compaction()
+            if time.time() - snapshot_state['last'] >= snapshot_interval:
+                write_snapshot()
+            
+            if crawler.politeness:
+                metrics['politeness'] = crawler.politeness.snapshot()
+            if crawler.feed_writer:
+                metrics['feeds'] = crawler.feed_writer.snapshot()
+            if crawler.fault_injector:
+                metrics['faults'] = crawler.fault_injector.snapshot()
+            proxy_status = crawler.proxy_pool.snapshot()
+            if proxy_status:
+                metrics['proxies'] = proxy_status
+            
+            crawler.check_interval_minutes = interval
+            metrics['cycles'] += 1
+            metrics['total_new'] += new_count
+            metrics['last_run'] = datetime.now().isoformat()
+            metrics['next_run'] = datetime.fromtimestamp(time.time() + interval * 60).isoformat()
+            control.last_run = metrics['last_run']
+            control.next_run = metrics['next_run']
+            write_metrics(metrics_file, metrics)
+            control.publish_metrics(metrics)
+            return interval
         
         # 立即执行一次
         logging.info("🚀 立即执行第一次爬取...")
-        run_crawler_instance()
+        if scheduler:
+            crawler.check_interval_minutes = scheduler.interval_minutes
+            logging.info(
+                f"⏰ 自适应定时任务: 初始 {scheduler.interval_minutes:.1f} 分钟, "
+                f"范围 {scheduler.min_minutes:.1f}-{scheduler.max_minutes:.1f} 分钟"
+            )
+        else:
+            logging.info(f"⏰ 定时任务: 每 {base_interval} 分钟执行一次")
+        
+        last_run = time.time()
+        new_count = run_crawler_instance()
+        # 首轮会把首页上所有未入库的新闻都算作新增，不计入到达率
+        interval = after_cycle(new_count, 0, observe=False)
+        next_run = last_run + interval * 60
         
-        # 设置定时任务
-        interval_minutes = int(os.getenv('CHECK_INTERVAL_MINUTES', 5))
-        schedule.every(interval_minutes).minutes.do(run_crawler_instance)
-        logging.info(f"⏰ 定时任务: 每 {interval_minutes} 分钟执行一次")
+        def reload_config():
+            """重新加载配置，校验通过后一次性应用到爬虫实例和各组件"""
+            nonlocal base_interval, daemon_check_interval, next_run
+            config, changed = reloader.reload()
+            metrics['config'] = reloader.snapshot()
+            control.publish_metrics(metrics)
+            if not changed:
+                return
+            crawler.apply_config(config, changed)
+            
+            api_url = f"https://api.telegram.org/bot{config['TELEGRAM_BOT_TOKEN']}"
+            if message_editor:
+                message_editor.api_url = api_url
+            if command_bot:
+                command_bot.api_url = api_url
+                command_bot.proxy_pool = crawler.proxy_pool
+                allowed_chats = [config['TELEGRAM_CHAT_ID']] + config['BOT_ALLOWED_CHAT_IDS'].split(',')
+                command_bot.chat_ids = {chat.strip() for chat in allowed_chats if chat.strip()}
+            if 'MEMORY_LIMIT' in changed:
+                memory_monitor.limit_bytes = int(config['MEMORY_LIMIT'] * 1024 * 1024) or None
+            if 'DAEMON_CHECK_INTERVAL' in changed:
+                daemon_check_interval = config['DAEMON_CHECK_INTERVAL']
+            if changed & {'CHECK_INTERVAL_MINUTES', 'MIN_CHECK_INTERVAL_MINUTES', 'MAX_CHECK_INTERVAL_MINUTES'}:
+                base_interval = config['CHECK_INTERVAL_MINUTES']
+                if scheduler:
+                    scheduler.min_minutes = max(0.5, config['MIN_CHECK_INTERVAL_MINUTES'])
+                    scheduler.max_minutes = max(scheduler.min_minutes, config['MAX_CHECK_INTERVAL_MINUTES'])
+                    scheduler.interval_minutes = scheduler._clamp(scheduler.interval_minutes)
+                    interval = scheduler.interval_minutes
+                else:
+                    interval = base_interval
+                crawler.check_interval_minutes = interval
+                next_run = last_run + interval * 60
+                metrics['next_run'] = control.next_run = datetime.fromtimestamp(next_run).isoformat()
+                control.publish_metrics(metrics)
+                logging.info(f"⏰ 检查间隔调整为 {interval:g} 分钟")
+            # 本机工作进程各自重新加载
+            for worker in workers:
+                if worker.poll() is None:
+                    worker.send_signal(signal.SIGHUP)
         
         # 运行定时任务
         daemon_check_interval = int(os.getenv('DAEMON_CHECK_INTERVAL', 30))
         try:
-            while True:
-                schedule.run_pending()
-                time.sleep(daemon_check_interval)  # 从配置文件读取检查间隔
+            while not control.stop_requested:
+                action = control.pop_action()
+                if action == 'reload' or reloader.pending():
+                    reload_config()
+                    if action == 'reload':
+                        continue
+                if action == 'drain':
+                    drain_outbox()
+                    continue
+                
+                now = time.time()
+                # 手动触发的爬取不受暂停影响
+                if action == 'crawl' or (now >= next_run and not control.paused):
+                    if action == 'crawl':
+                        logging.info("⚡ 控制命令: 立即爬取")
+                    elapsed_minutes = (now - last_run) / 60
+                    last_run = now
+                    new_count = run_crawler_instance()
+                    interval = after_cycle(new_count, elapsed_minutes)
+                    next_run = last_run + interval * 60
+                    continue
+                
+                # 等待到下次执行或收到控制命令
+                if control.paused:
+                    control.wait(daemon_check_interval)
+                else:
+                    control.wait(min(daemon_check_interval, max(next_run - now, 0.1)))  # 从配置文件读取检查间隔
+            logging.info("🛑 收到停止请求，守护进程退出")
         except KeyboardInterrupt:
             logging.info("👋 程序被用户中断")
         except Exception as e:
             logging.error(f"❌ 定时任务执行失败: {e}")
         finally:
+            write_snapshot()
+            if command_bot:
+                command_bot.stop()
+            if message_editor:
+                message_editor.stop()
+            crawler.proxy_pool.stop()
+            if feed_server:
+                feed_server.close()
+            control_server.close()
+            for worker in workers:
+                worker.terminate()
             # 清理锁文件
             if os.path.exists(lockfile):
                 os.remove(lockfile)
@@ -7,17 +7,13 @@ Hacker News 爬虫 - 单次运行版本
 
 import asyncio
 import logging
+from dotenv import load_dotenv
 from hn_news_crawler import HackerNewsCrawler
+import log_setup
 
 # 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('hn_crawler.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+load_dotenv('config.env')
+log_setup.configure()
 
 def main():
     """单次运行主函数"""
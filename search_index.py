@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hacker News 爬虫 - 全文检索索引
+
+基于SQLite FTS5的增量倒排索引，save_news_to_csv 保存新闻时同步写入。
+英文按单词切分（小写），中文按CJK双字切分（bigram），查询使用相同的切分规则，
+按BM25相关度排序，标题权重高于摘要。
+
+用法:
+  python search_index.py search 关键词 [--limit 20]
+  python search_index.py rebuild          从DATA_DIR下所有CSV重建索引
+"""
+
+import os
+import re
+import sys
+import time
+import sqlite3
+import argparse
+import logging
+
+import pandas as pd
+from dotenv import load_dotenv
+
+# CJK统一表意文字、扩展A、兼容表意文字，以及日文假名和韩文音节
+CJK_RANGES = '㐀-䶿一-鿿豈-﫿぀-ヿ가-힯'
+TOKEN_PATTERN = re.compile(rf'[{CJK_RANGES}]+|[0-9a-z]+')
+CJK_PATTERN = re.compile(rf'^[{CJK_RANGES}]+$')
+
+# 标题、摘要列的BM25权重
+TITLE_WEIGHT = 5.0
+BODY_WEIGHT = 1.0
+
+
+def tokenize(text):
+    """切分文本：英文单词小写，CJK连续字符切成重叠的双字"""
+    if not text or not isinstance(text, str):
+        return []
+    tokens = []
+    for match in TOKEN_PATTERN.findall(text.lower()):
+        if CJK_PATTERN.match(match):
+            if len(match) == 1:
+                tokens.append(match)
+            else:
+                tokens.extend(match[i:i + 2] for i in range(len(match) - 1))
+        else:
+            tokens.append(match)
+    return tokens
+
+
+def _fts_query(query):
+    """把用户输入转换为FTS5查询：所有词都需命中，词内双字按短语匹配"""
+    terms = []
+    for part in query.split():
+        tokens = tokenize(part)
+        if tokens:
+            terms.append('"' + ' '.join(token.replace('"', '') for token in tokens) + '"')
+    return ' AND '.join(terms)
+
+
+class SearchIndex:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS stories (
+                id INTEGER PRIMARY KEY,
+                title TEXT,
+                title_cn TEXT,
+                url TEXT,
+                hn_url TEXT,
+                score INTEGER,
+                comments INTEGER,
+                content_summary TEXT,
+                content_summary_cn TEXT,
+                crawl_time TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_stories_crawl_time ON stories (crawl_time);
+            CREATE VIRTUAL TABLE IF NOT EXISTS stories_fts USING fts5(
+                title_tokens, body_tokens, tokenize = 'unicode61'
+            );
+        """)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    @staticmethod
+    def _row(news):
+        def text(key):
+            value = news.get(key)
+            return '' if value is None or (isinstance(value, float) and value != value) else str(value)
+
+        crawl_time = news.get('crawl_time')
+        if hasattr(crawl_time, 'isoformat'):
+            crawl_time = crawl_time.isoformat()
+        return (
+            int(news['id']), text('title'), text('title_cn'), text('url'), text('hn_url'),
+            int(news.get('score') or 0), int(news.get('comments') or 0),
+            text('content_summary'), text('content_summary_cn'), crawl_time or ''
+        )
+
+    def _upsert(self, row):
+        story_id = row[0]
+        self.conn.execute(
+            "INSERT OR REPLACE INTO stories (id, title, title_cn, url, hn_url, score, comments, "
+            "content_summary, content_summary_cn, crawl_time) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            row
+        )
+        title_tokens = ' '.join(tokenize(row[1]) + tokenize(row[2]))
+        body_tokens = ' '.join(tokenize(row[7]) + tokenize(row[8]))
+        self.conn.execute("DELETE FROM stories_fts WHERE rowid = ?", (story_id,))
+        self.conn.execute(
+            "INSERT INTO stories_fts (rowid, title_tokens, body_tokens) VALUES (?, ?, ?)",
+            (story_id, title_tokens, body_tokens)
+        )
+
+    def add(self, news):
+        """索引一条新闻（已存在则覆盖）"""
+        self._upsert(self._row(news))
+        self.conn.commit()
+
+    def add_many(self, news_list):
+        """批量索引，单个事务提交"""
+        count = 0
+        with self.conn:
+            for news in news_list:
+                try:
+                    self._upsert(self._row(news))
+                    count += 1
+                except (KeyError, ValueError, TypeError) as e:
+                    logging.debug(f"跳过无法索引的记录: {e}")
+        return count
+
+    def remove(self, news_id):
+        """删除一条新闻"""
+        self.conn.execute("DELETE FROM stories WHERE id = ?", (int(news_id),))
+        self.conn.execute("DELETE FROM stories_fts WHERE rowid = ?", (int(news_id),))
+        self.conn.commit()
+
+    def update_stats(self, news_id, score, comments):
+        """只更新分数和评论数，不需要重建倒排索引"""
+        self.conn.execute(
+            "UPDATE stories SET score = ?, comments = ? WHERE id = ?",
+            (int(score), int(comments), int(news_id))
+        )
+        self.conn.commit()
+
+    def search(self, query, limit=20, since=None):
+        """按相关度检索，返回新闻字典列表；since 为 ISO 时间字符串下限"""
+        fts_query = _fts_query(query)
+        if not fts_query:
+            return []
+        sql = (
+            "SELECT s.id, s.title, s.title_cn, s.url, s.hn_url, s.score, s.comments, "
+            "s.content_summary_cn, s.crawl_time, bm25(stories_fts, ?, ?) AS rank "
+            "FROM stories_fts JOIN stories s ON s.id = stories_fts.rowid "
+            "WHERE stories_fts MATCH ?"
+        )
+        params = [TITLE_WEIGHT, BODY_WEIGHT, fts_query]
+        if since:
+            sql += " AND s.crawl_time >= ?"
+            params.append(since)
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+
+        columns = ['id', 'title', 'title_cn', 'url', 'hn_url', 'score', 'comments',
+                   'content_summary_cn', 'crawl_time', 'rank']
+        return [dict(zip(columns, row)) for row in self.conn.execute(sql, params)]
+
+    def _select(self, where, params, order, limit):
+        columns = ['id', 'title', 'title_cn', 'url', 'hn_url', 'score', 'comments', 'crawl_time']
+        sql = f"SELECT {', '.join(columns)} FROM stories WHERE {where} ORDER BY {order} LIMIT ?"
+        return [dict(zip(columns, row)) for row in self.conn.execute(sql, list(params) + [limit])]
+
+    def top(self, since, limit=10):
+        """since（ISO时间）之后爬取的新闻，按分数降序"""
+        return self._select("crawl_time >= ?", [since], "score DESC", limit)
+
+    def recent(self, since, limit=20):
+        """since（ISO时间）之后爬取的新闻，按爬取时间倒序"""
+        return self._select("crawl_time >= ?", [since], "crawl_time DESC", limit)
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM stories").fetchone()[0]
+
+    def rebuild_from_csv(self, data_dir):
+        """从 DATA_DIR 下所有 hn_news_*.csv 重建索引，返回索引的新闻数"""
+        with self.conn:
+            self.conn.execute("DELETE FROM stories")
+            self.conn.execute("DELETE FROM stories_fts")
+        total = 0
+        for name in sorted(os.listdir(data_dir)):
+            if not (name.startswith('hn_news_') and name.endswith('.csv')):
+                continue
+            try:
+                df = pd.read_csv(os.path.join(data_dir, name))
+            except Exception as e:
+                logging.warning(f"⚠️ 读取CSV失败 {name}: {e}")
+                continue
+            total += self.add_many(df.to_dict('records'))
+        self.conn.execute("INSERT INTO stories_fts (stories_fts) VALUES ('optimize')")
+        self.conn.commit()
+        return total
+
+
+def main():
+    load_dotenv('config.env')
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    data_dir = os.getenv('DATA_DIR', 'data')
+    parser = argparse.ArgumentParser(description='Hacker News 全文检索')
+    parser.add_argument('--db', default=os.getenv('SEARCH_INDEX_DB', os.path.join(data_dir, 'search_index.db')))
+    sub = parser.add_subparsers(dest='command')
+    search_parser = sub.add_parser('search', help='检索关键词')
+    search_parser.add_argument('query', nargs='+')
+    search_parser.add_argument('--limit', type=int, default=20)
+    sub.add_parser('rebuild', help='从CSV重建索引')
+    args = parser.parse_args()
+
+    index = SearchIndex(args.db)
+    try:
+        if args.command == 'search':
+            start = time.perf_counter()
+            results = index.search(' '.join(args.query), limit=args.limit)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            print(f"🔍 共 {len(results)} 条结果 ({elapsed_ms:.1f} ms)")
+            for item in results:
+                title = item['title_cn'] or item['title']
+                print(f"  [{item['score']:>4}] {title}")
+                print(f"         {item['hn_url']}  ({item['crawl_time'][:16]})")
+        elif args.command == 'rebuild':
+            count = index.rebuild_from_csv(data_dir)
+            print(f"✅ 索引重建完成: {count} 条新闻")
+        else:
+            parser.print_help()
+            sys.exit(1)
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
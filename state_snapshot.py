@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hacker News 爬虫 - 热重启状态快照
+
+守护进程退出时和运行中定期把内存状态写入一个带版本号的二进制快照，启动时用 mmap 映射并
+校验后恢复，重启（部署、崩溃）后的第一轮就能以稳定状态的速度运行:
+
+- 翻译缓存：不再重复翻译已翻译过的标题和摘要
+- 近似重复索引（URL、标题和正文签名）：不用重新读取CSV计算签名，正文签名也不会丢失
+- 按域名限速状态和 robots.txt 缓存、代理池延迟和健康状态、自适应间隔的到达率
+- 今日CSV的签名（修改时间+大小）：快照之后没有变化时跳过启动时的整表去重清理
+
+文件格式（小端）:
+  头部    magic(8) | 版本(u16) | 保留(u16) | 分段数(u32) | 写入时间(f64)
+  分段表  每段 名称(16) | 偏移(u64) | 长度(u64) | CRC32(u32)
+  数据    各分段内容：JSON，或 pack_pairs / pack_signatures 的紧凑二进制
+
+版本号不同、长度越界或任何分段CRC不一致时整份快照作废，按冷启动处理。
+
+用法:
+  python state_snapshot.py info [--file data/state.snap]
+"""
+
+import os
+import sys
+import json
+import mmap
+import time
+import zlib
+import struct
+import logging
+import argparse
+from array import array
+
+MAGIC = b'HNSTATE\x00'
+VERSION = 1
+
+_HEADER = struct.Struct('<8sHHId')
+_SECTION = struct.Struct('<16sQQI')
+_LENGTHS = struct.Struct('<II')
+
+
+class SnapshotError(ValueError):
+    """快照文件损坏或版本不兼容"""
+
+
+def pack_pairs(pairs):
+    """[(str, str), ...] -> 条目数 + 每条的两个长度和UTF-8内容"""
+    parts = [struct.pack('<I', len(pairs))]
+    for key, value in pairs:
+        key_bytes, value_bytes = key.encode('utf-8'), value.encode('utf-8')
+        parts.append(_LENGTHS.pack(len(key_bytes), len(value_bytes)))
+        parts.append(key_bytes)
+        parts.append(value_bytes)
+    return b''.join(parts)
+
+
+def unpack_pairs(buffer):
+    buffer = memoryview(buffer)
+    count, = struct.unpack_from('<I', buffer, 0)
+    offset = 4
+    pairs = []
+    for _ in range(count):
+        key_len, value_len = _LENGTHS.unpack_from(buffer, offset)
+        offset += _LENGTHS.size
+        key = str(buffer[offset:offset + key_len], 'utf-8')
+        offset += key_len
+        pairs.append((key, str(buffer[offset:offset + value_len], 'utf-8')))
+        offset += value_len
+    return pairs
+
+
+def pack_signatures(signatures, num_perm):
+    """{id: (u64, ...)} -> 条目数、签名长度、id列表(JSON) 和连续的u64数组"""
+    keys = list(signatures)
+    values = array('Q')
+    for key in keys:
+        values.extend(signatures[key])
+    if sys.byteorder != 'little':
+        values.byteswap()
+    header = json.dumps(keys).encode('utf-8')
+    return struct.pack('<III', len(keys), num_perm, len(header)) + header + values.tobytes()
+
+
+def unpack_signatures(buffer):
+    """返回 (签名长度, {id: tuple})"""
+    buffer = memoryview(buffer)
+    count, num_perm, header_len = struct.unpack_from('<III', buffer, 0)
+    keys = json.loads(str(buffer[12:12 + header_len], 'utf-8'))
+    values = array('Q')
+    values.frombytes(buffer[12 + header_len:12 + header_len + count * num_perm * 8])
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return num_perm, {
+        key: tuple(values[i * num_perm:(i + 1) * num_perm]) for i, key in enumerate(keys)
+    }
+
+
+def pack_json(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def file_signature(path):
+    """文件的 (修改时间ns, 大小)，不存在时返回None"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def write(path, sections):
+    """写入快照 {分段名: bytes}，写临时文件后原子替换，返回字节数"""
+    names = list(sections)
+    offset = _HEADER.size + _SECTION.size * len(names)
+    table = []
+    for name in names:
+        data = sections[name]
+        table.append(_SECTION.pack(name.encode('ascii'), offset, len(data), zlib.crc32(data)))
+        offset += len(data)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, 0, len(names), time.time()))
+        f.writelines(table)
+        for name in names:
+            f.write(sections[name])
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return offset
+
+
+class Snapshot:
+    """只读映射的快照文件，打开时校验头部、分段边界和全部CRC"""
+
+    def __init__(self, path):
+        self.path = path
+        self.sections = {}
+        self._view = None
+        self._map = None
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._view = memoryview(self._map)
+            self._validate()
+        except ValueError as e:
+            self.close()
+            raise SnapshotError(str(e) or "快照文件为空")
+        except Exception:
+            self.close()
+            raise
+
+    def _validate(self):
+        size = len(self._map)
+        if size < _HEADER.size:
+            raise SnapshotError("快照文件不完整")
+        magic, version, _, count, self.created = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise SnapshotError("不是状态快照文件")
+        if version != VERSION:
+            raise SnapshotError(f"快照版本 {version} 与当前版本 {VERSION} 不兼容")
+        if _HEADER.size + _SECTION.size * count > size:
+            raise SnapshotError("分段表越界")
+
+        for i in range(count):
+            name, offset, length, crc = _SECTION.unpack_from(self._map, _HEADER.size + _SECTION.size * i)
+            name = name.rstrip(b'\x00').decode('ascii')
+            if offset + length > size:
+                raise SnapshotError(f"分段 {name} 越界")
+            # 分段内容是映射上的切片，读取时才解码
+            self.sections[name] = self._view[offset:offset + length]
+            if zlib.crc32(self.sections[name]) != crc:
+                raise SnapshotError(f"分段 {name} 校验失败")
+
+    @property
+    def age(self):
+        return time.time() - self.created
+
+    def raw(self, name):
+        return self.sections.get(name)
+
+    def json(self, name, default=None):
+        data = self.sections.get(name)
+        return json.loads(str(data, 'utf-8')) if data is not None else default
+
+    def pairs(self, name):
+        data = self.sections.get(name)
+        return unpack_pairs(data) if data is not None else []
+
+    def signatures(self, name):
+        data = self.sections.get(name)
+        return unpack_signatures(data) if data is not None else (0, {})
+
+    def csv_unchanged(self, csv_file):
+        """快照记录的CSV签名与当前文件一致（快照之后没有被修改过）"""
+        meta = self.json('meta', {})
+        signature = file_signature(csv_file)
+        return signature is not None and meta.get('csv_file') == csv_file and meta.get('csv_signature') == signature
+
+    def close(self):
+        # 先释放映射上的所有视图，映射才能关闭
+        for view in self.sections.values():
+            view.release()
+        self.sections = {}
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+
+def load(path):
+    """打开并校验快照；不存在或无效时返回None（冷启动）"""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        snapshot = Snapshot(path)
+    except (OSError, SnapshotError, struct.error) as e:
+        logging.warning(f"⚠️ 状态快照无效，冷启动: {e}")
+        return None
+    logging.info(f"♨️ 载入状态快照: {path} ({snapshot.age / 60:.1f} 分钟前写入)")
+    return snapshot
+
+
+def main():
+    from dotenv import load_dotenv
+
+    load_dotenv('config.env')
+    parser = argparse.ArgumentParser(description='热重启状态快照')
+    sub = parser.add_subparsers(dest='command', required=True)
+    info_parser = sub.add_parser('info', help='校验快照并显示各分段大小')
+    info_parser.add_argument('--file', default=os.getenv('SNAPSHOT_FILE', os.path.join(os.getenv('DATA_DIR', 'data'), 'state.snap')))
+    args = parser.parse_args()
+
+    try:
+        snapshot = Snapshot(args.file)
+    except (OSError, SnapshotError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"✅ {args.file}: 版本 {VERSION}, {snapshot.age / 60:.1f} 分钟前写入")
+    for name, data in snapshot.sections.items():
+        print(f"  {name:<16} {len(data) / 1024:10.1f} KB")
+    print(f"  meta: {snapshot.json('meta', {})}")
+    snapshot.close()
+
+
+if __name__ == "__main__":
+    main()
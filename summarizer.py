@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hacker News 爬虫 - 抽取式摘要（TextRank）
+
+对每篇文章：分句 -> 过滤导航/Cookie提示等模板句 -> TF-IDF句向量 ->
+余弦相似度矩阵 -> 幂迭代求TextRank得分，取得分最高的句子按原文顺序输出。
+所有矩阵运算使用NumPy完成：句子数和词表大小相近的文章补齐后放进同一个张量一起计算，
+补齐后的张量大小有上限，长文章单独计算，不会让同批的短文章一起占用内存。
+"""
+
+import re
+
+import numpy as np
+
+from search_index import tokenize
+
+SENTENCE_SPLIT = re.compile(r'(?<=[.!?。！？])\s+|[\r\n]+|(?<=[。！？])')
+
+# 常见的模板文本（Cookie提示、订阅、导航等），命中的句子不参与摘要
+# 对小写后的句子匹配，比 re.IGNORECASE 快得多
+BOILERPLATE = re.compile(
+    r'cookie|javascript|subscribe|newsletter|sign (in|up)|log ?in|all rights reserved|'
+    r'privacy policy|terms of (service|use)|skip to|advertisement|share (this|on)|'
+    r'click here|enable js|your browser|accept all'
+)
+
+DEFAULT_SUMMARY = "暂无内容摘要"
+
+# 一批文章补齐后 (文章 x 句子 x max(词表, 句子)) 的元素数上限，float32下约4MB
+MAX_BATCH_CELLS = 1 << 20
+
+# 相对最高分在此范围内的得分视为并列，取靠前的句子（批量与逐篇计算的浮点误差不影响结果）
+SCORE_TIE_TOLERANCE = 1e-5
+
+
+def split_sentences(text, min_length=20, max_length=300):
+    """分句并过滤明显不适合作为摘要的句子"""
+    sentences = []
+    for sentence in SENTENCE_SPLIT.split(text):
+        sentence = sentence.strip()
+        if not (min_length <= len(sentence) <= max_length):
+            continue
+        if sentence.startswith(('http', 'www', '@', '#', '©')):
+            continue
+        if BOILERPLATE.search(sentence.lower()):
+            continue
+        sentences.append(sentence)
+    return sentences
+
+
+def textrank_scores(sentence_tokens, damping=0.85, max_iter=50, tol=1e-6):
+    """计算一篇文章中句子的TextRank得分
+
+    sentence_tokens: 每个句子的词列表
+    """
+    return textrank_scores_batch([sentence_tokens], damping, max_iter, tol)[0]
+
+
+def textrank_scores_batch(documents, damping=0.85, max_iter=50, tol=1e-6):
+    """一次计算一批文章的TextRank得分，返回每篇文章的得分数组
+
+    documents: 每篇文章的句子词列表。各篇补齐到相同的句子数和词表大小后放进
+    (文章 x 句子 x 词) 张量，TF-IDF、相似度矩阵和幂迭代都是整批的矩阵运算；
+    补齐的句子没有边，得分始终为0。IDF按文章分别计算。
+    张量大小由最长的文章决定，调用方应按大小分批（见 summarize_batch）
+    """
+    counts = np.asarray([len(tokens) for tokens in documents], dtype=np.int64)
+    batch, n = len(documents), int(counts.max())
+
+    # 所有词展平成一列，按 (文章, 词) 去重后得到每篇文章独立的词表下标
+    vocab = {}
+    sentence_lengths = [len(tokens) for sentence_tokens in documents for tokens in sentence_tokens]
+    token_ids = [vocab.setdefault(token, len(vocab))
+                 for sentence_tokens in documents for tokens in sentence_tokens for token in tokens]
+    rows = np.repeat(np.concatenate([d * n + np.arange(c) for d, c in enumerate(counts)]), sentence_lengths)
+    keys = (rows // n) * max(len(vocab), 1) + np.asarray(token_ids, dtype=np.int64)
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    first = np.searchsorted(unique_keys // max(len(vocab), 1), np.arange(batch))
+    columns = inverse - first[rows // n]
+    v = max(int(np.diff(np.append(first, len(unique_keys))).max()), 1)
+    tf = np.bincount(rows * v + columns, minlength=batch * n * v).astype(np.float32).reshape(batch, n, v)
+
+    # 以句子为文档计算IDF，并做L2归一化得到TF-IDF句向量
+    df = np.count_nonzero(tf, axis=1)
+    idf = np.log((1.0 + counts[:, None]) / (1.0 + df)) + 1.0
+    tfidf = tf * idf[:, None, :].astype(np.float32)
+    norms = np.linalg.norm(tfidf, axis=2, keepdims=True)
+    norms[norms == 0] = 1.0
+    tfidf /= norms
+
+    # 余弦相似度图，去掉自环后按行归一化为转移矩阵；
+    # 没有边的句子均匀跳转到本篇的所有句子
+    mask = (np.arange(n)[None, :] < counts[:, None]).astype(np.float32)
+    uniform = mask / counts[:, None]
+    similarity = tfidf @ tfidf.transpose(0, 2, 1)
+    similarity[:, np.arange(n), np.arange(n)] = 0.0
+    row_sums = similarity.sum(axis=2, keepdims=True)
+    dangling = (row_sums[..., 0] == 0) & (mask > 0)
+    row_sums[row_sums == 0] = 1.0
+    transition = similarity / row_sums
+    transition[dangling] = np.repeat(uniform, n, axis=0).reshape(batch, n, n)[dangling]
+
+    scores = uniform.copy()
+    teleport = (1.0 - damping) * uniform
+    transition_t = transition.transpose(0, 2, 1).copy()
+    converged = np.zeros(batch, dtype=bool)
+    for _ in range(max_iter):
+        updated = teleport + damping * np.einsum('bij,bj->bi', transition_t, scores)
+        # 已收敛的文章保持不变，与逐篇计算时在同一轮停止的结果一致
+        updated[converged] = scores[converged]
+        converged |= np.abs(updated - scores).sum(axis=1) < tol
+        scores = updated
+        if converged.all():
+            break
+    return [scores[d, :counts[d]] for d in range(batch)]
+
+
+def summarize(text, max_sentences=2, max_chars=300):
+    """对单篇文章生成摘要"""
+    return summarize_batch([text], max_sentences=max_sentences, max_chars=max_chars)[0]
+
+
+def summarize_batch(texts, max_sentences=2, max_chars=300, batch_size=32, max_cells=MAX_BATCH_CELLS):
+    """批量生成抽取式摘要，返回与输入等长的摘要列表
+
+    文章按句子数和词表大小排序后分批，每批最多 batch_size 篇，补齐后的元素数不超过 max_cells；
+    单篇就超过上限的长文章单独计算
+    """
+    summaries = [DEFAULT_SUMMARY] * len(texts)
+    pending = []
+    for position, text in enumerate(texts):
+        if not text or not isinstance(text, str) or len(text) < 30:
+            continue
+        sentences = split_sentences(re.sub(r'<[^>]+>', '', text))
+        if sentences:
+            tokens = [tokenize(sentence) for sentence in sentences]
+            vocab_size = len({token for sentence_tokens in tokens for token in sentence_tokens})
+            pending.append((len(sentences), vocab_size, position, sentences, tokens))
+    pending.sort(key=lambda entry: entry[:3])
+
+    for chunk in _size_buckets(pending, batch_size, max_cells):
+        all_scores = textrank_scores_batch([entry[4] for entry in chunk])
+        for (_, _, position, sentences, _), scores in zip(chunk, all_scores):
+            summaries[position] = _pick_sentences(sentences, scores, max_sentences, max_chars)
+    return summaries
+
+
+def _size_buckets(pending, batch_size, max_cells):
+    """把按大小排好序的文章切成补齐后元素数不超过 max_cells 的批次"""
+    chunk = []
+    n = v = 0
+    for entry in pending:
+        next_n, next_v = max(n, entry[0]), max(v, entry[1])
+        if chunk and (len(chunk) >= batch_size or (len(chunk) + 1) * next_n * max(next_v, next_n) > max_cells):
+            yield chunk
+            chunk, next_n, next_v = [], entry[0], entry[1]
+        chunk.append(entry)
+        n, v = next_n, next_v
+    if chunk:
+        yield chunk
+
+
+def _pick_sentences(sentences, scores, max_sentences, max_chars):
+    """得分最高的句子按原文顺序拼接，超出长度时停止"""
+    # 得分按相对最高分量化后稳定排序：并列（含浮点误差内的近似并列）时取靠前的句子
+    quantized = np.round(scores / (scores.max() or 1.0) / SCORE_TIE_TOLERANCE)
+    top = sorted(np.argsort(-quantized, kind='stable')[:max_sentences])
+    picked = []
+    length = 0
+    for i in top:
+        sentence = sentences[i]
+        if picked and length + len(sentence) > max_chars:
+            break
+        picked.append(sentence)
+        length += len(sentence) + 1
+
+    summary = ' '.join(picked)
+    if len(summary) > max_chars:
+        summary = summary[:max_chars].rstrip() + '...'
+    elif summary[-1] not in '.!?。！？':
+        summary += '.'
+    return summary
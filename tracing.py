@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hacker News 爬虫 - 单条新闻的端到端延迟追踪
+
+新闻在首页被发现时开始追踪，各阶段耗时以 span 的形式记录在新闻的 trace 字段上，
+随 NewsItem 一起经过 crawl_and_send（或工作队列）:
+
+  discover  首页获取与解析
+  fetch     正文网络请求
+  extract   正文解析与摘要
+  translate 标题/摘要翻译
+  persist   写入CSV
+  send      推送到Telegram
+
+发现时和按需补全后各写入一条处理记录，推送时再写入一条发送记录（可能在另一个进程中），
+三者按新闻id关联。端到端延迟 = 发送完成时间 - 首次发现时间，
+未被各阶段覆盖的时间计为 wait（排队、等待下一批推送）。
+
+追踪日志按天分文件（TRACE_LOG=data/traces.jsonl 时写入 data/traces-2024-01-01.jsonl），
+多个进程只追加、不改名，超过 TRACE_RETENTION_DAYS 天的文件自动删除；报告只读取覆盖统计时段的文件。
+
+用法:
+  python tracing.py report [--hours 24] [--top 10] [--file data/traces.jsonl]
+"""
+
+import os
+import json
+import math
+import time
+import argparse
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from urllib.parse import urlsplit
+from collections import defaultdict
+
+from dotenv import load_dotenv
+
+STAGES = ('discover', 'fetch', 'extract', 'translate', 'persist', 'send', 'wait')
+
+_network = threading.local()
+
+
+def begin(news, t0=None):
+    """开始追踪一条新闻（NewsItem），t0 为首次在首页发现的时间"""
+    news.trace = {'t0': t0 if t0 is not None else time.time(), 'spans': []}
+
+
+def add_span(news, stage, start, duration):
+    """记录一个阶段的耗时（秒），未开启追踪的新闻直接忽略"""
+    trace = news.trace
+    if not trace:
+        return
+    trace['spans'].append([stage, round((start - trace['t0']) * 1000, 1), round(duration * 1000, 1)])
+
+
+@contextmanager
+def span(news, stage):
+    start = time.time()
+    try:
+        yield
+    finally:
+        add_span(news, stage, start, time.time() - start)
+
+
+@contextmanager
+def network_timer():
+    """累计当前线程在网络请求上花费的时间，用于区分 fetch 与 extract"""
+    start = time.time()
+    try:
+        yield
+    finally:
+        _network.total = network_time() + time.time() - start
+
+
+def network_time():
+    return getattr(_network, 'total', 0.0)
+
+
+def domain_of(url):
+    try:
+        host = (urlsplit(url).hostname or '').lower()
+    except ValueError:
+        return ''
+    return host[4:] if host.startswith('www.') else host
+
+
+def day_file(path, day):
+    """某一天的追踪日志文件: data/traces.jsonl -> data/traces-2024-01-01.jsonl"""
+    root, ext = os.path.splitext(path)
+    return f"{root}-{day.isoformat()}{ext}"
+
+
+def trace_files(path, since=None):
+    """覆盖 since 之后的按天日志文件（存在的），以及轮转之前的单个日志文件"""
+    first_day = date.fromtimestamp(since) if since is not None else None
+    root, ext = os.path.splitext(path)
+    directory = os.path.dirname(path) or '.'
+    prefix = os.path.basename(root) + '-'
+    files = [path] if os.path.exists(path) and (since is None or os.path.getmtime(path) >= since) else []
+    if not os.path.isdir(directory):
+        return files
+    for name in sorted(os.listdir(directory)):
+        if not (name.startswith(prefix) and name.endswith(ext)):
+            continue
+        try:
+            day = date.fromisoformat(name[len(prefix):len(name) - len(ext)])
+        except ValueError:
+            continue
+        if first_day is None or day >= first_day:
+            files.append(os.path.join(directory, name))
+    return files
+
+
+class TraceLog:
+    """追加写入的紧凑追踪日志（每行一个JSON），按天分文件，保留 retention_days 天"""
+
+    def __init__(self, path, retention_days=7):
+        self.path = path
+        self.retention_days = retention_days
+        self._day = None
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _current_file(self):
+        today = date.today()
+        if today != self._day:
+            self._day = today
+            self._remove_expired(today)
+        return day_file(self.path, today)
+
+    def _remove_expired(self, today):
+        """删除超过保留天数的日志文件；多个进程同时删除时忽略已不存在的文件"""
+        if not self.retention_days:
+            return
+        cutoff = datetime.combine(today - timedelta(days=self.retention_days - 1), datetime.min.time())
+        keep = set(trace_files(self.path, since=cutoff.timestamp()))
+        for file in trace_files(self.path):
+            if file not in keep:
+                try:
+                    os.remove(file)
+                except OSError:
+                    pass
+
+    def _append(self, record):
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+        with self._lock:
+            with open(self._current_file(), 'a', encoding='utf-8') as f:
+                f.write(line)
+
+    def record_processing(self, news):
+        """新闻处理完成并保存后调用"""
+        trace = news.trace
+        if not trace:
+            return
+        self._append({
+            'id': str(news.id),
+            'k': 'p',
+            'd': domain_of(news.url),
+            't0': round(trace['t0'], 3),
+            's': trace['spans'],
+        })
+        # 同一新闻可能分多次记录（发现时、按需补全后），已写入的span不再重复写
+        trace['spans'] = []
+
+    def record_send(self, news_id, sent_at, duration):
+        """新闻推送成功后调用"""
+        self._append({'id': str(news_id), 'k': 's', 't': round(sent_at, 3), 'ms': round(duration * 1000, 1)})
+
+
+def load_traces(path, since=None):
+    """读取 since 之后的追踪日志文件，按新闻id合并处理记录和发送记录"""
+    traces = {}
+    for file in trace_files(path, since):
+        with open(file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                trace = traces.setdefault(record['id'], {})
+                if record['k'] == 'p':
+                    trace.setdefault('domain', record.get('d', ''))
+                    trace.setdefault('t0', record['t0'])
+                    trace.setdefault('spans', []).extend(record.get('s', []))
+                elif record['k'] == 's' and 'sent_at' not in trace:
+                    trace.update(sent_at=record['t'], send_ms=record['ms'])
+    return {
+        news_id: trace for news_id, trace in traces.items()
+        if 't0' in trace and (since is None or trace['t0'] >= since)
+    }
+
+
+def percentile(values, p):
+    """最近秩百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(p / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def stage_totals(trace):
+    """每个阶段的耗时合计（毫秒），已发送的新闻额外计算 send 和 wait"""
+    totals = defaultdict(float)
+    for stage, _, duration in trace['spans']:
+        totals[stage] += duration
+    if 'sent_at' in trace:
+        totals['send'] += trace['send_ms']
+        e2e = (trace['sent_at'] - trace['t0']) * 1000
+        totals['wait'] = max(0.0, e2e - sum(totals.values()))
+    return totals
+
+
+def build_report(traces, top=10):
+    delivered = [t for t in traces.values() if 'sent_at' in t]
+    e2e = [(t['sent_at'] - t['t0']) * 1000 for t in delivered]
+
+    stage_values = defaultdict(list)
+    domain_e2e = defaultdict(list)
+    domain_stages = defaultdict(lambda: defaultdict(list))
+    for trace in traces.values():
+        for stage, value in stage_totals(trace).items():
+            stage_values[stage].append(value)
+            domain_stages[trace['domain']][stage].append(value)
+        if 'sent_at' in trace:
+            domain_e2e[trace['domain']].append((trace['sent_at'] - trace['t0']) * 1000)
+
+    domains = []
+    for domain, values in domain_e2e.items():
+        # wait 取决于推送批次而非域名，不参与最慢阶段的比较
+        stages = {stage: v for stage, v in domain_stages[domain].items() if stage != 'wait'}
+        slowest = max(stages, key=lambda s: percentile(stages[s], 50)) if stages else ''
+        domains.append({
+            'domain': domain or '(无)',
+            'count': len(values),
+            'p50_ms': percentile(values, 50),
+            'p95_ms': percentile(values, 95),
+            'slowest_stage': slowest,
+        })
+    domains.sort(key=lambda d: d['p95_ms'], reverse=True)
+
+    return {
+        'traced': len(traces),
+        'delivered': len(delivered),
+        'e2e': {f'p{p}_ms': percentile(e2e, p) for p in (50, 95, 99)},
+        'stages': {
+            stage: {f'p{p}_ms': percentile(stage_values[stage], p) for p in (50, 95, 99)}
+            for stage in STAGES if stage in stage_values
+        },
+        'domains': domains[:top],
+    }
+
+
+def format_duration(ms):
+    if ms >= 60000:
+        return f"{ms / 60000:.1f}m"
+    if ms >= 1000:
+        return f"{ms / 1000:.1f}s"
+    return f"{ms:.0f}ms"
+
+
+def print_report(report, hours):
+    print(f"📊 最近 {hours:g} 小时: 追踪 {report['traced']} 条新闻，已送达 {report['delivered']} 条")
+    e2e = report['e2e']
+    print(f"⏱️ 端到端延迟  p50 {format_duration(e2e['p50_ms'])}  p95 {format_duration(e2e['p95_ms'])}"
+          f"  p99 {format_duration(e2e['p99_ms'])}")
+
+    print("\n各阶段耗时:")
+    for stage, values in report['stages'].items():
+        print(f"  {stage:<10} p50 {format_duration(values['p50_ms']):>8}  p95 {format_duration(values['p95_ms']):>8}"
+              f"  p99 {format_duration(values['p99_ms']):>8}")
+
+    if report['domains']:
+        print("\n最慢的域名 (按端到端p95):")
+        for item in report['domains']:
+            print(f"  {item['domain']:<30} {item['count']:>4} 条  p50 {format_duration(item['p50_ms']):>8}"
+                  f"  p95 {format_duration(item['p95_ms']):>8}  最慢阶段: {item['slowest_stage']}")
+
+
+def main():
+    load_dotenv('config.env')
+    default_file = os.getenv('TRACE_LOG', os.path.join(os.getenv('DATA_DIR', 'data'), 'traces.jsonl'))
+
+    parser = argparse.ArgumentParser(description='Hacker News 新闻延迟追踪报告')
+    subparsers = parser.add_subparsers(dest='command')
+    report_parser = subparsers.add_parser('report', help='端到端与各阶段延迟分布')
+    report_parser.add_argument('--hours', type=float, default=24, help='统计最近多少小时 (默认24)')
+    report_parser.add_argument('--top', type=int, default=10, help='显示最慢的域名数量')
+    report_parser.add_argument('--file', default=default_file, help='追踪日志路径（按天分文件前的名称）')
+    report_parser.add_argument('--json', action='store_true', help='以JSON输出')
+    args = parser.parse_args()
+
+    if args.command != 'report':
+        parser.print_help()
+        return
+
+    traces = load_traces(args.file, since=time.time() - args.hours * 3600)
+    report = build_report(traces, top=args.top)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report, args.hours)
+
+
+if __name__ == "__main__":
+    main()
@@ -35,79 +35,80 @@ def load_config():
         print(f"❌ 加载配置失败: {e}")
         return False
 
+# 必需配置
+REQUIRED_CONFIGS = [
+    'TELEGRAM_BOT_TOKEN',
+    'TELEGRAM_CHAT_ID'
+]
+
+# 网络配置
+NETWORK_CONFIGS = [
+    'BASE_URL',
+    'REQUEST_TIMEOUT',
+    'CONNECTION_TEST_TIMEOUT',
+    'TRANSLATION_TIMEOUT',
+    'TELEGRAM_TIMEOUT',
+    'MAX_RETRIES',
+    'REQUEST_INTERVAL',
+    'USER_AGENT'
+]
+
+# 消息配置
+MESSAGE_CONFIGS = [
+    'MESSAGE_SEND_INTERVAL',
+    'MESSAGE_RETRY_INTERVAL',
+    'BULK_MESSAGE_INTERVAL',
+    'MESSAGE_MAX_RETRIES'
+]
+
+# 数据存储配置
+STORAGE_CONFIGS = [
+    'DATA_DIR',
+    'CSV_ENCODING',
+    'CSV_COLUMNS'
+]
+
+# 日志配置
+LOG_CONFIGS = [
+    'LOG_LEVEL',
+    'LOG_FILE',
+    'LOG_FORMAT'
+]
+
+# 功能开关
+FEATURE_CONFIGS = [
+    'ENABLE_TRANSLATION',
+    'ENABLE_CONTENT_SUMMARY',
+    'ENABLE_PROXY',
+    'ENABLE_WEB'
+]
+
+# 进程管理配置
+PROCESS_CONFIGS = [
+    'DAEMON_CHECK_INTERVAL',
+    'PROCESS_WAIT_TIME',
+    'PROCESS_STOP_WAIT_TIME'
+]
+
+# 按类别分组的配置项（live_config 热加载时也据此校验）
+CONFIG_GROUPS = {
+    '必需配置': REQUIRED_CONFIGS,
+    '网络配置': NETWORK_CONFIGS,
+    '消息配置': MESSAGE_CONFIGS,
+    '存储配置': STORAGE_CONFIGS,
+    '日志配置': LOG_CONFIGS,
+    '功能开关': FEATURE_CONFIGS,
+    '进程管理': PROCESS_CONFIGS
+}
+
 def validate_config():
     """验证配置项"""
     print("\n🔍 验证配置项...")
     
-    # 必需配置
-    required_configs = [
-        'TELEGRAM_BOT_TOKEN',
-        'TELEGRAM_CHAT_ID'
-    ]
-    
-    # 网络配置
-    network_configs = [
-        'BASE_URL',
-        'REQUEST_TIMEOUT',
-        'CONNECTION_TEST_TIMEOUT',
-        'TRANSLATION_TIMEOUT',
-        'TELEGRAM_TIMEOUT',
-        'MAX_RETRIES',
-        'REQUEST_INTERVAL',
-        'USER_AGENT'
-    ]
-    
-    # 消息配置
-    message_configs = [
-        'MESSAGE_SEND_INTERVAL',
-        'MESSAGE_RETRY_INTERVAL',
-        'BULK_MESSAGE_INTERVAL',
-        'MESSAGE_MAX_RETRIES'
-    ]
-    
-    # 数据存储配置
-    storage_configs = [
-        'DATA_DIR',
-        'CSV_ENCODING',
-        'CSV_COLUMNS'
-    ]
-    
-    # 日志配置
-    log_configs = [
-        'LOG_LEVEL',
-        'LOG_FILE',
-        'LOG_FORMAT'
-    ]
-    
-    # 功能开关
-    feature_configs = [
-        'ENABLE_TRANSLATION',
-        'ENABLE_CONTENT_SUMMARY',
-        'ENABLE_PROXY',
-        'ENABLE_WEB'
-    ]
-    
-    # 进程管理配置
-    process_configs = [
-        'DAEMON_CHECK_INTERVAL',
-        'PROCESS_WAIT_TIME',
-        'PROCESS_STOP_WAIT_TIME'
-    ]
-    
-    all_configs = {
-        '必需配置': required_configs,
-        '网络配置': network_configs,
-        '消息配置': message_configs,
-        '存储配置': storage_configs,
-        '日志配置': log_configs,
-        '功能开关': feature_configs,
-        '进程管理': process_configs
-    }
-    
     total_configs = 0
     loaded_configs = 0
     
-    for category, configs in all_configs.items():
+    for category, configs in CONFIG_GROUPS.items():
         print(f"\n📋 {category}:")
         for config in configs:
             total_configs += 1
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hacker News 爬虫 - 基于租约的工作队列
+
+协调器把新发现的新闻写入队列，多个工作进程（本机或共享存储的其他节点）
+以限时租约的方式领取任务，完成后确认；租约过期未确认的任务会被重新放回队列。
+队列存储在SQLite中，依赖其文件锁保证领取操作的原子性。
+任务内容是 NewsItem 的紧凑二进制序列化。
+"""
+
+import os
+import json
+import time
+import socket
+import sqlite3
+import logging
+
+from news_item import NewsItem
+
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class WorkQueue:
+    def __init__(self, db_path, lease_seconds=300, max_attempts=3):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS work_items (
+                    id TEXT PRIMARY KEY,
+                    payload BLOB NOT NULL,
+                    status TEXT NOT NULL,
+                    lease_owner TEXT,
+                    lease_expires REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    enqueued_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_work_items_status ON work_items (status, lease_expires)")
+
+    def _connect(self):
+        # isolation_level=None: 手动控制事务，领取时使用 BEGIN IMMEDIATE 获取写锁
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @staticmethod
+    def default_worker_id():
+        """生成工作进程标识: 主机名:PID"""
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def enqueue(self, news_list):
+        """把新闻加入队列，返回实际入队数量
+
+        已在队列中的ID会被忽略；之前失败（超过最大尝试次数）的任务重置为待处理，重新计数尝试次数
+        """
+        now = time.time()
+        added = 0
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for news in news_list:
+                cursor = conn.execute(
+                    "INSERT INTO work_items (id, payload, status, attempts, enqueued_at, updated_at) "
+                    "VALUES (?, ?, ?, 0, ?, ?) "
+                    "ON CONFLICT(id) DO UPDATE SET payload = excluded.payload, status = excluded.status, "
+                    "lease_owner = NULL, lease_expires = NULL, attempts = 0, "
+                    "enqueued_at = excluded.enqueued_at, updated_at = excluded.updated_at "
+                    "WHERE work_items.status = ?",
+                    (str(news.id), news.pack(), PENDING, now, now, FAILED)
+                )
+                added += cursor.rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return added
+
+    def _requeue_expired(self, conn, now):
+        """把过期租约放回队列，超过最大尝试次数的标记为失败"""
+        conn.execute(
+            "UPDATE work_items SET status = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+            "WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+            (FAILED, now, LEASED, now, self.max_attempts)
+        )
+        cursor = conn.execute(
+            "UPDATE work_items SET status = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+            "WHERE status = ? AND lease_expires < ?",
+            (PENDING, now, LEASED, now)
+        )
+        if cursor.rowcount:
+            logging.warning(f"⚠️ {cursor.rowcount} 个租约已过期，重新放回队列")
+        return cursor.rowcount
+
+    def requeue_expired(self):
+        """回收过期租约，返回重新入队的数量"""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            count = self._requeue_expired(conn, time.time())
+            conn.execute("COMMIT")
+            return count
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def claim(self, worker_id, limit=1):
+        """领取最多 limit 个任务，返回 [(id, news), ...]"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            self._requeue_expired(conn, now)
+            rows = conn.execute(
+                "SELECT id, payload FROM work_items WHERE status = ? ORDER BY enqueued_at LIMIT ?",
+                (PENDING, limit)
+            ).fetchall()
+            for item_id, _ in rows:
+                conn.execute(
+                    "UPDATE work_items SET status = ?, lease_owner = ?, lease_expires = ?, "
+                    "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    (LEASED, worker_id, now + self.lease_seconds, now, item_id)
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return [(item_id, self._decode(payload)) for item_id, payload in rows]
+
+    @staticmethod
+    def _decode(payload):
+        # 兼容升级前以JSON文本入队的任务
+        if isinstance(payload, str):
+            return NewsItem.from_row(json.loads(payload))
+        return NewsItem.unpack(payload)
+
+    def complete(self, item_id, worker_id):
+        """确认任务完成；租约已被回收时返回False"""
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "UPDATE work_items SET status = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND status = ? AND lease_owner = ?",
+                (DONE, time.time(), str(item_id), LEASED, worker_id)
+            )
+            return cursor.rowcount == 1
+        finally:
+            conn.close()
+
+    def release(self, item_id, worker_id):
+        """放弃任务，立即放回队列供其他工作进程领取；已达到最大尝试次数的标记为失败"""
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "UPDATE work_items SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+                "lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND status = ? AND lease_owner = ?",
+                (self.max_attempts, FAILED, PENDING, time.time(), str(item_id), LEASED, worker_id)
+            )
+            return cursor.rowcount == 1
+        finally:
+            conn.close()
+
+    def take_over_pending(self):
+        """协调器接手尚未被领取的任务（标记为完成，工作进程不会再领取），返回仍在处理中的任务ID
+
+        回收过期租约、接手待处理任务和读取有效租约在同一个事务中，
+        协调器自己补全的新闻不会再被工作进程重复补全
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            self._requeue_expired(conn, now)
+            cursor = conn.execute(
+                "UPDATE work_items SET status = ?, updated_at = ? WHERE status = ?", (DONE, now, PENDING)
+            )
+            if cursor.rowcount:
+                logging.info(f"📥 协调器接手 {cursor.rowcount} 个未被领取的任务")
+            rows = conn.execute("SELECT id FROM work_items WHERE status = ?", (LEASED,)).fetchall()
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return {item_id for item_id, in rows}
+
+    def stats(self):
+        """返回各状态的任务数量"""
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT status, COUNT(*) FROM work_items GROUP BY status").fetchall()
+        finally:
+            conn.close()
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        counts.update(dict(rows))
+        return counts
+
+    def purge_done(self, older_than_seconds=86400):
+        """清理已完成的历史任务，返回删除数量"""
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "DELETE FROM work_items WHERE status IN (?, ?) AND updated_at < ?",
+                (DONE, FAILED, time.time() - older_than_seconds)
+            )
+            return cursor.rowcount
+        finally:
+            conn.close()